@@ -0,0 +1 @@
+"""Performance benchmarks for the attendance system (run with ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,112 @@
+"""Latency of FaceEngine.detect_faces for every detection preset.
+
+Usage::
+
+    python -m benchmarks.bench_detection --images path/to/frames --repeat 20
+    python -m benchmarks.bench_detection --video lecture.mp4 --json out.json
+
+Without input the benchmark pastes the registered training crops onto a
+1080p noise canvas, which is enough to compare presets against each other.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from components.face_engine import FaceEngine
+from config import DETECTION_PRESETS, TRAINING_DIR
+
+
+def load_frames(images: Optional[Path] = None, video: Optional[Path] = None,
+                limit: int = 30, size=(1920, 1080)) -> List[np.ndarray]:
+    """Collect benchmark frames from a folder, a video or a synthetic canvas."""
+    frames: List[np.ndarray] = []
+    if images:
+        for path in sorted(images.iterdir())[:limit]:
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                frames.append(frame)
+    elif video:
+        cap = cv2.VideoCapture(str(video))
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if frames:
+        return frames
+
+    rng = np.random.default_rng(0)
+    width, height = size
+    crops = [cv2.imread(str(p)) for p in sorted(TRAINING_DIR.glob("*.jpg"))[:8]]
+    crops = [c for c in crops if c is not None]
+    for idx in range(min(limit, 10)):
+        canvas = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        for n, crop in enumerate(crops):
+            side = height // 5
+            crop = cv2.resize(crop, (side, side))
+            x = (n * side + idx * 13) % (width - side)
+            y = (height - side) // 2
+            canvas[y:y+side, x:x+side] = crop
+        frames.append(canvas)
+    return frames
+
+
+def bench_presets(frames: List[np.ndarray], repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Time detect_faces per preset on pre-converted grayscale frames."""
+    engine = FaceEngine()
+    grays = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+    results: Dict[str, Dict[str, float]] = {}
+    for preset in DETECTION_PRESETS:
+        engine.configure_detection(preset)
+        engine.detect_faces(grays[0])  # warm-up
+        samples, faces = [], 0
+        for _ in range(repeat):
+            for gray in grays:
+                start = time.perf_counter()
+                faces += len(engine.detect_faces(gray))
+                samples.append(time.perf_counter() - start)
+        samples.sort()
+        results[preset] = {
+            "frames": len(samples),
+            "mean_ms": statistics.fmean(samples) * 1000.0,
+            "p50_ms": samples[len(samples) // 2] * 1000.0,
+            "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000.0,
+            "faces_per_frame": faces / len(samples),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=Path, help="folder of frames to run on")
+    parser.add_argument("--video", type=Path, help="video file to take frames from")
+    parser.add_argument("--limit", type=int, default=30, help="maximum number of frames")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the frames per preset")
+    parser.add_argument("--json", type=Path, help="write results to this JSON file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.video, args.limit)
+    height, width = frames[0].shape[:2]
+    results = bench_presets(frames, args.repeat)
+
+    print(f"detect_faces on {len(frames)} frames at {width}x{height}")
+    print(f"{'preset':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'faces':>7}")
+    for preset, row in results.items():
+        print(f"{preset:<10} {row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['faces_per_frame']:>7.2f}")
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": [width, height], "presets": results}, indent=2),
+                             encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
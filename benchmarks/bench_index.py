@@ -0,0 +1,97 @@
+"""Recognition latency and recall of the candidate index as enrollment grows.
+
+Usage::
+
+    python -m benchmarks.bench_index --students 1000 2000 5000 10000 --candidates 10 20 50
+    python -m benchmarks.bench_index --json out.json
+
+For each enrollment size the synthetic students' LBPH histograms are put in
+a NumPy matcher, an unseen face per queried student is matched by brute
+force and through the index, and the per-face time of both is reported with
+the index's recall of the brute-force top-1. Brute force grows with the
+student count; the indexed time should stay roughly flat.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks import synthetic
+from components.candidate_index import CandidateIndex
+from components.face_engine import normalize_face
+from components.lbph_matcher import LBPHMatcher
+
+
+def build_histograms(students: int, samples: int) -> np.ndarray:
+    """``(students * samples, D)`` histograms of normalized synthetic faces."""
+    probe = LBPHMatcher(np.empty((0, 0)), np.empty(0))
+    return np.vstack([
+        probe.histogram(normalize_face(synthetic.make_face(enrollment, sample)))
+        for enrollment, _ in synthetic.make_students(students)
+        for sample in range(samples)
+    ])
+
+
+def bench_sizes(sizes: List[int], samples: int, dims: int, candidates: List[int],
+                queries: int = 100) -> List[Dict[str, float]]:
+    """One row per (enrollment size, candidates) with timings and recall."""
+    sizes = sorted(sizes)
+    histograms = build_histograms(sizes[-1], samples)
+    labels = np.repeat([e for e, _ in synthetic.make_students(sizes[-1])], samples)
+    results = []
+    for size in sizes:
+        matcher = LBPHMatcher(histograms[:size * samples], labels[:size * samples])
+        step = max(1, size // queries)
+        query_ids = [e for e, _ in synthetic.make_students(size)][::step][:queries]
+        batch = [matcher.histogram(normalize_face(synthetic.make_face(e, 999))) for e in query_ids]
+
+        start = time.perf_counter()
+        exact = [m[0][0] for m in matcher.match(batch)]
+        exact_ms = (time.perf_counter() - start) / len(batch) * 1000.0
+
+        start = time.perf_counter()
+        index = CandidateIndex(matcher, dims=dims)
+        build_s = time.perf_counter() - start
+        for count in candidates:
+            index.match(batch[:1], candidates=count)  # warm-up
+            start = time.perf_counter()
+            found = [m[0][0] for m in index.match(batch, candidates=count)]
+            ms = (time.perf_counter() - start) / len(batch) * 1000.0
+            results.append({
+                "students": size,
+                "samples": len(matcher),
+                "candidates": count,
+                "exact_ms": exact_ms,
+                "index_ms": ms,
+                "recall": float(np.mean([a == b for a, b in zip(found, exact)])),
+                "build_s": build_s,
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--samples", type=int, default=5, help="samples per student")
+    parser.add_argument("--dims", type=int, default=64, help="PCA components")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--json", type=Path, help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_sizes(args.students, args.samples, args.dims, args.candidates, args.queries)
+    print(f"{'students':>9} {'samples':>8} {'cand':>5} {'exact ms':>9} {'index ms':>9} {'recall':>7} {'build s':>8}")
+    for row in results:
+        print(f"{row['students']:>9} {row['samples']:>8} {row['candidates']:>5} {row['exact_ms']:>9.2f} "
+              f"{row['index_ms']:>9.2f} {row['recall']:>7.3f} {row['build_s']:>8.2f}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""Benchmark suite with a synthetic dataset and baseline comparison.
+
+Usage::
+
+    python -m benchmarks.run --scale small --output bench.json
+    python -m benchmarks.run --scale small --save-baseline
+    python -m benchmarks.run --scale medium --baseline benchmarks/baseline.json --threshold 0.15
+    python -m benchmarks.run --students 2000 --sessions 20000 --only compute_summary daily_counts
+
+All data is generated into a temporary workspace (``--workdir`` keeps it).
+Every case is timed ``--repeat`` times after one warm-up; the median is
+compared against the baseline and the run exits with status 1 when any
+case is slower than ``baseline * (1 + threshold)`` or raised an error
+(recorded as ``failed``; the other cases still run). Application logging
+goes to ``logs/app.log`` inside the workspace.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from benchmarks import synthetic
+from utils.logger import flush_logs, set_log_file
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+SCALES = {
+    "small": {"students": 50, "samples": 10, "sessions": 100},
+    "medium": {"students": 1000, "samples": 10, "sessions": 10000},
+    "large": {"students": 10000, "samples": 5, "sessions": 100000},
+}
+
+# name -> setup(workspace) returning (callable to time, items handled per call)
+Case = Callable[["Workspace"], Tuple[Callable[[], object], int]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def fit_model(faces: list, ids: list, model_path: Path):
+    """Train an LBPH model from scratch and publish it the way ``sync_model`` does.
+
+    The manifest next to ``model_path`` gets the normalization stamp, so
+    engines loading the model normalize faces like training did.
+    """
+    from components.model_store import (file_signature, load_manifest, normalization_stamp,
+                                        publish_model, save_manifest)
+    from config import TRAINING_MANIFEST
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(faces, np.array(ids))
+    publish_model(recognizer, model_path)
+    manifest_path = model_path.parent / TRAINING_MANIFEST.name
+    manifest = load_manifest(manifest_path)
+    manifest["model"] = file_signature(model_path)
+    manifest["normalize"] = normalization_stamp()
+    save_manifest(manifest, manifest_path)
+    return recognizer
+
+
+class Workspace:
+    """Synthetic data tree, generated lazily on first use."""
+
+    def __init__(self, root: Path, students: int, samples: int, sessions: int, excel_sessions: int):
+        self.root = root
+        self.students = synthetic.make_students(students)
+        self.samples = samples
+        self.sessions = sessions
+        self.excel_sessions = excel_sessions
+        self.training_dir = root / "TrainingImage"
+        self.attendance_dir = root / "Attendance"
+        self.excel_dir = root / "AttendanceExcel"
+        self.student_csv = root / "StudentDetails.csv"
+        self.model_path = root / "TrainingImageLabel" / "Trainner.yml"
+        self._training_paths: Optional[List[Path]] = None
+        self._faces: Optional[Tuple[list, list]] = None
+
+    def training_paths(self) -> List[Path]:
+        if self._training_paths is None:
+            self._training_paths = synthetic.write_training_tree(self.training_dir, self.students, self.samples)
+        return self._training_paths
+
+    def faces(self) -> Tuple[list, list]:
+        """Normalized training crops straight from the generator (no detection)."""
+        if self._faces is None:
+            from components.face_engine import normalize_face
+
+            faces, ids = [], []
+            for enrollment, _ in self.students:
+                for sample in range(1, self.samples + 1):
+                    faces.append(normalize_face(synthetic.make_face(enrollment, sample)))
+                    ids.append(enrollment)
+            self._faces = (faces, ids)
+        return self._faces
+
+    def model(self) -> Path:
+        if not self.model_path.exists():
+            fit_model(*self.faces(), model_path=self.model_path)
+        return self.model_path
+
+    def attendance(self) -> Path:
+        if not self.attendance_dir.exists():
+            synthetic.write_attendance_files(self.attendance_dir, self.students, self.sessions)
+        return self.attendance_dir
+
+    def excel_source(self) -> Path:
+        if not self.excel_dir.exists():
+            synthetic.write_attendance_files(self.excel_dir, self.students, self.excel_sessions, seed=1)
+        return self.excel_dir
+
+    def store(self, name: str = "attendance"):
+        """Attendance database holding the generated sessions (``excel`` for the export set)."""
+        from data.attendance_store import AttendanceStore
+
+        path = self.root / f"{name}.db"
+        fresh = not path.exists()
+        store = AttendanceStore(path)
+        if fresh:
+            store.import_csv_folder(self.excel_source() if name == "excel" else self.attendance())
+        return store
+
+    def csv(self) -> Path:
+        if not self.student_csv.exists():
+            synthetic.write_student_csv(self.student_csv, self.students)
+        return self.student_csv
+
+
+def _classroom_frame(ws: Workspace, faces: int = 15) -> np.ndarray:
+    crops = [synthetic.make_face(enrollment, 99) for enrollment, _ in ws.students[:faces]]
+    return synthetic.make_frame(crops)
+
+
+@case("detect_faces")
+def _detect_faces(ws: Workspace):
+    from components.face_engine import FaceEngine
+
+    engine = FaceEngine(model_path=ws.model_path)
+    gray = cv2.cvtColor(_classroom_frame(ws), cv2.COLOR_BGR2GRAY)
+    return (lambda: engine.detect_faces(gray)), 1
+
+
+@case("engine_start")
+def _engine_start(ws: Workspace):
+    from components.face_engine import FaceEngine
+
+    # Cascade and model come from the shared registry after the first engine
+    path = ws.model()
+    FaceEngine(model_path=path)
+    return (lambda: FaceEngine(model_path=path)), 1
+
+
+@case("recognize_face")
+def _recognize_face(ws: Workspace):
+    from components.face_engine import FaceEngine
+
+    engine = FaceEngine(model_path=ws.model())
+    faces = [synthetic.make_face(enrollment, 99) for enrollment, _ in ws.students[:15]]
+    gray = np.hstack(faces)
+    boxes = [(idx * 100, 0, 100, 100) for idx in range(len(faces))]
+    return (lambda: engine.recognize_faces(gray, boxes)), len(boxes)
+
+
+@case("recognize_closeup")
+def _recognize_closeup(ws: Workspace):
+    from components.face_engine import FaceEngine
+
+    # Same faces as recognize_face, as 400x400 crops of someone near the camera
+    engine = FaceEngine(model_path=ws.model())
+    faces = [cv2.resize(synthetic.make_face(enrollment, 99), (400, 400)) for enrollment, _ in ws.students[:15]]
+    gray = np.hstack(faces)
+    boxes = [(idx * 400, 0, 400, 400) for idx in range(len(faces))]
+    return (lambda: engine.recognize_faces(gray, boxes)), len(boxes)
+
+
+@case("recognize_numpy")
+def _recognize_numpy(ws: Workspace):
+    from components.lbph_matcher import LBPHMatcher
+
+    matcher = LBPHMatcher.from_yaml(ws.model())
+    faces = [synthetic.make_face(enrollment, 99) for enrollment, _ in ws.students[:15]]
+    return (lambda: matcher.predict_batch(faces)), len(faces)
+
+
+@case("recognize_prototypes")
+def _recognize_prototypes(ws: Workspace):
+    from components.lbph_matcher import LBPHMatcher
+    from components.prototypes import compress_matcher
+
+    matcher = compress_matcher(LBPHMatcher.from_yaml(ws.model()), 3)
+    faces = [synthetic.make_face(enrollment, 99) for enrollment, _ in ws.students[:15]]
+    return (lambda: matcher.predict_batch(faces)), len(faces)
+
+
+@case("load_model_yaml")
+def _load_model_yaml(ws: Workspace):
+    path = ws.model()
+
+    def run():
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(str(path))
+    return run, 1
+
+
+@case("load_model_npz")
+def _load_model_npz(ws: Workspace):
+    from components.lbph_matcher import LBPHMatcher, convert_model
+
+    path = convert_model(ws.model(), ws.root / "Trainner.npz")
+    return (lambda: LBPHMatcher.load(path)), 1
+
+
+@case("train_extract")
+def _train_extract(ws: Workspace):
+    from components.model_training import extract_faces
+
+    paths = ws.training_paths()
+    return (lambda: extract_faces(paths)), len(paths)
+
+
+@case("train_extract_legacy")
+def _train_extract_legacy(ws: Workspace):
+    from components.model_training import extract_faces
+
+    paths = synthetic.write_training_tree(ws.root / "LegacyImage", ws.students, ws.samples, registered=False)
+    cache = ws.root / "legacy_detection_cache.json"
+
+    def run():
+        # Start cold every time so each run pays for the cascade
+        cache.unlink(missing_ok=True)
+        extract_faces(paths, cache_path=cache)
+    return run, len(paths)
+
+
+@case("train_load_store")
+def _train_load_store(ws: Workspace):
+    from data.sample_store import SampleStore, import_folder
+
+    folder = ws.root / "samples"
+    if not SampleStore.exists(folder):
+        import_folder(SampleStore(folder), ws.training_dir, list(ws.training_paths()), move=False)
+
+    def run():
+        faces, labels = SampleStore(folder).live_rows()
+        return np.array(faces), np.array(labels)
+    return run, len(ws.training_paths())
+
+
+@case("train_extract_1proc")
+def _train_extract_1proc(ws: Workspace):
+    from components.model_training import extract_faces
+
+    paths = ws.training_paths()
+    return (lambda: extract_faces(paths, workers=1)), len(paths)
+
+
+@case("train_fit")
+def _train_fit(ws: Workspace):
+    faces, ids = ws.faces()
+    target = ws.root / "bench_fit" / "bench_model.yml"
+    return (lambda: fit_model(faces, ids, model_path=target)), len(faces)
+
+
+@case("train_add_student")
+def _train_add_student(ws: Workspace):
+    from components.model_store import sync_model
+
+    paths = list(ws.training_paths())
+    model = ws.root / "incremental" / "Trainner.yml"
+    manifest = model.with_name("training_manifest.json")
+    sync_model(paths, model_path=model, manifest_path=manifest, store_dir=None)
+    counter = iter(range(10 ** 6))
+
+    def run():
+        # One new student registers, then the model is brought up to date
+        enrollment = 800000 + next(counter)
+        added = synthetic.write_training_tree(ws.root / "new_students", [(enrollment, f"New{enrollment}")],
+                                              ws.samples)
+        paths.extend(added)
+        sync_model(paths, model_path=model, manifest_path=manifest, store_dir=None)
+    return run, ws.samples
+
+
+@case("compute_summary")
+def _compute_summary(ws: Workspace):
+    from components.analytics import compute_summary
+
+    store = ws.store()
+    return (lambda: compute_summary(store=store)), ws.sessions
+
+
+@case("daily_counts")
+def _daily_counts(ws: Workspace):
+    from components.analytics import daily_counts
+
+    store = ws.store()
+    return (lambda: daily_counts(store=store)), ws.sessions
+
+
+@case("today_count")
+def _today_count(ws: Workspace):
+    store = ws.store()
+    return (lambda: store.record_count("2026-02-01")), 1
+
+
+@case("rebuild_aggregates")
+def _rebuild_aggregates(ws: Workspace):
+    store = ws.store()
+    return store.rebuild_aggregates, ws.sessions
+
+
+@case("import_csv")
+def _import_csv(ws: Workspace):
+    from data.attendance_store import AttendanceStore
+
+    folder = ws.attendance()
+    target = ws.root / "import.db"
+
+    def run():
+        target.unlink(missing_ok=True)
+        store = AttendanceStore(target)
+        store.import_csv_folder(folder)
+        store.close()
+    return run, ws.sessions
+
+
+@case("read_students")
+def _read_students(ws: Workspace):
+    from data.database_handler import read_students
+
+    path = ws.csv()
+    return (lambda: read_students(path)), len(ws.students)
+
+
+@case("student_lookup")
+def _student_lookup(ws: Workspace):
+    from data.student_registry import open_registry
+
+    registry = open_registry(ws.csv())
+    ids = [enrollment for enrollment, _ in ws.students]
+
+    def run():
+        for enrollment in ids:
+            registry.name_for(enrollment)
+    return run, len(ids)
+
+
+@case("append_student_row")
+def _append_student_row(ws: Workspace):
+    from data.database_handler import append_student_row
+
+    path = ws.root / "StudentDetails_append.csv"
+    shutil.copy(ws.csv(), path)
+    counter = iter(range(10 ** 9))
+
+    def run():
+        n = next(counter)
+        append_student_row({'Enrollment': 900000 + n, 'Name': f"New{n}",
+                            'Date': "2026-02-01", 'Time': "09:00:00"}, path)
+    return run, 1
+
+
+@case("excel_export")
+def _excel_export(ws: Workspace):
+    from data.report_export import export_excel_report
+    import openpyxl  # noqa: F401  (ImportError marks the case as skipped)
+
+    store = ws.store("excel")
+    out = ws.root / "reports"
+    out.mkdir(exist_ok=True)
+    return (lambda: export_excel_report(out, store)), ws.excel_sessions
+
+
+def run_cases(ws: Workspace, names: List[str], repeat: int) -> Dict[str, Dict[str, object]]:
+    results: Dict[str, Dict[str, object]] = {}
+    for name in names:
+        print(f"  {name:<20}", end="", flush=True)
+        try:
+            start = time.perf_counter()
+            fn, items = CASES[name](ws)
+            setup = time.perf_counter() - start
+            fn()  # warm-up
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - start)
+        except ImportError as exc:
+            results[name] = {"skipped": str(exc)}
+            print(f"skipped ({exc})")
+            continue
+        except Exception as exc:
+            # One broken case must not cost the results of the others
+            results[name] = {"failed": f"{type(exc).__name__}: {exc}"}
+            print(f"FAILED ({type(exc).__name__}: {exc})")
+            continue
+        median = statistics.median(samples)
+        results[name] = {
+            "median_s": median,
+            "min_s": min(samples),
+            "mean_s": statistics.fmean(samples),
+            "items": items,
+            "per_item_ms": median / items * 1000.0 if items else None,
+            "setup_s": setup,
+            "runs": len(samples),
+        }
+        print(f"{median * 1000.0:10.2f} ms  ({items} items)")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, object]], baseline: Dict[str, Dict[str, object]],
+            threshold: float) -> List[str]:
+    """Print a comparison table and return the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':<20} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if "median_s" not in row or not base or "median_s" not in base:
+            continue
+        ratio = row["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1.0 + threshold else ""
+        print(f"{name:<20} {base['median_s'] * 1000:>12.2f} {row['median_s'] * 1000:>12.2f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the attendance benchmark suite.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--students", type=int, help="override the number of synthetic students")
+    parser.add_argument("--samples", type=int, help="override training samples per student")
+    parser.add_argument("--sessions", type=int, help="override the number of attendance files")
+    parser.add_argument("--excel-sessions", type=int, default=200, help="sessions used by excel_export")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--workdir", type=Path, help="keep generated data here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown before failing")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in ("students", "samples", "sessions"):
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    root = args.workdir or Path(tempfile.mkdtemp(prefix="attendance_bench_"))
+    root.mkdir(parents=True, exist_ok=True)
+    # Cases log through the app modules; keep that out of the real logs/app.log
+    set_log_file(root / "logs" / "app.log")
+    ws = Workspace(root, scale["students"], scale["samples"], scale["sessions"], args.excel_sessions)
+    names = args.only or list(CASES)
+
+    print(f"Benchmarking {', '.join(f'{k}={v}' for k, v in scale.items())} in {root}")
+    try:
+        results = run_cases(ws, names, args.repeat)
+    finally:
+        flush_logs()
+        if args.workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "scale": scale,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("scale") != scale:
+            print("\nWarning: baseline was recorded at a different scale")
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    failed = [name for name, row in results.items() if "failed" in row]
+    if failed:
+        print(f"\n{len(failed)} case(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
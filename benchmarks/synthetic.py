@@ -0,0 +1,135 @@
+"""Deterministic synthetic data for the benchmarks.
+
+Everything is generated from a seed so two runs at the same scale produce
+identical trees: student lists, face-like grayscale crops, a
+``TrainingImage`` folder and months of ``Attendance/*.csv`` session files.
+
+The faces are simple drawings (head ellipse, eyes, brows, nose and mouth)
+whose geometry is fixed per student and jittered per sample. They are
+distinct enough for LBPH to tell students apart; the Haar cascade is not
+guaranteed to fire on them, so detection timings measure cascade cost,
+not hit rate.
+"""
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Student = Tuple[int, str]
+
+SUBJECTS = ["Maths", "Physics", "Chemistry", "Biology", "English", "Hindi", "History", "Computer"]
+
+
+def make_students(count: int, start: int = 1000) -> List[Student]:
+    """Return ``count`` (enrollment, name) pairs."""
+    return [(start + idx, f"Student{start + idx}") for idx in range(count)]
+
+
+def make_face(enrollment: int, sample: int = 0, size: int = 100) -> np.ndarray:
+    """Draw a grayscale face crop whose features depend on the student."""
+    geometry = np.random.default_rng(enrollment)
+    jitter = np.random.default_rng(enrollment * 1000 + sample)
+
+    skin = int(geometry.integers(110, 200))
+    face = np.full((size, size), int(geometry.integers(20, 70)), dtype=np.uint8)
+    centre = (size // 2 + int(jitter.integers(-2, 3)), size // 2 + int(jitter.integers(-2, 3)))
+    axes = (int(size * geometry.uniform(0.30, 0.40)), int(size * geometry.uniform(0.40, 0.48)))
+    cv2.ellipse(face, centre, axes, 0, 0, 360, skin, -1)
+
+    eye_y = int(size * geometry.uniform(0.36, 0.46))
+    eye_dx = int(size * geometry.uniform(0.12, 0.20))
+    eye_r = max(2, int(size * geometry.uniform(0.04, 0.07)))
+    brow = int(size * geometry.uniform(0.06, 0.12))
+    for side in (-1, 1):
+        ex = centre[0] + side * eye_dx
+        cv2.circle(face, (ex, eye_y), eye_r, skin - 90, -1)
+        cv2.line(face, (ex - eye_r * 2, eye_y - brow), (ex + eye_r * 2, eye_y - brow - side), skin - 70, 2)
+
+    nose = int(size * geometry.uniform(0.55, 0.62))
+    cv2.line(face, (centre[0], eye_y + eye_r), (centre[0] + 1, nose), skin - 40, 2)
+    mouth_y = int(size * geometry.uniform(0.68, 0.78))
+    mouth_w = int(size * geometry.uniform(0.10, 0.18))
+    cv2.ellipse(face, (centre[0], mouth_y), (mouth_w, max(2, mouth_w // 3)), 0, 0, 180, skin - 80, 2)
+
+    noise = jitter.normal(0, 6, face.shape)
+    face = np.clip(face.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(face, (3, 3), 0)
+
+
+def make_frame(faces: Sequence[np.ndarray], size: Tuple[int, int] = (1920, 1080), seed: int = 0) -> np.ndarray:
+    """Paste face crops onto a noisy BGR canvas of ``size`` (width, height)."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    canvas = rng.integers(40, 200, (height, width), dtype=np.uint8)
+    canvas = cv2.GaussianBlur(canvas, (9, 9), 0)
+    side = height // 6
+    for idx, crop in enumerate(faces):
+        x = (idx * side * 5 // 4) % max(1, width - side)
+        y = (height - side) // 2 + ((idx % 2) * side // 2) - side // 4
+        canvas[y:y+side, x:x+side] = cv2.resize(crop, (side, side))
+    return cv2.cvtColor(canvas, cv2.COLOR_GRAY2BGR)
+
+
+def write_student_csv(path: Path, students: Sequence[Student]) -> None:
+    """Write a StudentDetails.csv for ``students``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Enrollment", "Name", "Date", "Time"])
+        for enrollment, name in students:
+            writer.writerow([enrollment, name, "2026-01-01", "09:00:00"])
+
+
+def write_training_tree(folder: Path, students: Sequence[Student], samples: int = 30,
+                        size: int = 100, registered: bool = True) -> List[Path]:
+    """Write ``name.enrollment.sample.jpg`` crops.
+
+    With ``registered`` the crops and sidecars are written the way
+    registration does (normalized, no detection needed at training time);
+    otherwise they are bare legacy images that training must detect.
+    """
+    from components.face_samples import FaceSampleWriter
+
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for enrollment, name in students:
+        writer = FaceSampleWriter(folder, name, str(enrollment))
+        for sample in range(1, samples + 1):
+            face = make_face(enrollment, sample, size)
+            if registered:
+                path = writer.add(face, (0, 0, size, size), sample)
+            else:
+                path = folder / f"{name}.{enrollment}.{sample}.jpg"
+                cv2.imwrite(str(path), face)
+            paths.append(path)
+        writer.close()
+    return paths
+
+
+def write_attendance_files(folder: Path, students: Sequence[Student], sessions: int,
+                           days: int = 120, per_session: int = 40, seed: int = 0) -> List[Path]:
+    """Write ``sessions`` attendance CSVs spread over the last ``days`` days."""
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start = date(2026, 1, 1)
+    paths = []
+    for idx in range(sessions):
+        day = start + timedelta(days=int(rng.integers(0, max(1, days))))
+        stamp = datetime.combine(day, datetime.min.time()) + timedelta(seconds=8 * 3600 + idx % 36000)
+        subject = SUBJECTS[idx % len(SUBJECTS)]
+        path = folder / f"{subject}_{stamp.strftime('%Y-%m-%d_%H-%M-%S')}_{idx}.csv"
+        count = min(per_session, len(students))
+        chosen = rng.choice(len(students), size=count, replace=False) if count else []
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Enrollment", "Name", "Date", "Time"])
+            for pos in chosen:
+                enrollment, name = students[int(pos)]
+                writer.writerow([enrollment, name, day.isoformat(), stamp.strftime("%H:%M:%S")])
+        paths.append(path)
+    return paths
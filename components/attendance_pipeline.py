@@ -0,0 +1,369 @@
+"""Threaded capture -> recognition -> display pipeline for attendance sessions.
+
+The camera is read on its own thread which only ever keeps the newest frame,
+so a slow detector can never make the camera buffer fill with stale frames.
+A recognition worker consumes those frames and publishes results that the
+UI thread renders at its own pace. All hand-offs go through bounded
+``DropOldestQueue`` instances: when a consumer falls behind, the oldest item
+is discarded instead of blocking the producer.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Generic, List, Optional, Tuple, TypeVar
+
+import cv2
+import numpy as np
+
+from components.face_engine import FaceEngine, FaceTracker, MotionGate
+from config import IDLE_POLL_INTERVAL, MOTION_GATE_ENABLED
+from utils.logger import log_error
+from utils.profiler import FrameProfiler
+
+T = TypeVar("T")
+
+
+class DropOldestQueue(Generic[T]):
+    """Bounded FIFO that discards its oldest item when a new one arrives full."""
+
+    def __init__(self, maxsize: int = 1):
+        self._items: Deque[T] = deque()
+        self._maxsize = max(1, maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item: T) -> None:
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        """Pop the oldest item, or return None if nothing arrives in time."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def get_latest(self, timeout: Optional[float] = None) -> Optional[T]:
+        """Pop the newest item and discard anything older."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+
+@dataclass
+class FramePacket:
+    index: int
+    captured_at: float
+    frame: np.ndarray
+
+
+@dataclass
+class FrameResult:
+    packet: FramePacket
+    faces: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    predictions: List[Tuple[int, float]] = field(default_factory=list)
+    track_ids: List[int] = field(default_factory=list)
+    matched: List[bool] = field(default_factory=list)  # identity committed by track voting
+    processed_at: float = 0.0
+
+    @property
+    def frame(self) -> np.ndarray:
+        return self.packet.frame
+
+
+class FrameGrabber(threading.Thread):
+    """Read the camera continuously and keep only the newest frame.
+
+    While ``low_power`` is set the thread sleeps out the rest of each
+    ``idle_interval`` and then grabs and decodes one frame, so an idle
+    session costs almost nothing whether or not the source's ``grab()``
+    blocks (files and frame folders never do).
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, output: DropOldestQueue[FramePacket],
+                 profiler: Optional[FrameProfiler] = None, idle_interval: float = IDLE_POLL_INTERVAL,
+                 recorder: Optional["FrameRecorder"] = None):
+        super().__init__(name="frame-grabber", daemon=True)
+        self.cap = cap
+        self.output = output
+        self.profiler = profiler or FrameProfiler(enabled=False)
+        self.recorder = recorder
+        self.idle_interval = idle_interval
+        self.stop_event = threading.Event()
+        self.low_power = threading.Event()
+        self.ended = threading.Event()
+
+    def run(self) -> None:
+        index = 0
+        last_decoded = 0.0
+        try:
+            while not self.stop_event.is_set():
+                if self.low_power.is_set():
+                    remaining = self.idle_interval - (time.perf_counter() - last_decoded)
+                    if remaining > 0 and self.stop_event.wait(remaining):
+                        break
+                    if not self.low_power.is_set():
+                        continue  # woke up by motion elsewhere; read at full rate
+                    if not self.cap.grab():
+                        break
+                    ret, frame = self.cap.retrieve()
+                else:
+                    with self.profiler.span("capture"):
+                        ret, frame = self.cap.read()
+                if not ret:
+                    break
+                last_decoded = time.perf_counter()
+                if self.recorder is not None:
+                    self.recorder.write(frame)
+                self.output.put(FramePacket(index, time.perf_counter(), frame))
+                index += 1
+        except Exception as exc:
+            log_error(f"Frame capture error: {exc}")
+        finally:
+            self.ended.set()
+
+
+class FrameProcessor:
+    """Detection, tracking and recognition for one stream of frames.
+
+    The cascade only runs when the tracker asks for it, and recognition only
+    runs for tracks that have no cached identity yet, so the per-frame cost
+    follows the number of new people rather than frames x faces. With a
+    motion gate, a static empty scene skips detection altogether and, once
+    idle, sets ``low_power`` so the grabber polls slowly until motion returns.
+    """
+
+    def __init__(self, engine: FaceEngine, profiler: Optional[FrameProfiler] = None,
+                 tracker: Optional[FaceTracker] = None, motion_gate: Optional[MotionGate] = None,
+                 low_power: Optional[threading.Event] = None):
+        self.engine = engine
+        self.profiler = profiler or FrameProfiler(enabled=False)
+        self.tracker = tracker or FaceTracker()
+        self.motion_gate = motion_gate
+        self.low_power = low_power or threading.Event()
+        self.paused = threading.Event()
+
+    def process(self, packet: FramePacket) -> FrameResult:
+        result = FrameResult(packet)
+        if self.paused.is_set():
+            # Faces may have moved arbitrarily by the time we resume.
+            self.tracker.reset()
+        else:
+            with self.profiler.span("grayscale"):
+                gray = self.engine.to_gray(packet.frame)
+            if self.motion_gate is not None:
+                with self.profiler.span("motion"):
+                    moving = self.motion_gate.update(gray)
+                if not moving and not self.tracker.tracks:
+                    # Static scene with nobody in view: skip detection entirely.
+                    if self.motion_gate.idle:
+                        self.low_power.set()
+                    result.processed_at = time.perf_counter()
+                    return result
+                self.low_power.clear()
+
+            if self.tracker.needs_detection(packet.index):
+                with self.profiler.span("detect"):
+                    boxes = self.engine.detect_faces(gray)
+                tracks = self.tracker.update(gray, boxes, packet.index)
+            else:
+                with self.profiler.span("track"):
+                    tracks = self.tracker.follow(gray)
+
+            pending = self.tracker.pending()
+            if pending:
+                with self.profiler.span("recognize"):
+                    predictions = self.engine.recognize_faces(gray, [t.box for t in pending])
+                for track, prediction in zip(pending, predictions):
+                    self.tracker.record(track, prediction)
+
+            result.faces = [t.box for t in tracks]
+            result.predictions = [t.prediction for t in tracks]
+            result.matched = [t.matched for t in tracks]
+            result.track_ids = [t.track_id for t in tracks]
+        result.processed_at = time.perf_counter()
+        return result
+
+
+class RecognitionWorker(threading.Thread):
+    """Feed the newest captured frame to a FrameProcessor on a worker thread."""
+
+    def __init__(self, processor: FrameProcessor, frames: DropOldestQueue[FramePacket],
+                 output: DropOldestQueue[FrameResult], source_ended: threading.Event):
+        super().__init__(name="recognition-worker", daemon=True)
+        self.processor = processor
+        self.frames = frames
+        self.output = output
+        self.source_ended = source_ended
+        self.stop_event = threading.Event()
+        self.ended = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self.stop_event.is_set():
+                packet = self.frames.get(timeout=0.1)
+                if packet is None:
+                    if self.source_ended.is_set():
+                        break
+                    continue
+                self.output.put(self.processor.process(packet))
+        except Exception as exc:
+            log_error(f"Recognition worker error: {exc}")
+        finally:
+            self.ended.set()
+
+
+class AttendancePipeline:
+    """Wire a camera, a recognition worker and a result queue together.
+
+    The caller (normally the Tk thread) polls ``next_result`` at display rate
+    and owns all UI work, including marking attendance.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, engine: FaceEngine,
+                 profiler: Optional[FrameProfiler] = None, result_buffer: int = 2,
+                 recorder: Optional["FrameRecorder"] = None):
+        self.profiler = profiler or FrameProfiler(enabled=False)
+        self.frames: DropOldestQueue[FramePacket] = DropOldestQueue(maxsize=1)
+        self.results: DropOldestQueue[FrameResult] = DropOldestQueue(maxsize=result_buffer)
+        self.grabber = FrameGrabber(cap, self.frames, self.profiler, recorder=recorder)
+        gate = MotionGate() if MOTION_GATE_ENABLED else None
+        self.processor = FrameProcessor(engine, self.profiler, motion_gate=gate,
+                                        low_power=self.grabber.low_power)
+        self.worker = RecognitionWorker(self.processor, self.frames, self.results, self.grabber.ended)
+
+    def start(self) -> "AttendancePipeline":
+        self.grabber.start()
+        self.worker.start()
+        return self
+
+    def next_result(self, timeout: float = 0.03) -> Optional[FrameResult]:
+        """Return the newest processed frame, or None if none is ready yet."""
+        result = self.results.get_latest(timeout)
+        if result is not None:
+            self.profiler.add("latency", time.perf_counter() - result.packet.captured_at)
+        return result
+
+    def set_paused(self, paused: bool) -> None:
+        """Pass frames through without detection (e.g. while a thank-you is shown)."""
+        if paused:
+            self.processor.paused.set()
+        else:
+            self.processor.paused.clear()
+
+    @property
+    def finished(self) -> bool:
+        return self.worker.ended.is_set()
+
+    def stop(self) -> None:
+        self.grabber.stop_event.set()
+        self.worker.stop_event.set()
+        self.grabber.join(timeout=2)
+        self.worker.join(timeout=2)
+
+    def dropped_frames(self) -> int:
+        return self.frames.dropped + self.results.dropped
+
+
+class ImageFolderCapture:
+    """Minimal ``cv2.VideoCapture`` look-alike that replays a folder of frames in name order."""
+
+    EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+    def __init__(self, folder: Path):
+        self.paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in self.EXTENSIONS)
+        self._pos = 0
+        self._pending: Optional[Path] = None
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def grab(self) -> bool:
+        if self._pos >= len(self.paths):
+            self._pending = None
+            return False
+        self._pending = self.paths[self._pos]
+        self._pos += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._pending is None:
+            return False, None
+        frame = cv2.imread(str(self._pending))
+        return frame is not None, frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self) -> None:
+        self.paths = []
+
+
+def is_live_source(source: str) -> bool:
+    """Camera indices are live; files and folders are replayed frame by frame."""
+    return str(source).isdigit()
+
+
+def open_source(source: str):
+    """Open a camera index, a video file or a folder of frames."""
+    if is_live_source(source):
+        return cv2.VideoCapture(int(source))
+    path = Path(source)
+    if path.is_dir():
+        return ImageFolderCapture(path)
+    return cv2.VideoCapture(str(path))
+
+
+class FrameRecorder(threading.Thread):
+    """Write raw captured frames to ``folder`` as numbered JPEGs on a background thread.
+
+    The folder can later be replayed with ``ImageFolderCapture``. Frames are
+    copied on submission because the UI draws on the originals.
+    """
+
+    def __init__(self, folder: Path, max_pending: int = 64, quality: int = 95):
+        super().__init__(name="frame-recorder", daemon=True)
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.quality = quality
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.dropped = 0
+        self.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        try:
+            self._queue.put_nowait(frame.copy())
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self) -> None:
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            cv2.imwrite(str(self.folder / f"frame_{self.written:06d}.jpg"), frame, params)
+            self.written += 1
+
+    def close(self) -> None:
+        """Flush the remaining frames and stop the writer thread."""
+        self._queue.put(None)
+        self.join()
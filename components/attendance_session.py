@@ -0,0 +1,82 @@
+"""Marking and saving logic shared by every attendance front end."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from config import JOURNAL_ENABLED
+from data.attendance_store import save_session
+from data.session_journal import SessionJournal
+from utils.logger import log_error, log_info
+
+
+class AttendanceSession:
+    """Students marked during one session, saved to the attendance database.
+
+    With ``journal`` every mark is also appended to a write-ahead journal
+    (opened with the first mark) so the session survives a crash; ``save``
+    seals it.
+    """
+
+    def __init__(self, subject: str, enrollment_to_name: Dict[int, str], journal: bool = JOURNAL_ENABLED):
+        self.subject = subject
+        self.enrollment_to_name = enrollment_to_name
+        self.started = datetime.now()
+        self.rows: List[dict] = []
+        self._marked: Set[int] = set()
+        self._use_journal = journal
+        self._journal: Optional[SessionJournal] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, enrollment_id: int) -> bool:
+        return enrollment_id in self._marked
+
+    def name_for(self, enrollment_id: int) -> str:
+        return self.enrollment_to_name.get(enrollment_id, f"ID-{enrollment_id}")
+
+    def _journal_row(self, row: dict) -> None:
+        try:
+            if self._journal is None:
+                self._journal = SessionJournal.create(self.subject, self.started)
+            self._journal.append(row)
+        except OSError as exc:
+            log_error(f"Session journal write failed, continuing in memory only: {exc}")
+            self._use_journal = False
+            if self._journal is not None:
+                self._journal.discard()
+                self._journal = None
+
+    def mark(self, enrollment_id: int) -> Optional[dict]:
+        """Mark a student once; return the new row, or None if already marked."""
+        if enrollment_id in self._marked:
+            return None
+        self._marked.add(enrollment_id)
+        now = datetime.now()
+        row = {
+            'Enrollment': enrollment_id,
+            'Name': self.name_for(enrollment_id),
+            'Date': now.strftime("%Y-%m-%d"),
+            'Time': now.strftime("%H:%M:%S"),
+        }
+        self.rows.append(row)
+        if self._use_journal:
+            self._journal_row(row)
+        log_info(f"Marked: {row['Name']} ({enrollment_id})")
+        return row
+
+    def save(self) -> Optional[int]:
+        """Store the session in the attendance database (plus its CSV mirror).
+
+        Returns the session id, or None when nobody was marked.
+        """
+        if not self.rows:
+            return None
+        label = self._journal.label if self._journal else None
+        session_id, csv_path = save_session(self.subject, self.rows, self.started, source="auto", label=label)
+        if self._journal is not None:
+            self._journal.seal(session_id)
+        log_info(f"Attendance saved: {self.subject} session {session_id}, {len(self.rows)} students"
+                 + (f" ({csv_path.name})" if csv_path else ""))
+        return session_id
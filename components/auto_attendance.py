@@ -2,17 +2,19 @@
 from __future__ import annotations
 
 import tkinter as tk
-from datetime import datetime
 from pathlib import Path
-from typing import Optional, Set
+from typing import Optional
 
 import cv2
-import pandas as pd
 
+from components.attendance_pipeline import AttendancePipeline
+from components.attendance_session import AttendanceSession
 from components.face_engine import FaceEngine
-from config import ATTENDANCE_DIR, STUDENT_CSV
-from data.database_handler import read_students
+from components.subject_models import model_for_subject
+from config import PROFILE_ENABLED, PROFILE_OVERLAY
+from data.student_registry import open_registry
 from utils.logger import log_info, log_error
+from utils.profiler import FrameProfiler
 
 
 def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class") -> None:
@@ -88,15 +90,13 @@ def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class")
         win.update()
 
         try:
-            students_df = read_students()
-            if students_df.empty:
+            enrollment_to_name = open_registry().names()
+            if not enrollment_to_name:
                 status_var.set("❌ No students registered! Register students first.")
                 status_label.config(bg="#dc3545")
                 return
 
-            enrollment_to_name = dict(zip(students_df['Enrollment'], students_df['Name']))
-
-            engine = FaceEngine()
+            engine = FaceEngine(model_path=model_for_subject(subject))
             if not engine.model_loaded:
                 status_var.set("❌ No trained model found! Train the model first.")
                 status_label.config(bg="#dc3545")
@@ -107,96 +107,103 @@ def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class")
             win.update()
 
             cap = cv2.VideoCapture(0)
-            marked_students: Set[int] = set()
-            attendance_data = []
-
-            thank_you_display_until = [0]  # Timestamp until which to display thank you
+            pipeline = None
+            try:
+                session = AttendanceSession(subject, enrollment_to_name)
+                attendance_data = session.rows
+
+                thank_you_display_until = [0]  # Timestamp until which to display thank you
+                profiler = FrameProfiler(f"auto_{subject}", enabled=PROFILE_ENABLED)
+                pipeline = AttendancePipeline(cap, engine, profiler).start()
             
-            while running[0]:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # Check if we're in thank-you display mode
-                current_time = cv2.getTickCount() / cv2.getTickFrequency()
+                while running[0]:
+                    result = pipeline.next_result()
+                    if result is None:
+                        if pipeline.finished:
+                            break
+                        win.update()
+                        continue
+                    frame = result.frame
+
+                    # Check if we're in thank-you display mode
+                    current_time = cv2.getTickCount() / cv2.getTickFrequency()
                 
-                if current_time < thank_you_display_until[0]:
-                    # Display thank-you message on camera feed
-                    overlay = frame.copy()
-                    cv2.rectangle(overlay, (0, 0), (frame.shape[1], frame.shape[0]), (0, 180, 0), -1)
-                    cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+                    if current_time < thank_you_display_until[0]:
+                        # Display thank-you message on camera feed
+                        overlay = frame.copy()
+                        cv2.rectangle(overlay, (0, 0), (frame.shape[1], frame.shape[0]), (0, 180, 0), -1)
+                        cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
                     
-                    # Get the last marked student name from attendance_data
-                    if attendance_data:
-                        last_name = attendance_data[-1]['Name']
-                        thank_you_text = f"Thank You, {last_name}!"
+                        # Get the last marked student name from attendance_data
+                        if attendance_data:
+                            last_name = attendance_data[-1]['Name']
+                            thank_you_text = f"Thank You, {last_name}!"
                         
-                        # Calculate text size and position for centering
-                        font = cv2.FONT_HERSHEY_SIMPLEX
-                        font_scale = 2.5
-                        thickness = 5
-                        (text_width, text_height), _ = cv2.getTextSize(thank_you_text, font, font_scale, thickness)
+                            # Calculate text size and position for centering
+                            font = cv2.FONT_HERSHEY_SIMPLEX
+                            font_scale = 2.5
+                            thickness = 5
+                            (text_width, text_height), _ = cv2.getTextSize(thank_you_text, font, font_scale, thickness)
                         
-                        x = (frame.shape[1] - text_width) // 2
-                        y = (frame.shape[0] + text_height) // 2
+                            x = (frame.shape[1] - text_width) // 2
+                            y = (frame.shape[0] + text_height) // 2
                         
-                        # Draw text with shadow
-                        cv2.putText(frame, thank_you_text, (x+3, y+3), font, font_scale, (0, 0, 0), thickness+2)
-                        cv2.putText(frame, thank_you_text, (x, y), font, font_scale, (255, 255, 255), thickness)
-                else:
-                    # Normal face detection mode
-                    faces = engine.detect_faces(frame)
-                    for x, y, w, h in faces:
-                        enrollment_id, confidence = engine.recognize_face(frame, x, y, w, h)
-                        
-                        if confidence < 70:  # Confidence threshold for match
-                            name = enrollment_to_name.get(enrollment_id, f"ID-{enrollment_id}")
+                            # Draw text with shadow
+                            cv2.putText(frame, thank_you_text, (x+3, y+3), font, font_scale, (0, 0, 0), thickness+2)
+                            cv2.putText(frame, thank_you_text, (x, y), font, font_scale, (255, 255, 255), thickness)
+                    else:
+                        # Normal face detection mode
+                        pipeline.set_paused(False)
+                        for (x, y, w, h), (enrollment_id, confidence), matched in zip(
+                                result.faces, result.predictions, result.matched):
+                            if matched:  # Identity committed by multi-frame voting
+                                name = session.name_for(enrollment_id)
                             
-                            if enrollment_id not in marked_students:
-                                marked_students.add(enrollment_id)
-                                now = datetime.now()
-                                attendance_data.append({
-                                    'Enrollment': enrollment_id,
-                                    'Name': name,
-                                    'Date': now.strftime("%Y-%m-%d"),
-                                    'Time': now.strftime("%H:%M:%S")
-                                })
-                                
-                                log_info(f"Marked: {name} ({enrollment_id})")
-                                count_var.set(f"Students Marked: {len(marked_students)}")
-                                update_marked_list(attendance_data)
-                                win.update()
+                                if session.mark(enrollment_id) is not None:
+                                    count_var.set(f"Students Marked: {len(session)}")
+                                    update_marked_list(attendance_data)
                                 
-                                # Show thank-you in UI
-                                show_thank_you(name, enrollment_id)
+                                    # Show thank-you in UI
+                                    show_thank_you(name, enrollment_id)
                                 
-                                # Set timer for camera feed thank-you display (2 seconds)
-                                thank_you_display_until[0] = cv2.getTickCount() / cv2.getTickFrequency() + 2.0
+                                    # Set timer for camera feed thank-you display (2 seconds)
+                                    thank_you_display_until[0] = cv2.getTickCount() / cv2.getTickFrequency() + 2.0
+                                    # No need to detect while the thank-you overlay is up
+                                    pipeline.set_paused(True)
                             
-                            color = (0, 255, 0)  # Green for recognized
-                        else:
-                            name = "Unknown"
-                            color = (0, 0, 255)  # Red for unrecognized
-
-                        engine.draw_detection(frame, x, y, w, h, f"{name} ({confidence:.1f})", color)
-
-                cv2.imshow(f"Auto Attendance - {subject} (Continuous Mode - Press Q to end)", frame)
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    running[0] = False
-                    break
-
-            cap.release()
-            cv2.destroyAllWindows()
-
-            if attendance_data:
-                now = datetime.now()
-                filename = f"{subject}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
-                filepath = ATTENDANCE_DIR / filename
-                df = pd.DataFrame(attendance_data)
-                df.to_csv(filepath, index=False)
-                
-                log_info(f"Attendance saved: {filename}")
+                                color = (0, 255, 0)  # Green for recognized
+                            else:
+                                name = "Unknown"
+                                color = (0, 0, 255)  # Red for unrecognized
+
+                            with profiler.span("draw"):
+                                engine.draw_detection(frame, x, y, w, h, f"{name} ({confidence:.1f})", color)
+
+                    if PROFILE_OVERLAY:
+                        profiler.draw_overlay(frame)
+                    with profiler.span("display"):
+                        cv2.imshow(f"Auto Attendance - {subject} (Continuous Mode - Press Q to end)", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                        win.update()
+                    profiler.end_frame()
+                    if key == ord('q'):
+                        running[0] = False
+                        break
+            finally:
+                # Also on errors, so the camera and worker threads are never left running
+                if pipeline is not None:
+                    pipeline.stop()
+                cap.release()
+                cv2.destroyAllWindows()
+
+            if pipeline.dropped_frames():
+                log_info(f"Pipeline dropped {pipeline.dropped_frames()} stale frames")
+
+            profile_path = profiler.dump()
+            if profile_path:
+                log_info(f"Session profile saved: {profile_path.name}")
+
+            if session.save():
                 status_var.set(f"✅ Session Complete! {len(attendance_data)} students marked.")
                 status_label.config(bg="#28a745")
                 message_var.set(f"Complete!\n{len(attendance_data)} Students")
@@ -4,15 +4,18 @@ from __future__ import annotations
 import tkinter as tk
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Set
+from typing import Optional
 
 import cv2
-import pandas as pd
 
+from components.attendance_pipeline import AttendancePipeline
+from components.attendance_session import AttendanceSession
 from components.face_engine import FaceEngine
-from config import ATTENDANCE_DIR, STUDENT_CSV
-from data.database_handler import read_students
+from components.subject_models import model_for_subject
+from config import PROFILE_ENABLED, PROFILE_OVERLAY
+from data.student_registry import open_registry
 from utils.logger import log_info, log_error
+from utils.profiler import FrameProfiler
 
 
 def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class") -> None:
@@ -90,15 +93,13 @@ def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class")
         win.update()
 
         try:
-            students_df = read_students()
-            if students_df.empty:
+            enrollment_to_name = open_registry().names()
+            if not enrollment_to_name:
                 status_var.set("❌ No students registered!")
                 status_label.config(bg="#dc3545")
                 return
 
-            enrollment_to_name = dict(zip(students_df['Enrollment'], students_df['Name']))
-
-            engine = FaceEngine()
+            engine = FaceEngine(model_path=model_for_subject(subject))
             if not engine.model_loaded:
                 status_var.set("❌ No trained model found! Train the model first.")
                 status_label.config(bg="#dc3545")
@@ -109,70 +110,69 @@ def mark_auto_attendance(master: Optional[tk.Tk] = None, subject: str = "Class")
             win.update()
 
             cap = cv2.VideoCapture(0)
-            marked_students: Set[int] = set()
-            attendance_data = []
-            session_start = datetime.now()
-            
-            # Cooldown tracking for duplicate prevention
-            last_marked = {}  # enrollment_id -> timestamp
-
-            while running[0]:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                faces = engine.detect_faces(frame)
-                for x, y, w, h in faces:
-                    enrollment_id, confidence = engine.recognize_face(frame, x, y, w, h)
-                    
-                    if confidence < 70:  # Match threshold
-                        name = enrollment_to_name.get(enrollment_id, f"ID-{enrollment_id}")
+            pipeline = None
+            try:
+                session = AttendanceSession(subject, enrollment_to_name)
+                attendance_data = session.rows
+                profiler = FrameProfiler(f"auto_enhanced_{subject}", enabled=PROFILE_ENABLED)
+                pipeline = AttendancePipeline(cap, engine, profiler).start()
+
+                while running[0]:
+                    result = pipeline.next_result()
+                    if result is None:
+                        if pipeline.finished:
+                            break
+                        win.update()
+                        continue
+                    frame = result.frame
+
+                    for (x, y, w, h), (enrollment_id, confidence), matched in zip(
+                            result.faces, result.predictions, result.matched):
+                        if matched:  # Identity committed by multi-frame voting
+                            name = session.name_for(enrollment_id)
                         
-                        # Only mark once with cooldown period
-                        current_time = datetime.now()
-                        if enrollment_id not in marked_students:
-                            marked_students.add(enrollment_id)
-                            now = datetime.now()
-                            time_str = now.strftime("%H:%M:%S")
-                            attendance_data.append({
-                                'Enrollment': enrollment_id,
-                                'Name': name,
-                                'Date': now.strftime("%Y-%m-%d"),
-                                'Time': time_str
-                            })
-                            
-                            log_info(f"Marked: {name} ({enrollment_id})")
-                            count_var.set(f"Students Marked: {len(marked_students)}")
-                            update_marked_list(attendance_data)
+                            # Only mark once per session
+                            if session.mark(enrollment_id) is not None:
+                                count_var.set(f"Students Marked: {len(session)}")
+                                update_marked_list(attendance_data)
                             
-                            # Show thank you message (non-blocking with auto-restart)
-                            show_thank_you(name, enrollment_id)
+                                # Show thank you message (non-blocking with auto-restart)
+                                show_thank_you(name, enrollment_id)
                         
-                        color = (0, 255, 0)  # Green
-                    else:
-                        name = "Unknown"
-                        color = (0, 0, 255)  # Red
-
-                    engine.draw_detection(frame, x, y, w, h, f"{name} ({confidence:.1f})", color)
-
-                cv2.imshow(f"Auto Attendance - {subject} (Press Q to end)", frame)
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    running[0] = False
-                    break
-
-            cap.release()
-            cv2.destroyAllWindows()
-
-            if attendance_data:
+                            color = (0, 255, 0)  # Green
+                        else:
+                            name = "Unknown"
+                            color = (0, 0, 255)  # Red
+
+                        with profiler.span("draw"):
+                            engine.draw_detection(frame, x, y, w, h, f"{name} ({confidence:.1f})", color)
+
+                    if PROFILE_OVERLAY:
+                        profiler.draw_overlay(frame)
+                    with profiler.span("display"):
+                        cv2.imshow(f"Auto Attendance - {subject} (Press Q to end)", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                        win.update()
+                    profiler.end_frame()
+                    if key == ord('q'):
+                        running[0] = False
+                        break
+            finally:
+                # Also on errors, so the camera and worker threads are never left running
+                if pipeline is not None:
+                    pipeline.stop()
+                cap.release()
+                cv2.destroyAllWindows()
+
+            if pipeline.dropped_frames():
+                log_info(f"Pipeline dropped {pipeline.dropped_frames()} stale frames")
+
+            profile_path = profiler.dump()
+            if profile_path:
+                log_info(f"Session profile saved: {profile_path.name}")
+
+            if session.save():
                 now = datetime.now()
-                filename = f"{subject}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
-                filepath = ATTENDANCE_DIR / filename
-                
-                df = pd.DataFrame(attendance_data)
-                df.to_csv(filepath, index=False)
-                
-                log_info(f"Attendance saved: {filename}")
                 
                 status_var.set(f"✅ Attendance Complete! {len(attendance_data)} students marked.")
                 status_label.config(bg="#28a745")
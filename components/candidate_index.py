@@ -0,0 +1,202 @@
+"""Candidate-pruning index in front of the NumPy LBPH matcher.
+
+A brute-force scan compares every face with every stored histogram, so its
+cost grows with enrollment. The index adds a coarse stage:
+
+1. Histograms are mapped to ``sqrt(h)`` (Hellinger space, where Euclidean
+   distance tracks chi-square closely) and projected to ``dims`` PCA
+   components fitted on a sample of the model.
+2. Each student is summarised by the centroid of their projected samples.
+3. A query is projected the same way, the ``candidates`` nearest student
+   centroids are picked with one small matrix product, and only those
+   students' samples are scored with exact chi-square.
+
+``dims`` and ``candidates`` are the recall/latency knobs: more of either
+raises recall and cost. The exact stage costs ``candidates x samples per
+student`` whatever the enrollment; only the centroid product (``students
+x dims``) still grows, and that is cheap.
+
+Tune on a real model with::
+
+    python -m components.candidate_index TrainingImageLabel/Trainner.npz --dims 32 64 --candidates 10 20 50
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from components.lbph_matcher import LBPHMatcher
+from config import INDEX_CANDIDATES, INDEX_DIMS
+
+PROJECT_BLOCK = 4096  # samples projected at a time while building
+
+
+class CandidateIndex:
+    """Coarse student shortlist (PCA over sqrt-histograms) plus exact rescoring."""
+
+    def __init__(self, matcher: LBPHMatcher, dims: int = INDEX_DIMS, candidates: int = INDEX_CANDIDATES,
+                 fit_sample: int = 2000, seed: int = 0, _state: Optional[Dict[str, np.ndarray]] = None):
+        self.matcher = matcher
+        self.candidates = candidates
+        if _state is not None:
+            self.__dict__.update(_state)
+            return
+        labels = matcher.labels
+        self.order = np.argsort(labels, kind="stable")
+        self.students, starts, counts = np.unique(labels[self.order], return_index=True, return_counts=True)
+        self.offsets = np.append(starts, len(self.order))
+        self.mean, self.components = self._fit_pca(dims, fit_sample, seed)
+        projected = self._project_samples()[self.order]
+        self.centroids = (np.add.reduceat(projected, starts, axis=0) / counts[:, None]).astype(np.float32) \
+            if len(starts) else np.empty((0, self.components.shape[1]), np.float32)
+        self._centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.matcher)
+
+    # Matcher-compatible surface so FaceEngine can use either
+    @property
+    def threshold(self) -> float:
+        return self.matcher.threshold
+
+    def histogram(self, face: np.ndarray) -> np.ndarray:
+        return self.matcher.histogram(face)
+
+    def _fit_pca(self, dims: int, fit_sample: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and top ``dims`` principal axes of sqrt-histograms, via the Gram matrix of a sample."""
+        n = len(self.matcher)
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(n, size=min(n, fit_sample), replace=False)) if n else np.empty(0, np.int64)
+        sample = np.sqrt(self.matcher.columns[:, rows].T)
+        mean = sample.mean(axis=0) if len(rows) else np.zeros(self.matcher.columns.shape[0], np.float32)
+        centred = sample - mean
+        gram = centred.astype(np.float64) @ centred.T.astype(np.float64)
+        values, vectors = np.linalg.eigh(gram)
+        top = np.argsort(values)[::-1][:min(dims, len(values))]
+        top = top[values[top] > 1e-12]
+        components = (centred.T @ vectors[:, top].astype(np.float32)) / np.sqrt(values[top]).astype(np.float32)
+        return mean.astype(np.float32), np.ascontiguousarray(components, dtype=np.float32)
+
+    def _project_samples(self) -> np.ndarray:
+        n = len(self.matcher)
+        out = np.empty((n, self.components.shape[1]), dtype=np.float32)
+        for lo in range(0, n, PROJECT_BLOCK):
+            hi = min(n, lo + PROJECT_BLOCK)
+            out[lo:hi] = (np.sqrt(self.matcher.columns[:, lo:hi].T) - self.mean) @ self.components
+        return out
+
+    def shortlist(self, queries: np.ndarray, candidates: Optional[int] = None) -> np.ndarray:
+        """Indices (into ``students``) of the nearest centroids, one row per query."""
+        candidates = min(candidates or self.candidates, len(self.students))
+        projected = (np.sqrt(queries) - self.mean) @ self.components
+        # |c - p|^2 up to the per-query constant |p|^2
+        scores = self._centroid_norms[None, :] - 2.0 * projected @ self.centroids.T
+        if candidates >= len(self.students):
+            return np.tile(np.arange(len(self.students)), (len(queries), 1))
+        return np.argpartition(scores, candidates - 1, axis=1)[:, :candidates]
+
+    def candidate_rows(self, student_idx: np.ndarray) -> np.ndarray:
+        """Matcher rows of the given students."""
+        return np.concatenate([self.order[self.offsets[s]:self.offsets[s + 1]] for s in student_idx])
+
+    def match(self, queries: Sequence[np.ndarray], k: int = 1,
+              candidates: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """Same contract as ``LBPHMatcher.match``, scoring only shortlisted students."""
+        if not len(queries):
+            return []
+        if not len(self.students):
+            return [[(-1, float("inf"))] for _ in queries]
+        batch = np.vstack([np.asarray(q, dtype=np.float32).reshape(1, -1) for q in queries])
+        results = []
+        for query, shortlist in zip(batch, self.shortlist(batch, candidates)):
+            rows = self.candidate_rows(shortlist)
+            results.append(self.matcher.top_k(self.matcher.distances(query, rows), k, rows))
+        return results
+
+    def predict_batch(self, faces: Sequence[np.ndarray], k: int = 1) -> List[List[Tuple[int, float]]]:
+        return self.match([self.histogram(face) for face in faces], k)
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, order=self.order, students=self.students, offsets=self.offsets, mean=self.mean,
+                 components=self.components, centroids=self.centroids)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, matcher: LBPHMatcher, candidates: int = INDEX_CANDIDATES) -> "CandidateIndex":
+        with np.load(path) as data:
+            state = {key: data[key] for key in data.files}
+        state["_centroid_norms"] = np.einsum("ij,ij->i", state["centroids"], state["centroids"])
+        return cls(matcher, candidates=candidates, _state=state)
+
+
+def index_path_for(model_path: Path) -> Path:
+    """``Trainner.yml`` -> ``Trainner.index.npz``."""
+    return model_path.with_name(model_path.stem + ".index.npz")
+
+
+def evaluate(matcher: LBPHMatcher, dims_options: Sequence[int], candidate_options: Sequence[int],
+             queries: int = 200, seed: int = 0) -> Dict[str, object]:
+    """Recall of the exact top-1 and per-face latency for each knob setting.
+
+    One sample each of up to ``queries`` students is held out as the query
+    set; the rest forms the model. Recall is the share of queries whose
+    indexed top-1 equals the brute-force top-1.
+    """
+    rng = np.random.default_rng(seed)
+    labels = matcher.labels
+    held: List[int] = []
+    for label in rng.permutation(np.unique(labels))[:queries]:
+        rows = np.flatnonzero(labels == label)
+        if len(rows) > 1:
+            held.append(int(rng.choice(rows)))
+    keep = np.setdiff1d(np.arange(len(labels)), held)
+    histograms = matcher.columns.T
+    base = LBPHMatcher(histograms[keep], labels[keep], matcher.radius, matcher.neighbors,
+                       matcher.grid_x, matcher.grid_y, matcher.threshold)
+    query_set = np.ascontiguousarray(histograms[held])
+
+    start = time.perf_counter()
+    exact = [m[0][0] for m in base.match(query_set)]
+    exact_ms = (time.perf_counter() - start) / max(1, len(held)) * 1000.0
+
+    rows = []
+    for dims in dims_options:
+        start = time.perf_counter()
+        index = CandidateIndex(base, dims=dims)
+        build_s = time.perf_counter() - start
+        for candidates in candidate_options:
+            start = time.perf_counter()
+            found = [m[0][0] for m in index.match(query_set, candidates=candidates)]
+            ms = (time.perf_counter() - start) / max(1, len(held)) * 1000.0
+            recall = float(np.mean([a == b for a, b in zip(found, exact)])) if held else 0.0
+            rows.append({"dims": dims, "candidates": candidates, "recall": recall,
+                         "ms_per_face": ms, "build_s": build_s})
+    return {"samples": len(base), "students": int(len(np.unique(labels))), "queries": len(held),
+            "exact_ms_per_face": exact_ms, "settings": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure recall vs latency of the candidate index.")
+    parser.add_argument("model", type=Path, help="Trainner.yml or Trainner.npz")
+    parser.add_argument("--dims", type=int, nargs="+", default=[32, 64])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[5, 10, 20, 50])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    matcher = LBPHMatcher.load(args.model) if args.model.suffix == ".npz" else LBPHMatcher.from_yaml(args.model)
+    report = evaluate(matcher, args.dims, args.candidates, args.queries)
+    print(f"{report['samples']} samples, {report['students']} students, {report['queries']} queries; "
+          f"exact scan {report['exact_ms_per_face']:.2f} ms/face")
+    print(f"{'dims':>5} {'cand':>5} {'recall':>7} {'ms/face':>8}")
+    for row in report["settings"]:
+        print(f"{row['dims']:>5} {row['candidates']:>5} {row['recall']:>7.3f} {row['ms_per_face']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
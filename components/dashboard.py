@@ -4,7 +4,7 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Optional
 
-from config import ATTENDANCE_DIR
+from config import ATTENDANCE_DB
 from components.analytics import compute_summary, daily_counts
 
 
@@ -36,7 +36,7 @@ class Dashboard(tk.Toplevel):
         title.pack()
         subtitle = tk.Label(
             header,
-            text=f"Data source: {ATTENDANCE_DIR}",
+            text=f"Data source: {ATTENDANCE_DB}",
             bg="#163a5c",
             fg="#b5d3ff",
             font=("Arial", 11),
@@ -81,7 +81,7 @@ class Dashboard(tk.Toplevel):
         style.configure("Treeview.Heading", background="#163a5c", foreground="white")
 
     def _build_daily_counts(self):
-        frame = tk.LabelFrame(self, text="Daily Counts", bg="#102840", fg="white")
+        frame = tk.LabelFrame(self, text="Daily Counts (30 most recent days)", bg="#102840", fg="white")
         frame.pack(fill="both", expand=True, padx=12, pady=8)
 
         columns = ("date", "records")
@@ -92,7 +92,8 @@ class Dashboard(tk.Toplevel):
         self.daily_tree.pack(fill="both", expand=True, padx=8, pady=8)
 
     def refresh_data(self):
-        summary = compute_summary(limit=50)
+        # All-time totals from the aggregates; only the list is capped
+        summary = compute_summary(latest=50)
         self.total_files_var.set(summary["total_files"])
         self.total_records_var.set(summary["total_records"])
         self.unique_students_var.set(summary["unique_students"])
@@ -106,7 +107,7 @@ class Dashboard(tk.Toplevel):
         # Daily counts
         for row in self.daily_tree.get_children():
             self.daily_tree.delete(row)
-        for date, count in daily_counts(limit=50):
+        for date, count in daily_counts(days=30):
             self.daily_tree.insert("", "end", values=(date, count))
 
 
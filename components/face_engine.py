@@ -1,50 +1,269 @@
 """Face detection and recognition engine using OpenCV and LBPH."""
 from __future__ import annotations
 
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
 
-from config import CASCADE_PATH, MODEL_PATH
+from components.resources import LoadedModel, resources
+from config import (
+    DETECTION_PRESET,
+    DETECTION_PRESETS,
+    DETECTION_ROI,
+    IDLE_AFTER,
+    MATCH_THRESHOLD,
+    MODEL_PATH,
+    MODEL_RELOAD_INTERVAL,
+    MOTION_MIN_AREA,
+    MOTION_PIXEL_DELTA,
+    MOTION_WIDTH,
+    NORMALIZE_EQUALIZE,
+    NORMALIZE_SIZE,
+    TRACK_DETECT_EVERY,
+    TRACK_IOU_THRESHOLD,
+    TRACK_MAX_MISSES,
+    TRACK_MIN_SCORE,
+    VOTE_AGGREGATE,
+    VOTE_MAX_ATTEMPTS,
+    VOTE_MIN_SHARE,
+    VOTE_MIN_VOTES,
+)
+from utils.logger import log_error, log_info
+
+Box = Tuple[int, int, int, int]
+
+
+def normalize_face(face: np.ndarray, size: Optional[Tuple[int, int]] = NORMALIZE_SIZE,
+                   equalize: bool = NORMALIZE_EQUALIZE, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Resize a grayscale face to the canonical ``size`` and optionally equalize it.
+
+    Training and recognition must both go through this so the model sees
+    the same kind of input. A face that is already canonical is returned
+    as is.
+    """
+    if size is not None and (face.shape[1], face.shape[0]) != tuple(size):
+        interpolation = cv2.INTER_AREA if face.shape[1] > size[0] else cv2.INTER_LINEAR
+        face = cv2.resize(face, tuple(size), dst=dst, interpolation=interpolation)
+    if equalize:
+        face = cv2.equalizeHist(face)
+    return face
 
 
 class FaceEngine:
     """Real-world face detection and recognition engine."""
 
-    def __init__(self):
-        self.cascade = cv2.CascadeClassifier(str(CASCADE_PATH))
-        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
-        self.model_loaded = False
-        if MODEL_PATH.exists():
-            try:
-                self.recognizer.read(str(MODEL_PATH))
-                self.model_loaded = True
-            except Exception:
-                pass
+    def __init__(self, preset: Optional[str] = None,
+                 roi: Optional[Tuple[float, float, float, float]] = DETECTION_ROI,
+                 model_path: Path = MODEL_PATH):
+        cascade = resources.cascade()
+        self.cascade = cascade.value
+        self._cascade_lock = cascade.lock
+        self.detection: Dict[str, float] = {}
+        self.roi = roi
+        self.configure_detection(preset or DETECTION_PRESET)
+        # Scratch buffers reused across frames; one engine per thread.
+        self._gray_buf: Optional[np.ndarray] = None
+        self._roi_buf = np.empty(0, dtype=np.uint8)
+        self._detect_buf: Optional[np.ndarray] = None
+        self._norm_buf: Optional[np.ndarray] = None
+        self.model_path = model_path
+        # Shared with every engine on the same model; only read from here
+        self._use_model(resources.model(model_path))
+        self._model_checked = time.monotonic()
+        self._pending_model: Optional[LoadedModel] = None
+        self._reloading = False
+
+    def _use_model(self, model: LoadedModel) -> None:
+        self._model = model
+        self.recognizer = model.recognizer
+        self.matcher = model.matcher
+        self.model_loaded = model.loaded
+        # Predict on faces shaped like the ones the model was trained on
+        self.normalize_size = model.normalize_size
+        self.normalize_equalize = model.normalize_equalize
+
+    def refresh_model(self) -> bool:
+        """Swap in a newly published model; returns True when it did.
+
+        Called between frames. Every ``MODEL_RELOAD_INTERVAL`` seconds the
+        model files are stat'ed; if they changed, the new model is loaded
+        on a side thread (the camera keeps running) and swapped in by the
+        first call after it is ready.
+        """
+        pending = self._pending_model
+        if pending is not None:
+            self._pending_model = None
+            self._use_model(pending)
+            log_info(f"Recognition model reloaded from {self.model_path}")
+            return True
+        now = time.monotonic()
+        if not MODEL_RELOAD_INTERVAL or self._reloading or now - self._model_checked < MODEL_RELOAD_INTERVAL:
+            return False
+        self._model_checked = now
+        if resources.model_is_current(self.model_path):
+            return False
+        self._reloading = True
+        threading.Thread(target=self._load_pending, name="model-reload", daemon=True).start()
+        return False
+
+    def _load_pending(self) -> None:
+        try:
+            model = resources.model(self.model_path)
+            if model is not self._model and model.loaded:
+                self._pending_model = model
+        except Exception as exc:
+            log_error(f"Model reload failed: {exc}")
+        finally:
+            self._reloading = False
+
+    def to_gray(self, image: np.ndarray) -> np.ndarray:
+        """Convert a BGR frame to grayscale into a reused buffer.
+
+        The returned array is overwritten by the next call; grayscale input
+        is returned unchanged.
+        """
+        if image.ndim == 2:
+            return image
+        h, w = image.shape[:2]
+        if self._gray_buf is None or self._gray_buf.shape != (h, w):
+            self._gray_buf = np.empty((h, w), dtype=np.uint8)
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+        return self._gray_buf
+
+    def configure_detection(self, preset: Optional[str] = None, **overrides: float) -> None:
+        """Select a named preset from ``DETECTION_PRESETS`` and/or override single settings."""
+        if preset is not None:
+            if preset not in DETECTION_PRESETS:
+                raise ValueError(f"Unknown detection preset: {preset}")
+            self.detection = dict(DETECTION_PRESETS[preset])
+            self.preset = preset
+        for key, value in overrides.items():
+            if key not in self.detection:
+                raise ValueError(f"Unknown detection setting: {key}")
+            self.detection[key] = value
+
+    def _roi_rect(self, height: int, width: int) -> Box:
+        if not self.roi:
+            return 0, 0, width, height
+        fx, fy, fw, fh = self.roi
+        x, y = int(fx * width), int(fy * height)
+        return x, y, max(1, min(int(fw * width), width - x)), max(1, min(int(fh * height), height - y))
 
     def detect_faces(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
         """Detect faces in image.
         
+        Accepts a BGR frame or an already converted grayscale frame. The
+        cascade runs on the configured ROI, downscaled to ``detect_width``,
+        with min/max face sizes taken from the preset; boxes are mapped
+        back to full-frame coordinates.
         Returns list of (x, y, w, h) tuples for each detected face.
         """
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = self.cascade.detectMultiScale(gray, 1.3, 5)
-        return [(int(x), int(y), int(w), int(h)) for x, y, w, h in faces]
+        gray = self.to_gray(image)
+        rx, ry, rw, rh = self._roi_rect(*gray.shape[:2])
+        region = gray[ry:ry+rh, rx:rx+rw]
 
-    def recognize_face(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> Tuple[int, float]:
-        """Recognize a face.
+        settings = self.detection
+        scale = 1.0
+        detect_width = int(settings["detect_width"])
+        if detect_width and rw > detect_width:
+            scale = detect_width / float(rw)
+            size = (detect_width, max(1, int(round(rh * scale))))
+            if self._detect_buf is None or self._detect_buf.shape != (size[1], size[0]):
+                self._detect_buf = np.empty((size[1], size[0]), dtype=np.uint8)
+            cv2.resize(region, size, dst=self._detect_buf, interpolation=cv2.INTER_AREA)
+            region = self._detect_buf
+
+        height = region.shape[0]
+        min_side = int(settings["min_face"] * height)
+        max_side = int(settings["max_face"] * height)
+        with self._cascade_lock:
+            faces = self.cascade.detectMultiScale(
+                region,
+                scaleFactor=settings["scale_factor"],
+                minNeighbors=int(settings["min_neighbors"]),
+                minSize=(min_side, min_side) if min_side > 0 else (0, 0),
+                maxSize=(max_side, max_side) if max_side > 0 else (0, 0),
+            )
+        inv = 1.0 / scale
+        return [
+            (rx + int(x * inv), ry + int(y * inv), int(w * inv), int(h * inv))
+            for x, y, w, h in faces
+        ]
+
+    def _face_roi(self, gray: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """Copy a face region into the contiguous scratch buffer."""
+        region = gray[max(y, 0):y+h, max(x, 0):x+w]
+        size = region.shape[0] * region.shape[1]
+        if self._roi_buf.size < size:
+            self._roi_buf = np.empty(size, dtype=np.uint8)
+        roi = self._roi_buf[:size].reshape(region.shape)
+        np.copyto(roi, region)
+        return roi
+
+    def normalize_face(self, gray: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """Canonical face for one box, written into a reused buffer.
+
+        Close-up faces are shrunk before LBP, so prediction cost no longer
+        depends on how near someone stands.
+        """
+        if self.normalize_size is None:
+            return normalize_face(self._face_roi(gray, x, y, w, h), None, self.normalize_equalize)
+        region = gray[max(y, 0):y+h, max(x, 0):x+w]
+        if region.size == 0:
+            return region
+        width, height = self.normalize_size
+        if self._norm_buf is None or self._norm_buf.shape != (height, width):
+            self._norm_buf = np.empty((height, width), dtype=np.uint8)
+        if region.shape == self._norm_buf.shape:
+            np.copyto(self._norm_buf, region)
+            region = self._norm_buf
+        return normalize_face(region, self.normalize_size, self.normalize_equalize, dst=self._norm_buf)
+
+    def recognize_faces(self, gray: np.ndarray,
+                        boxes: Sequence[Tuple[int, int, int, int]]) -> List[Tuple[int, float]]:
+        """Recognize every face box of one grayscale frame.
         
-        Returns (enrollment_id, confidence).
-        Confidence < 70 is considered a match.
+        Returns one (enrollment_id, confidence) per box, in box order.
+        Confidence < 70 is considered a match. A newly trained model is
+        picked up here, before the frame is processed.
         """
+        self.refresh_model()
         if not self.model_loaded:
-            return -1, 999.0
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        face_roi = gray[y:y+h, x:x+w]
-        enrollment_id, confidence = self.recognizer.predict(face_roi)
-        return int(enrollment_id), float(confidence)
+            return [(-1, 999.0)] * len(boxes)
+        results = []
+        queries, query_slots = [], []
+        for x, y, w, h in boxes:
+            roi = self.normalize_face(gray, int(x), int(y), int(w), int(h))
+            if roi.size == 0:
+                results.append((-1, 999.0))
+                continue
+            if self.matcher is not None:
+                # Histogram now (the ROI buffer is reused), match the whole batch below
+                queries.append(self.matcher.histogram(roi))
+                query_slots.append(len(results))
+                results.append((-1, 999.0))
+                continue
+            enrollment_id, confidence = self.recognizer.predict(roi)
+            results.append((int(enrollment_id), float(confidence)))
+        if queries:
+            for slot, matches in zip(query_slots, self.matcher.match(queries)):
+                enrollment_id, confidence = matches[0]
+                results[slot] = (enrollment_id, confidence if enrollment_id != -1 else 999.0)
+        return results
+
+    def recognize_face(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> Tuple[int, float]:
+        """Recognize a single face.
+        
+        Returns (enrollment_id, confidence). Prefer ``recognize_faces`` when a
+        frame holds several faces so the frame is converted only once.
+        """
+        return self.recognize_faces(self.to_gray(image), [(x, y, w, h)])[0]
 
     def draw_detection(self, image: np.ndarray, x: int, y: int, w: int, h: int, 
                       label: str = "Face", color: Tuple[int,int,int] = (0, 255, 0)):
@@ -61,3 +280,265 @@ class FaceEngine:
             return True
         except Exception:
             return False
+
+
+def box_iou(a: Box, b: Box) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class Track:
+    """A face followed across frames with its cached identity."""
+
+    track_id: int
+    box: Box
+    template: Optional[np.ndarray] = None
+    identity: Optional[Tuple[int, float]] = None  # committed (enrollment_id, confidence)
+    rejected: bool = False  # gave up without reaching a decision
+    last_prediction: Tuple[int, float] = (-1, 999.0)
+    votes: Dict[int, List[float]] = field(default_factory=dict)  # enrollment_id -> confidences
+    attempts: int = 0
+    misses: int = 0
+
+    @property
+    def prediction(self) -> Tuple[int, float]:
+        return self.identity if self.identity is not None else self.last_prediction
+
+    @property
+    def matched(self) -> bool:
+        return self.identity is not None
+
+    @property
+    def decided(self) -> bool:
+        """No further recognition is needed for this track."""
+        return self.identity is not None or self.rejected
+
+
+class FaceTracker:
+    """Keep stable track IDs for faces so recognition runs once per person.
+
+    The cascade runs every ``detect_every`` frames, or on the next frame as
+    soon as a track is lost. In between, each track is followed by matching a
+    small downscaled template of the face inside a search window around its
+    last position. Detections are associated with existing tracks by IoU,
+    falling back to centroid distance for fast movement. Each track collects
+    predictions until its identity is committed or rejected (see ``record``).
+    """
+
+    def __init__(self, detect_every: int = TRACK_DETECT_EVERY,
+                 iou_threshold: float = TRACK_IOU_THRESHOLD,
+                 min_score: float = TRACK_MIN_SCORE,
+                 max_misses: int = TRACK_MAX_MISSES,
+                 match_threshold: float = MATCH_THRESHOLD,
+                 min_votes: int = VOTE_MIN_VOTES, min_share: float = VOTE_MIN_SHARE,
+                 vote_aggregate: str = VOTE_AGGREGATE, max_attempts: int = VOTE_MAX_ATTEMPTS,
+                 template_size: int = 32, search_margin: float = 0.5):
+        self.detect_every = max(1, detect_every)
+        self.iou_threshold = iou_threshold
+        self.min_score = min_score
+        self.max_misses = max_misses
+        self.match_threshold = match_threshold
+        if vote_aggregate not in _AGGREGATORS:
+            raise ValueError(f"Unknown vote aggregate: {vote_aggregate}")
+        self.min_votes = max(1, min_votes)
+        self.min_share = min_share
+        self.vote_aggregate = vote_aggregate
+        self.max_attempts = max(self.min_votes, max_attempts)
+        self.template_size = template_size
+        self.search_margin = search_margin
+        self.tracks: Dict[int, Track] = {}
+        self._next_id = 1
+        self._last_detection = -self.detect_every
+        self._lost = False
+
+    def reset(self) -> None:
+        self.tracks.clear()
+        self._lost = False
+        self._last_detection = -self.detect_every
+
+    def needs_detection(self, frame_index: int) -> bool:
+        return self._lost or frame_index - self._last_detection >= self.detect_every
+
+    def _make_template(self, gray: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        x, y, w, h = box
+        roi = gray[max(y, 0):y + h, max(x, 0):x + w]
+        if roi.size == 0:
+            return None
+        scale = self.template_size / float(w)
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        return cv2.resize(roi, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, gray: np.ndarray, boxes: Sequence[Box], frame_index: int) -> List[Track]:
+        """Associate a fresh detection result with the current tracks."""
+        self._last_detection = frame_index
+        self._lost = False
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+
+        pairs = []
+        for track in self.tracks.values():
+            tx, ty, tw, th = track.box
+            for idx, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou < self.iou_threshold:
+                    # fall back to centroid distance for fast movement
+                    bx, by, bw, bh = box
+                    dist = ((tx + tw / 2 - bx - bw / 2) ** 2 + (ty + th / 2 - by - bh / 2) ** 2) ** 0.5
+                    if dist > 0.5 * max(tw, bw):
+                        continue
+                    iou = 1e-3
+                pairs.append((iou, track.track_id, idx))
+
+        matched_tracks, matched_boxes = set(), set()
+        for _, track_id, idx in sorted(pairs, reverse=True):
+            if track_id in matched_tracks or idx in matched_boxes:
+                continue
+            track = self.tracks[track_id]
+            track.box = boxes[idx]
+            track.template = self._make_template(gray, track.box)
+            track.misses = 0
+            matched_tracks.add(track_id)
+            matched_boxes.add(idx)
+
+        for track_id in list(self.tracks):
+            if track_id not in matched_tracks:
+                track = self.tracks[track_id]
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    del self.tracks[track_id]
+
+        for idx, box in enumerate(boxes):
+            if idx not in matched_boxes:
+                track = Track(self._next_id, box, self._make_template(gray, box))
+                self.tracks[track.track_id] = track
+                self._next_id += 1
+        return self.active_tracks()
+
+    def follow(self, gray: np.ndarray) -> List[Track]:
+        """Move tracks to their best template match without running the cascade."""
+        height, width = gray.shape[:2]
+        for track in list(self.tracks.values()):
+            if track.template is None:
+                continue
+            x, y, w, h = track.box
+            mx, my = int(w * self.search_margin), int(h * self.search_margin)
+            x0, y0 = max(x - mx, 0), max(y - my, 0)
+            x1, y1 = min(x + w + mx, width), min(y + h + my, height)
+            scale = self.template_size / float(w)
+            region = gray[y0:y1, x0:x1]
+            if region.size == 0:
+                self._drop(track)
+                continue
+            region = cv2.resize(region, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            th, tw = track.template.shape[:2]
+            if region.shape[0] < th or region.shape[1] < tw:
+                self._drop(track)
+                continue
+            scores = cv2.matchTemplate(region, track.template, cv2.TM_CCOEFF_NORMED)
+            _, best, _, loc = cv2.minMaxLoc(scores)
+            if best < self.min_score:
+                self._drop(track)
+                continue
+            track.box = (x0 + int(round(loc[0] / scale)), y0 + int(round(loc[1] / scale)), w, h)
+        return self.active_tracks()
+
+    def _drop(self, track: Track) -> None:
+        del self.tracks[track.track_id]
+        self._lost = True
+
+    def active_tracks(self) -> List[Track]:
+        """Tracks seen by the latest detection (missed ones are kept but hidden)."""
+        return [t for t in self.tracks.values() if t.misses == 0]
+
+    def pending(self) -> List[Track]:
+        """Visible tracks that still need recognition on this frame."""
+        return [t for t in self.active_tracks() if not t.decided]
+
+    def record(self, track: Track, prediction: Tuple[int, float]) -> None:
+        """Add one prediction to the track's vote and commit once evidence suffices.
+
+        Every prediction votes for its enrollment ID. The track is committed
+        to the leading ID when it has at least ``min_votes`` votes, holds at
+        least ``min_share`` of all attempts, and its aggregated confidence is
+        below the match threshold. After ``max_attempts`` without a decision
+        the track is rejected. Either way recognition stops for the track.
+        """
+        track.attempts += 1
+        track.last_prediction = prediction
+        enrollment_id, confidence = prediction
+        if enrollment_id >= 0:
+            track.votes.setdefault(enrollment_id, []).append(confidence)
+
+        if track.votes:
+            leader, confidences = max(track.votes.items(),
+                                      key=lambda item: (len(item[1]), -min(item[1])))
+            score = _AGGREGATORS[self.vote_aggregate](confidences)
+            if (len(confidences) >= self.min_votes
+                    and len(confidences) / track.attempts >= self.min_share
+                    and score < self.match_threshold):
+                track.identity = (leader, float(score))
+                return
+        if track.attempts >= self.max_attempts:
+            track.rejected = True
+
+
+_AGGREGATORS = {
+    "median": statistics.median,
+    "mean": statistics.fmean,
+    "min": min,
+    "max": max,
+}
+
+
+class MotionGate:
+    """Cheap frame-difference check used to skip detection on a static scene.
+
+    Frames are downscaled to ``width`` pixels and compared against a slowly
+    updated background, so gradual lighting changes do not count as motion.
+    """
+
+    def __init__(self, width: int = MOTION_WIDTH, pixel_delta: int = MOTION_PIXEL_DELTA,
+                 min_area: float = MOTION_MIN_AREA, idle_after: float = IDLE_AFTER,
+                 learning_rate: float = 0.05):
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.min_area = min_area
+        self.idle_after = idle_after
+        self.learning_rate = learning_rate
+        self._background: Optional[np.ndarray] = None
+        self._small: Optional[np.ndarray] = None
+        self.last_motion = time.monotonic()
+
+    def update(self, gray: np.ndarray) -> bool:
+        """Feed one grayscale frame; return True when it differs from the background."""
+        height, width = gray.shape[:2]
+        size = (self.width, max(1, int(round(height * self.width / float(width)))))
+        if self._small is None or self._small.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._background = None
+        cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.GaussianBlur(self._small, (5, 5), 0, dst=self._small)
+
+        if self._background is None:
+            self._background = self._small.astype(np.float32)
+            self.last_motion = time.monotonic()
+            return True
+
+        diff = cv2.absdiff(self._small, cv2.convertScaleAbs(self._background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(self._small, self._background, self.learning_rate)
+        moving = changed >= self.min_area * diff.size
+        if moving:
+            self.last_motion = time.monotonic()
+        return moving
+
+    @property
+    def idle(self) -> bool:
+        """True once no motion has been seen for ``idle_after`` seconds."""
+        return time.monotonic() - self.last_motion >= self.idle_after
@@ -0,0 +1,146 @@
+"""Registered face samples: normalized crops plus metadata, and a detection cache.
+
+Registration saves each sample as an already-cropped grayscale face of
+``FACE_SIZE`` (``Name.Enrollment.N.jpg`` as before) and records, per
+student, a ``Name.Enrollment.json`` sidecar in the same folder::
+
+    {"enrollment": 1001, "name": "Asha", "face_size": [200, 200],
+     "samples": {"Asha.1001.1.jpg": {"box": [x, y, w, h], "frame": [W, H],
+                                     "captured_at": "2026-01-31T09:00:00"}}}
+
+With ``USE_SAMPLE_STORE`` the crops go to the packed sample store
+(``data/sample_store.py``) instead, with the same metadata kept in its
+index.
+
+Training uses those images as they are. Older images (full frames or raw
+crops without a sidecar) still go through the cascade, but the boxes found
+are cached by file hash in ``TrainingImageLabel/detection_cache.json`` so
+each legacy image is only detected once.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import DETECTION_CACHE, FACE_SIZE, TRAINING_DIR, USE_SAMPLE_STORE
+
+if TYPE_CHECKING:
+    from data.sample_store import SampleStore
+
+Box = Tuple[int, int, int, int]
+
+
+def normalize_crop(gray: np.ndarray, box: Box) -> np.ndarray:
+    """Cut ``box`` out of a grayscale frame and resize it to FACE_SIZE."""
+    x, y, w, h = box
+    return cv2.resize(gray[y:y+h, x:x+w], FACE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+class FaceSampleWriter:
+    """Save normalized crops for one student, with their metadata.
+
+    With a ``store`` the crops are buffered and appended to the packed
+    sample store on ``close``; otherwise each crop is written as a JPEG and
+    the student's sidecar is updated on ``close``.
+    """
+
+    def __init__(self, folder: Path, name: str, enrollment: str, store: Optional["SampleStore"] = None):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.enrollment = enrollment
+        self.store = store
+        self.meta_path = self.folder / f"{name}.{enrollment}.json"
+        self.samples: Dict[str, dict] = {}
+        self.crops: List[np.ndarray] = []
+
+    def add(self, gray: np.ndarray, box: Box, sample: int) -> Optional[Path]:
+        """Save sample number ``sample`` cut from ``gray`` at ``box``."""
+        crop = normalize_crop(gray, box)
+        info = {
+            "box": [int(v) for v in box],
+            "frame": [int(gray.shape[1]), int(gray.shape[0])],
+            "captured_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if self.store is not None:
+            self.crops.append(crop)
+            self.samples[str(sample)] = info
+            return None
+        path = self.folder / f"{self.name}.{self.enrollment}.{sample}.jpg"
+        cv2.imwrite(str(path), crop, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        self.samples[path.name] = info
+        return path
+
+    def close(self) -> None:
+        """Write the buffered samples / sidecar (merging with earlier sessions)."""
+        if not self.samples:
+            return
+        if self.store is not None:
+            self.store.append(int(self.enrollment), self.crops, self.name, list(self.samples.values()))
+            self.crops, self.samples = [], {}
+            return
+        meta = {"enrollment": int(self.enrollment) if str(self.enrollment).isdigit() else self.enrollment,
+                "name": self.name, "face_size": list(FACE_SIZE), "samples": {}}
+        try:
+            meta["samples"] = json.loads(self.meta_path.read_text(encoding="utf-8")).get("samples", {})
+        except (OSError, ValueError):
+            pass
+        meta["samples"].update(self.samples)
+        _write_json(self.meta_path, meta)
+
+
+def open_writer(name: str, enrollment: str, folder: Path = TRAINING_DIR) -> FaceSampleWriter:
+    """Sample writer for registration, targeting the sample store when it is enabled."""
+    store = None
+    if USE_SAMPLE_STORE and str(enrollment).isdigit():
+        from data.sample_store import SampleStore
+        store = SampleStore()
+    return FaceSampleWriter(folder, name, enrollment, store)
+
+
+def load_sample_metadata(folders: Iterable[Path]) -> Dict[str, dict]:
+    """Map image path -> sample metadata for every sidecar in ``folders``."""
+    samples: Dict[str, dict] = {}
+    for folder in set(Path(f) for f in folders):
+        for meta_path in folder.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            for image_name, info in meta.get("samples", {}).items():
+                samples[str(folder / image_name)] = info
+    return samples
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def load_detection_cache(path: Path = DETECTION_CACHE) -> Dict[str, List[Box]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_detection_cache(cache: Dict[str, List[Box]], path: Path = DETECTION_CACHE) -> None:
+    _write_json(path, cache)
+
+
+def _write_json(path: Path, data: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def decode_gray(data: bytes) -> Optional[np.ndarray]:
+    """Decode image bytes straight to grayscale."""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
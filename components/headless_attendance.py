@@ -0,0 +1,147 @@
+"""Headless attendance runner for servers, recorded lectures and benchmarks.
+
+Runs the same detection, tracking, voting and marking logic as the Tk
+sessions, without any window, and writes the usual
+``Attendance/Subject_date_time.csv``.
+
+Examples::
+
+    python -m components.headless_attendance --subject Maths --source 0 --duration 600
+    python -m components.headless_attendance --subject Maths --source lecture.mp4
+    python -m components.headless_attendance --subject Maths --source Recordings/Maths_2026-01-31
+    python -m components.headless_attendance --subject Maths --source 0 --record
+
+Camera sources go through the threaded pipeline (newest frame wins). Video
+files and frame folders are processed frame by frame in order, so repeated
+runs on the same input give the same result.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from components.attendance_pipeline import (
+    AttendancePipeline,
+    FramePacket,
+    FrameProcessor,
+    FrameRecorder,
+    is_live_source,
+    open_source,
+)
+from components.attendance_session import AttendanceSession
+from components.face_engine import FaceEngine, MotionGate
+from components.subject_models import model_for_subject
+from config import MOTION_GATE_ENABLED, PROFILE_ENABLED, RECORDINGS_DIR
+from data.session_journal import recover_journals
+from data.student_registry import open_registry
+from utils.logger import log_error, log_info
+from utils.profiler import FrameProfiler
+
+
+def run_headless(source: str, subject: str, record: Optional[Path] = None,
+                 max_frames: Optional[int] = None, duration: Optional[float] = None,
+                 preset: Optional[str] = None) -> AttendanceSession:
+    """Run one attendance session on ``source`` and save it; returns the session."""
+    recover_journals()
+    enrollment_to_name = open_registry().names()
+
+    engine = FaceEngine(preset=preset, model_path=model_for_subject(subject))
+    if not engine.model_loaded:
+        raise RuntimeError("No trained model found! Train the model first.")
+
+    cap = open_source(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open source: {source}")
+
+    session = AttendanceSession(subject, enrollment_to_name)
+    profiler = FrameProfiler(f"headless_{subject}", enabled=PROFILE_ENABLED)
+    recorder = FrameRecorder(record) if record else None
+    started = time.perf_counter()
+    frames = 0
+
+    def handle(result) -> None:
+        for enrollment_id, matched in zip((p[0] for p in result.predictions), result.matched):
+            if matched:
+                session.mark(enrollment_id)
+
+    def keep_going() -> bool:
+        if max_frames is not None and frames >= max_frames:
+            return False
+        return duration is None or time.perf_counter() - started < duration
+
+    log_info(f"Headless attendance started: {subject} from {source}")
+    try:
+        if is_live_source(source):
+            pipeline = AttendancePipeline(cap, engine, profiler, recorder=recorder).start()
+            try:
+                while keep_going():
+                    result = pipeline.next_result(timeout=0.1)
+                    if result is None:
+                        if pipeline.finished:
+                            break
+                        continue
+                    handle(result)
+                    frames += 1
+                    profiler.end_frame()
+            finally:
+                pipeline.stop()
+        else:
+            processor = FrameProcessor(engine, profiler,
+                                       motion_gate=MotionGate() if MOTION_GATE_ENABLED else None)
+            while keep_going():
+                with profiler.span("capture"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                if recorder is not None:
+                    recorder.write(frame)
+                handle(processor.process(FramePacket(frames, time.perf_counter(), frame)))
+                frames += 1
+                profiler.end_frame()
+    except KeyboardInterrupt:
+        log_info("Headless attendance interrupted; saving marks so far")
+    finally:
+        cap.release()
+        if recorder is not None:
+            recorder.close()
+            log_info(f"Recorded {recorder.written} frames to {recorder.folder}")
+
+    session.save()
+    profile_path = profiler.dump()
+    if profile_path:
+        log_info(f"Session profile saved: {profile_path.name}")
+    return session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run attendance without a display.")
+    parser.add_argument("--subject", required=True, help="subject/class name used in the CSV file name")
+    parser.add_argument("--source", default="0", help="camera index, video file or folder of frames")
+    parser.add_argument("--record", nargs="?", const="", default=None,
+                        help="save raw frames to this folder (default: Recordings/<subject>_<time>)")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--preset", help="detection preset from config.DETECTION_PRESETS")
+    args = parser.parse_args()
+
+    record = None
+    if args.record is not None:
+        stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        record = Path(args.record) if args.record else RECORDINGS_DIR / f"{args.subject}_{stamp}"
+
+    try:
+        session = run_headless(args.source, args.subject, record, args.max_frames, args.duration, args.preset)
+    except RuntimeError as exc:
+        log_error(f"Headless attendance error: {exc}")
+        raise SystemExit(f"Error: {exc}")
+
+    print(f"{len(session)} students marked for {args.subject}")
+    for row in session.rows:
+        print(f"  {row['Name']:<25} {row['Enrollment']:<10} {row['Time']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""NumPy LBPH matcher with a compact binary model.
+
+A drop-in alternative to ``cv2.face.LBPHFaceRecognizer`` for prediction.
+It computes the same features as OpenCV (extended LBP with bilinear
+sampling, per-cell histograms normalised to 1) and the same distance
+(``HISTCMP_CHISQR_ALT``), but keeps every training histogram in one
+float32 matrix saved as ``.npz`` instead of YAML text, and matches a batch
+of faces at a time.
+
+Distances use the sparsity of the query: for bins where the query is 0
+the chi-square term reduces to the stored value, so only the query's
+non-zero bins need the full ``(q - h)^2 / (q + h)`` term::
+
+    d(q, h) = 2 * (sum(h) - sum_S(h) + sum_S((q - h)^2 / (q + h))),  S = nonzero(q)
+
+A batch of queries is scored together on the union of their non-zero
+bins: one broadcast (queries x bins x samples) per block of samples gives
+the whole distance matrix, where a bin that is zero in both q and h adds 0.
+
+Convert an existing model once with::
+
+    python -m components.lbph_matcher TrainingImageLabel/Trainner.yml
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EPS = np.finfo(np.float32).eps
+BLOCK_BYTES = 32 * 1024 * 1024  # working-set size per distance block
+
+
+def elbp(gray: np.ndarray, radius: int = 1, neighbors: int = 8) -> np.ndarray:
+    """Extended (circular) LBP codes, matching OpenCV's ``elbp``."""
+    src = np.asarray(gray, dtype=np.float32)
+    rows, cols = src.shape
+    center = src[radius:rows - radius, radius:cols - radius]
+    codes = np.zeros(center.shape, dtype=np.int32)
+
+    def shifted(dy: int, dx: int) -> np.ndarray:
+        return src[radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+    for n in range(neighbors):
+        # Same float32 sample positions and weights as the C++ code
+        x = np.float32(radius * np.cos(2.0 * np.pi * n / np.float32(neighbors)))
+        y = np.float32(-radius * np.sin(2.0 * np.pi * n / np.float32(neighbors)))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = np.float32(y - fy), np.float32(x - fx)
+        w1 = np.float32((1 - tx) * (1 - ty))
+        w2 = np.float32(tx * (1 - ty))
+        w3 = np.float32((1 - tx) * ty)
+        w4 = np.float32(tx * ty)
+        t = w1 * shifted(fy, fx) + w2 * shifted(fy, cx) + w3 * shifted(cy, fx) + w4 * shifted(cy, cx)
+        codes |= ((t > center) | (np.abs(t - center) < EPS)).astype(np.int32) << n
+    return codes
+
+
+def spatial_histogram(codes: np.ndarray, patterns: int, grid_x: int, grid_y: int) -> np.ndarray:
+    """Concatenated per-cell code histograms, each normalised to sum 1."""
+    height, width = codes.shape[0] // grid_y, codes.shape[1] // grid_x
+    cells = grid_x * grid_y
+    if not height or not width:
+        return np.zeros(cells * patterns, dtype=np.float32)
+    grid = codes[:grid_y * height, :grid_x * width].reshape(grid_y, height, grid_x, width)
+    grid = grid.transpose(0, 2, 1, 3).reshape(cells, height * width)
+    offsets = (np.arange(cells, dtype=np.int64) * patterns)[:, None]
+    counts = np.bincount((grid + offsets).ravel(), minlength=cells * patterns)
+    return (counts / np.float32(height * width)).astype(np.float32)
+
+
+class LBPHMatcher:
+    """Batch chi-square nearest-neighbour search over LBPH histograms."""
+
+    def __init__(self, histograms: np.ndarray, labels: np.ndarray, radius: int = 1,
+                 neighbors: int = 8, grid_x: int = 8, grid_y: int = 8,
+                 threshold: float = float("inf")):
+        histograms = np.asarray(histograms, dtype=np.float32)
+        # Bins x samples, so the rows picked by a query's non-zero bins are contiguous
+        self.columns = np.ascontiguousarray(histograms.T)
+        self.labels = np.asarray(labels, dtype=np.int32).ravel()
+        self.radius = int(radius)
+        self.neighbors = int(neighbors)
+        self.grid_x = int(grid_x)
+        self.grid_y = int(grid_y)
+        self.threshold = float(threshold)
+        self._sums = self.columns.sum(axis=0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def patterns(self) -> int:
+        return 2 ** self.neighbors
+
+    @classmethod
+    def from_recognizer(cls, recognizer) -> "LBPHMatcher":
+        """Copy histograms and settings out of a trained ``LBPHFaceRecognizer``."""
+        histograms = recognizer.getHistograms()
+        matrix = np.vstack([h.reshape(1, -1) for h in histograms]) if len(histograms) else np.empty((0, 0))
+        threshold = recognizer.getThreshold()
+        return cls(matrix, recognizer.getLabels(), recognizer.getRadius(), recognizer.getNeighbors(),
+                   recognizer.getGridX(), recognizer.getGridY(),
+                   threshold if threshold < np.finfo(np.float64).max else float("inf"))
+
+    @classmethod
+    def from_yaml(cls, path: Path) -> "LBPHMatcher":
+        import cv2
+
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(str(path))
+        return cls.from_recognizer(recognizer)
+
+    @classmethod
+    def load(cls, path: Path) -> "LBPHMatcher":
+        with np.load(path) as data:
+            params = data["params"]
+            matcher = cls.__new__(cls)
+            matcher.columns = np.ascontiguousarray(data["columns"], dtype=np.float32)
+            matcher.labels = data["labels"].astype(np.int32)
+        matcher.radius, matcher.neighbors, matcher.grid_x, matcher.grid_y = (int(v) for v in params[:4])
+        matcher.threshold = float(params[4])
+        matcher._sums = matcher.columns.sum(axis=0, dtype=np.float64)
+        return matcher
+
+    def save(self, path: Path) -> None:
+        """Write the model as an uncompressed ``.npz`` (via a temp file)."""
+        import os
+
+        params = np.array([self.radius, self.neighbors, self.grid_x, self.grid_y, self.threshold], np.float64)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, columns=self.columns, labels=self.labels, params=params)
+        os.replace(tmp, path)
+
+    def histogram(self, face: np.ndarray) -> np.ndarray:
+        """LBPH feature vector of one grayscale face."""
+        return spatial_histogram(elbp(face, self.radius, self.neighbors), self.patterns, self.grid_x, self.grid_y)
+
+    def distances(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Chi-square (alt) distance from one histogram to every stored sample (or ``rows``)."""
+        bins = np.flatnonzero(query)
+        q = query[bins][:, None]
+        if rows is not None:
+            # Gather just the query's bins for the candidate samples
+            h = self.columns[np.ix_(bins, rows)]
+            return 2.0 * self._chi2_block(q, h, self._sums[rows])
+
+        n = len(self.labels)
+        out = np.empty(n, dtype=np.float64)
+        block = max(1, BLOCK_BYTES // max(1, len(bins) * 4))
+        for lo in range(0, n, block):
+            hi = min(n, lo + block)
+            h = np.take(self.columns[:, lo:hi], bins, axis=0)
+            out[lo:hi] = self._chi2_block(q, h, self._sums[lo:hi])
+        out *= 2.0
+        return out
+
+    def distances_batch(self, queries: Sequence[np.ndarray]) -> np.ndarray:
+        """Chi-square (alt) distances as a (queries, samples) matrix, computed block-wise for the whole batch."""
+        batch = np.vstack([np.reshape(q, (1, -1)) for q in queries]).astype(np.float32, copy=False)
+        n = len(self.labels)
+        out = np.empty((len(batch), n), dtype=np.float64)
+        if not n:
+            return out
+        bins = np.flatnonzero(batch.any(axis=0))
+        q = batch[:, bins][:, :, None]
+        block = max(1, BLOCK_BYTES // max(1, len(batch) * len(bins) * 4))
+        for lo in range(0, n, block):
+            hi = min(n, lo + block)
+            h = np.take(self.columns[:, lo:hi], bins, axis=0)
+            den = q + h
+            term = np.square(q - h)
+            np.divide(term, den, out=term, where=den > 0)
+            out[:, lo:hi] = self._sums[lo:hi] - h.sum(axis=0, dtype=np.float64) + term.sum(axis=1, dtype=np.float64)
+        out *= 2.0
+        return out
+
+    @staticmethod
+    def _chi2_block(q: np.ndarray, h: np.ndarray, sums: np.ndarray) -> np.ndarray:
+        """Half the CHISQR_ALT distance, given the query's non-zero bins ``q`` and the same bins ``h``."""
+        term = np.square(q - h)
+        term /= q + h
+        return sums - h.sum(axis=0, dtype=np.float64) + term.sum(axis=0, dtype=np.float64)
+
+    def top_k(self, dist: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(label, distance) of the ``k`` smallest distances under the threshold."""
+        if not len(dist):
+            return [(-1, float("inf"))]
+        top = min(k, len(dist))
+        idx = np.argpartition(dist, top - 1)[:top] if top < len(dist) else np.arange(len(dist))
+        idx = idx[np.argsort(dist[idx], kind="stable")]
+        labels = self.labels if rows is None else self.labels[rows]
+        matches = [(int(labels[i]), float(dist[i])) for i in idx if dist[i] < self.threshold]
+        return matches or [(-1, float("inf"))]
+
+    def match(self, queries: Sequence[np.ndarray], k: int = 1) -> List[List[Tuple[int, float]]]:
+        """Top-``k`` (label, distance) per query histogram, nearest first.
+
+        Samples at or above ``threshold`` are left out; a query with no
+        sample under it gets ``[(-1, inf)]``, as OpenCV returns -1.
+        """
+        if not len(queries):
+            return []
+        return [self.top_k(dist, k) for dist in self.distances_batch(queries)]
+
+    def predict_batch(self, faces: Sequence[np.ndarray], k: int = 1) -> List[List[Tuple[int, float]]]:
+        return self.match([self.histogram(face) for face in faces], k)
+
+    def predict(self, face: np.ndarray) -> Tuple[int, float]:
+        """Same contract as ``LBPHFaceRecognizer.predict``: (label, distance)."""
+        return self.predict_batch([face])[0][0]
+
+
+def convert_model(yaml_path: Path, npz_path: Optional[Path] = None) -> Path:
+    """Convert an OpenCV LBPH YAML model to the ``.npz`` format."""
+    npz_path = npz_path or yaml_path.with_suffix(".npz")
+    LBPHMatcher.from_yaml(yaml_path).save(npz_path)
+    return npz_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert an LBPH YAML model to the NumPy matcher format.")
+    parser.add_argument("model", type=Path, help="Trainner.yml to convert")
+    parser.add_argument("--output", type=Path, help="target .npz (default: next to the model)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    target = convert_model(args.model, args.output)
+    converted = time.perf_counter() - start
+    start = time.perf_counter()
+    matcher = LBPHMatcher.load(target)
+    loaded = time.perf_counter() - start
+    print(f"{len(matcher)} histograms -> {target} ({target.stat().st_size / 1e6:.1f} MB); "
+          f"YAML read+convert {converted:.2f}s, npz load {loaded:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,8 @@ import tkinter as tk
 from datetime import datetime
 from typing import Optional
 
-import pandas as pd
-
-from config import ATTENDANCE_DIR, STUDENT_CSV
-from data.database_handler import read_students
+from data.attendance_store import save_session
+from data.student_registry import open_registry
 from utils.logger import log_info, log_error
 
 
@@ -39,9 +37,8 @@ def mark_manual_attendance(master: Optional[tk.Tk] = None) -> None:
 
     # Load students
     try:
-        students_df = read_students()
-        for _, row in students_df.iterrows():
-            listbox.insert(tk.END, f"{row['Name']} ({row['Enrollment']})")
+        for student in open_registry().students():
+            listbox.insert(tk.END, f"{student.name} ({student.enrollment})")
     except Exception:
         pass
 
@@ -65,7 +62,6 @@ def mark_manual_attendance(master: Optional[tk.Tk] = None) -> None:
             return
 
         try:
-            students_df = read_students()
             attendance_data = []
             now = datetime.now()
 
@@ -81,14 +77,10 @@ def mark_manual_attendance(master: Optional[tk.Tk] = None) -> None:
                     'Time': now.strftime("%H:%M:%S")
                 })
 
-            # Save to CSV
-            filename = f"{subject}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
-            filepath = ATTENDANCE_DIR / filename
-            
-            df = pd.DataFrame(attendance_data)
-            df.to_csv(filepath, index=False)
+            # Save to the attendance database (and its CSV mirror)
+            session_id, _ = save_session(subject, attendance_data, now, source="manual")
 
-            log_info(f"Manual attendance saved: {filename} - {len(attendance_data)} students")
+            log_info(f"Manual attendance saved: {subject} session {session_id} - {len(attendance_data)} students")
             status_var.set(f"✅ Attendance saved! {len(attendance_data)} students marked.")
             status_label.config(bg="#28a745")
 
@@ -0,0 +1,361 @@
+"""Incremental LBPH training backed by a manifest of already-trained images.
+
+``TrainingImageLabel/training_manifest.json`` records every image that went
+into ``Trainner.yml`` (size, mtime and enrollment) together with the
+signature of the model file it describes. ``sync_model`` compares that with
+``TrainingImage/`` and only touches the difference:
+
+* new images (or students new to the packed sample store) are added with
+  ``LBPHFaceRecognizer.update``;
+* when an image of a student changed or disappeared, that student's
+  histograms are dropped from the model and their remaining images are
+  re-read, so replacing or removing a student costs one student's images.
+
+LBPH has no removal API, so removal rewrites the model file from the
+filtered histograms in OpenCV's own YAML layout. If the model or manifest
+is missing, the model was replaced by something else, or the face
+normalization settings changed, everything is rebuilt once.
+
+The new model is staged in versioned temp files and renamed into place
+(``publish_model``); running ``FaceEngine`` sessions notice the new files
+and swap the model in between frames. ``TrainingJob`` runs all of this on
+a background thread that can be cancelled.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from config import (
+    CANDIDATE_INDEX,
+    MODEL_PATH,
+    NORMALIZE_EQUALIZE,
+    NORMALIZE_SIZE,
+    PROTOTYPES_PER_STUDENT,
+    RECOGNIZER_BACKEND,
+    SAMPLE_STORE_DIR,
+    TRAINING_MANIFEST,
+    TRAINING_WORKERS,
+)
+from components.candidate_index import CandidateIndex, index_path_for
+from components.face_engine import normalize_face
+from components.lbph_matcher import LBPHMatcher
+from components.model_training import (
+    TrainingCancelled,
+    check_cancelled,
+    extract_faces,
+    list_training_images,
+    parse_enrollment,
+)
+from components.prototypes import compress_matcher
+from data.sample_store import SampleStore
+from utils.logger import log_error, log_info
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class TrainingReport:
+    added_images: int = 0
+    removed_images: int = 0
+    students_updated: int = 0
+    faces_added: int = 0
+    faces_total: int = 0
+    students_total: int = 0
+    rebuilt: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added_images or self.removed_images or self.students_updated or self.rebuilt)
+
+
+def file_signature(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(path: Path = TRAINING_MANIFEST) -> Dict[str, object]:
+    """Return the saved manifest, or an empty one if it is missing or unreadable."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "model": None, "images": {}}
+
+
+def save_manifest(manifest: Dict[str, object], path: Path = TRAINING_MANIFEST) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def normalization_stamp() -> Dict[str, object]:
+    """Manifest record of the face normalization new models are trained with."""
+    return {"size": list(NORMALIZE_SIZE) if NORMALIZE_SIZE else None, "equalize": NORMALIZE_EQUALIZE}
+
+
+def staging_path(path: Path, version: str) -> Path:
+    """``Trainner.yml`` -> ``Trainner.<version>.tmp.yml``, unique per save."""
+    return path.with_name(f"{path.stem}.{version}.tmp{path.suffix}")
+
+
+def publish_model(recognizer, model_path: Path = MODEL_PATH,
+                  cancel: Optional[threading.Event] = None) -> None:
+    """Write the model (and its numpy-backend companions) to temp files, then rename them in.
+
+    Everything is staged under one version first, so a cancel or a crash
+    leaves the published model untouched. Renames keep the staged mtimes
+    (YAML oldest), and the ``.npz`` goes in first, then the index, then
+    the YAML; a reader picking the files up at any point between two
+    renames gets a consistent set.
+    """
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    version = f"{os.getpid()}-{time.time_ns()}"
+    staged: List[Tuple[Path, Path]] = []
+    try:
+        tmp = staging_path(model_path, version)
+        recognizer.save(str(tmp))
+        staged.append((tmp, model_path))
+        if RECOGNIZER_BACKEND == "numpy":
+            matcher = LBPHMatcher.from_recognizer(recognizer)
+            if PROTOTYPES_PER_STUDENT:
+                # Trainner.yml keeps every sample as the base for later updates
+                full = len(matcher)
+                matcher = compress_matcher(matcher, PROTOTYPES_PER_STUDENT)
+                log_info(f"Prototype compression: {full} -> {len(matcher)} histograms")
+            npz_path = model_path.with_suffix(".npz")
+            tmp = staging_path(npz_path, version)
+            matcher.save(tmp)
+            staged.append((tmp, npz_path))
+            if CANDIDATE_INDEX:
+                index_path = index_path_for(model_path)
+                tmp = staging_path(index_path, version)
+                CandidateIndex(matcher).save(tmp)
+                staged.append((tmp, index_path))
+        check_cancelled(cancel)
+    except BaseException:
+        for tmp, _ in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+    for tmp, target in staged[1:] + staged[:1]:
+        os.replace(tmp, target)
+    log_info(f"Published model version {version}")
+
+
+def write_lbph_model(path: Path, histograms: Sequence[np.ndarray], labels: np.ndarray,
+                     radius: int = 1, neighbors: int = 8, grid_x: int = 8, grid_y: int = 8,
+                     threshold: float = float(np.finfo(np.float64).max)) -> None:
+    """Write histograms and labels in the layout ``LBPHFaceRecognizer.read`` expects."""
+    fs = cv2.FileStorage(str(path), cv2.FILE_STORAGE_WRITE)
+    try:
+        fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+        fs.write("format", 3)
+        fs.write("threshold", float(threshold))
+        fs.write("radius", int(radius))
+        fs.write("neighbors", int(neighbors))
+        fs.write("grid_x", int(grid_x))
+        fs.write("grid_y", int(grid_y))
+        fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+        for hist in histograms:
+            fs.write("", hist)
+        fs.endWriteStruct()
+        fs.write("labels", np.asarray(labels, dtype=np.int32).reshape(-1, 1))
+        fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+    finally:
+        fs.release()
+
+
+def remove_labels(recognizer, enrollments: Iterable[int], model_path: Path = MODEL_PATH):
+    """Return a recognizer without the given labels, or None if nothing is left."""
+    drop = set(enrollments)
+    labels = recognizer.getLabels().ravel()
+    keep = [idx for idx, label in enumerate(labels) if int(label) not in drop]
+    if not keep:
+        return None
+    if len(keep) == len(labels):
+        return recognizer
+
+    histograms = recognizer.getHistograms()
+    tmp = model_path.with_name(model_path.stem + ".filtered" + model_path.suffix)
+    write_lbph_model(tmp, [histograms[idx] for idx in keep], labels[keep],
+                     recognizer.getRadius(), recognizer.getNeighbors(),
+                     recognizer.getGridX(), recognizer.getGridY(), recognizer.getThreshold())
+    try:
+        filtered = cv2.face.LBPHFaceRecognizer_create()
+        filtered.read(str(tmp))
+    finally:
+        tmp.unlink(missing_ok=True)
+    return filtered
+
+
+def sync_model(image_paths: Optional[Sequence[Path]] = None, model_path: Path = MODEL_PATH,
+               manifest_path: Path = TRAINING_MANIFEST, rebuild: bool = False,
+               progress: Optional[Callable[[int, int], None]] = None,
+               workers: int = TRAINING_WORKERS,
+               store_dir: Optional[Path] = SAMPLE_STORE_DIR,
+               cancel: Optional[threading.Event] = None) -> TrainingReport:
+    """Bring the model in line with the training images, touching only what changed.
+
+    Students in the packed sample store at ``store_dir`` are tracked as one
+    manifest entry each (keyed ``store:<enrollment>``, signed by their row
+    runs) and read straight from the memory map.
+
+    Setting ``cancel`` aborts with ``TrainingCancelled`` at the next check;
+    until the model is published nothing on disk changes.
+    """
+    if image_paths is None:
+        image_paths = list_training_images()
+    current: Dict[str, Path] = {path.name: path for path in image_paths}
+    signatures = {name: file_signature(path) for name, path in current.items()}
+    enrollments = {name: parse_enrollment(path) for name, path in current.items()}
+
+    store = SampleStore(store_dir) if store_dir is not None and SampleStore.exists(store_dir) else None
+    if store is not None:
+        for enrollment in store.enrollments():
+            key = f"store:{enrollment}"
+            signatures[key] = store.runs(enrollment)
+            enrollments[key] = enrollment
+
+    manifest = load_manifest(manifest_path)
+    recognizer = None
+    trained: Dict[str, dict] = {}
+    normalization = normalization_stamp()
+    if (not rebuild and model_path.exists() and manifest["model"] == file_signature(model_path)
+            and manifest.get("normalize") == normalization):
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(str(model_path))
+        trained = manifest["images"]
+
+    report = TrainingReport(rebuilt=recognizer is None)
+    added = [name for name in signatures if name not in trained]
+    changed = [name for name in signatures if name in trained and trained[name]["sig"] != signatures[name]]
+    removed = [name for name in trained if name not in signatures]
+    stale = {trained[name]["enrollment"] for name in changed + removed} - {None}
+
+    if not (added or changed or removed) and recognizer is not None:
+        labels = recognizer.getLabels().ravel()
+        report.faces_total = len(labels)
+        report.students_total = len(set(labels.tolist()))
+        return report
+
+    if stale and recognizer is not None:
+        recognizer = remove_labels(recognizer, stale, model_path)
+
+    pending = [name for name in signatures if name not in trained or enrollments[name] in stale]
+    faces, ids = extract_faces([current[name] for name in pending if name in current],
+                               progress=progress, workers=workers, cancel=cancel)
+    for name in pending:
+        check_cancelled(cancel)
+        if name not in current:
+            crops = [normalize_face(crop) for crop in store.student(enrollments[name])]
+            faces.extend(crops)
+            ids.extend([enrollments[name]] * len(crops))
+
+    if faces:
+        if recognizer is None:
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.train(faces, np.array(ids))
+        else:
+            recognizer.update(faces, np.array(ids))
+
+    check_cancelled(cancel)
+    if recognizer is not None:
+        publish_model(recognizer, model_path, cancel)
+        labels = recognizer.getLabels().ravel()
+        report.faces_total = len(labels)
+        report.students_total = len(set(labels.tolist()))
+        manifest["model"] = file_signature(model_path)
+    else:
+        model_path.unlink(missing_ok=True)
+        model_path.with_suffix(".npz").unlink(missing_ok=True)
+        index_path_for(model_path).unlink(missing_ok=True)
+        manifest["model"] = None
+
+    manifest["normalize"] = normalization
+    manifest["images"] = {
+        name: {"sig": sig, "enrollment": enrollments[name]} for name, sig in signatures.items()
+    }
+    save_manifest(manifest, manifest_path)
+
+    report.added_images = len(added)
+    report.removed_images = len(removed)
+    report.students_updated = len(stale)
+    report.faces_added = len(faces)
+    log_info(f"Model sync: +{report.added_images} images, -{report.removed_images} images, "
+             f"{report.students_updated} students refreshed, {report.faces_total} faces total"
+             + (" (full rebuild)" if report.rebuilt else ""))
+    return report
+
+
+class TrainingJob:
+    """Run ``sync_model`` on a background thread, at most one per process.
+
+    The caller polls ``events`` for ``("progress", (done, total))`` and a
+    final ``("done", report)``, ``("cancelled", None)`` or
+    ``("error", exc)``. ``cancel()`` stops the job without touching the
+    published model.
+    """
+
+    _running = threading.Lock()
+
+    def __init__(self, image_paths: Optional[Sequence[Path]] = None, rebuild: bool = False, **options):
+        self.events: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._args = dict(options, image_paths=image_paths, rebuild=rebuild)
+        self.thread = threading.Thread(target=self._run, name="model-training", daemon=True)
+
+    def start(self) -> "TrainingJob":
+        self.thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+    def _refresh_subject_models(self) -> None:
+        """Re-cut the roster models from the new global one so their sessions reload too.
+
+        The global model is already published; a roster problem only costs
+        the roster models and is logged, not reported as a training error.
+        """
+        from components.subject_models import build_all
+
+        try:
+            build_all(self._args.get("model_path", MODEL_PATH))
+        except Exception as exc:
+            log_error(f"Refreshing subject models failed, sessions use the global model: {exc}")
+
+    def _run(self) -> None:
+        if not TrainingJob._running.acquire(blocking=False):
+            self.events.put(("error", RuntimeError("Training is already running")))
+            return
+        try:
+            report = sync_model(progress=lambda done, total: self.events.put(("progress", (done, total))),
+                                cancel=self.cancel_event, **self._args)
+            if report.changed:
+                self._refresh_subject_models()
+            self.events.put(("done", report))
+        except TrainingCancelled:
+            log_info("Training cancelled; published model left unchanged")
+            self.events.put(("cancelled", None))
+        except Exception as exc:
+            self.events.put(("error", exc))
+        finally:
+            TrainingJob._running.release()
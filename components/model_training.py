@@ -1,24 +1,186 @@
 """Train face recognition model from registered images."""
 from __future__ import annotations
 
+import multiprocessing
+import os
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
-from PIL import Image
 
-from config import CASCADE_PATH, MODEL_PATH, TRAINING_DIR
+from components.face_engine import normalize_face
+from components.face_samples import (
+    decode_gray,
+    file_hash,
+    load_detection_cache,
+    load_sample_metadata,
+    save_detection_cache,
+)
+from config import CASCADE_PATH, DETECTION_CACHE, TRAINING_CHUNK, TRAINING_DIR, TRAINING_WORKERS
+from data.sample_store import SampleStore
 from utils.logger import log_info, log_error
 
 
+def list_training_images(folder: Path = TRAINING_DIR) -> List[Path]:
+    """Return the registered sample images (name.enrollment.sample.jpg)."""
+    return sorted(folder.glob("*.jpg"))
+
+
+def parse_enrollment(img_path: Path) -> Optional[int]:
+    """Extract the enrollment ID from a name.enrollment.sample.jpg file name."""
+    parts = img_path.stem.split('.')
+    if len(parts) >= 2:
+        try:
+            return int(parts[1])
+        except ValueError:
+            return None
+    return None
+
+
+class TrainingCancelled(Exception):
+    """Raised inside training when its cancel event is set."""
+
+
+def check_cancelled(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise TrainingCancelled()
+
+
+Box = Tuple[int, int, int, int]
+ChunkResult = Tuple[List[np.ndarray], List[int], List[str], Dict[str, List[Box]]]
+
+_worker_cascade: Optional[cv2.CascadeClassifier] = None
+_worker_cache: Dict[str, List[Box]] = {}
+
+
+def _init_worker(cascade_path: str, detection_cache: Dict[str, List[Box]]) -> None:
+    """Process-pool initializer: one cascade per worker, single-threaded OpenCV."""
+    global _worker_cascade, _worker_cache
+    cv2.setNumThreads(1)
+    _worker_cascade = cv2.CascadeClassifier(cascade_path)
+    _worker_cache = detection_cache
+
+
+def _crops_from_image(img_path: Path, normalized: bool,
+                      new_boxes: Dict[str, List[Box]], canonical: bool) -> Tuple[List[np.ndarray], List[int]]:
+    enrollment_id = parse_enrollment(img_path)
+    if enrollment_id is None:
+        return [], []
+
+    data = img_path.read_bytes()
+    img_array = decode_gray(data)
+    if img_array is None:
+        raise ValueError("unreadable image")
+    if normalized:
+        # Saved at registration as an already-cropped face: no detection needed
+        return [normalize_face(img_array) if canonical else img_array], [enrollment_id]
+
+    key = file_hash(data)
+    boxes = _worker_cache.get(key)
+    if boxes is None:
+        # Legacy image: detect once and remember the boxes for next time
+        boxes = [tuple(int(v) for v in box) for box in _worker_cascade.detectMultiScale(img_array)]
+        new_boxes[key] = boxes
+    crops = [img_array[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+    crops = [normalize_face(crop) if canonical else crop.copy() for crop in crops]
+    return crops, [enrollment_id] * len(crops)
+
+
+def _extract_chunk(items: Sequence[Tuple[Path, bool]], canonical: bool = True) -> ChunkResult:
+    """Worker side: crops, ids, error messages and newly detected boxes for one chunk."""
+    faces, ids, errors = [], [], []
+    new_boxes: Dict[str, List[Box]] = {}
+    for img_path, normalized in items:
+        try:
+            crops, labels = _crops_from_image(img_path, normalized, new_boxes, canonical)
+            faces.extend(crops)
+            ids.extend(labels)
+        except Exception as e:
+            errors.append(f"Error processing {img_path}: {e}")
+    return faces, ids, errors, new_boxes
+
+
+def extract_faces(image_paths: Sequence[Path],
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  workers: int = TRAINING_WORKERS,
+                  cache_path: Path = DETECTION_CACHE,
+                  canonical: bool = True,
+                  cancel: Optional[threading.Event] = None) -> Tuple[List[np.ndarray], List[int]]:
+    """Load each image and return (face crops, enrollment IDs).
+
+    With ``canonical`` every crop goes through ``normalize_face`` so it
+    matches what ``FaceEngine`` feeds the recognizer at prediction time.
+
+    Crops saved by registration (listed in a sample sidecar) are used as
+    they are; other images go through the cascade unless their file hash
+    is already in the detection cache at ``cache_path``.
+
+    Images are decoded in ``workers`` processes (0 = one per CPU) in chunks
+    of ``TRAINING_CHUNK``; results come back in input order whatever order
+    the chunks finish in. ``progress(done, total)`` is called in the
+    calling thread as chunks complete. Setting ``cancel`` stops between
+    chunks with ``TrainingCancelled``.
+    """
+    total = len(image_paths)
+    workers = workers or os.cpu_count() or 1
+    registered = load_sample_metadata(path.parent for path in image_paths)
+    items = [(path, str(path) in registered) for path in image_paths]
+    chunks = [items[i:i + TRAINING_CHUNK] for i in range(0, total, TRAINING_CHUNK)]
+    detection_cache = load_detection_cache(cache_path) if not all(n for _, n in items) else {}
+    results: List[Optional[ChunkResult]] = [None] * len(chunks)
+    done = 0
+
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(str(CASCADE_PATH), detection_cache)
+        for idx, chunk in enumerate(chunks):
+            check_cancelled(cancel)
+            results[idx] = _extract_chunk(chunk, canonical)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, total)
+    else:
+        # Spawn rather than fork: the caller usually has Tk and a training thread running.
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(str(CASCADE_PATH), detection_cache)) as pool:
+            futures = {pool.submit(_extract_chunk, chunk, canonical): idx for idx, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                if cancel is not None and cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    raise TrainingCancelled()
+                idx = futures[future]
+                results[idx] = future.result()
+                done += len(chunks[idx])
+                if progress is not None:
+                    progress(done, total)
+
+    faces, ids = [], []
+    new_boxes: Dict[str, List[Box]] = {}
+    for chunk_faces, chunk_ids, errors, chunk_boxes in results:
+        faces.extend(chunk_faces)
+        ids.extend(chunk_ids)
+        new_boxes.update(chunk_boxes)
+        for message in errors:
+            log_error(message)
+    if new_boxes:
+        detection_cache.update(new_boxes)
+        save_detection_cache(detection_cache, cache_path)
+    return faces, ids
+
+
 def train_model(master: Optional[tk.Tk] = None) -> None:
     """Train LBPH face recognizer on student images."""
     
     win = tk.Toplevel(master) if master else tk.Tk()
     win.title("Model Training")
-    win.geometry("600x300")
+    win.geometry("600x370")
     win.configure(bg="#1e3a5f")
 
     tk.Label(win, text="🧠 Face Recognition Model Training", bg="#2c5f8d", fg="white",
@@ -33,88 +195,104 @@ def train_model(master: Optional[tk.Tk] = None) -> None:
     progress_bar = tk.Canvas(win, bg="#0c1b2a", height=30, relief="sunken", bd=2)
     progress_bar.pack(fill="x", padx=10, pady=10)
 
+    # Training runs on a TrainingJob thread; it only talks to Tk through its event queue.
+    job: List[object] = [None]
+
+    def show_progress(done: int, total: int) -> None:
+        progress = int(done / total * 100)
+        progress_var.set(progress)
+        progress_bar.delete("all")
+        progress_bar.create_rectangle(0, 0, progress * 6, 30, fill="#28a745", outline="")
+        progress_bar.create_text(300, 15, text=f"{progress}%", fill="white", font=("Arial", 12, "bold"))
+
+    def finish(report) -> None:
+        if not report.faces_total:
+            status_var.set("❌ No faces detected in training images!")
+            status_label.config(bg="#dc3545")
+            return
+        if not report.changed:
+            status_var.set(f"✅ Model already up to date: {report.faces_total} faces from {report.students_total} students")
+            status_label.config(bg="#28a745")
+            return
+
+        if report.rebuilt:
+            detail = f"rebuilt from {report.added_images} images"
+        else:
+            detail = (f"+{report.added_images} images, -{report.removed_images} images, "
+                      f"{report.students_updated} students refreshed")
+        log_info(f"Model trained successfully: {report.faces_total} faces, {report.students_total} unique students")
+        status_var.set(f"✅ Training complete ({detail})! {report.faces_total} faces from {report.students_total} students")
+        status_label.config(bg="#28a745")
+
+    def poll_events() -> None:
+        latest = None
+        while True:
+            try:
+                kind, payload = job[0].events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest = payload
+                continue
+            train_btn.config(state="normal")
+            cancel_btn.config(state="disabled")
+            if kind == "done":
+                finish(payload)
+            elif kind == "cancelled":
+                status_var.set("⏹ Training cancelled; the current model is unchanged")
+                status_label.config(bg="#6c757d")
+            else:
+                log_error(f"Training error: {payload}")
+                status_var.set(f"❌ Error: {payload}")
+                status_label.config(bg="#dc3545")
+            return
+        if latest is not None:
+            show_progress(*latest)
+        win.after(100, poll_events)
+
     def do_training():
         status_var.set("⏳ Collecting training images...")
         status_label.config(bg="#0d6efd")
         win.update()
 
-        try:
-            # Collect images
-            image_paths = list(TRAINING_DIR.glob("*.jpg"))
-            if not image_paths:
-                status_var.set("❌ No training images found in TrainingImage folder!")
-                status_label.config(bg="#dc3545")
-                log_error("No training images found")
-                return
-
-            status_var.set(f"📂 Found {len(image_paths)} images. Extracting features...")
-            status_label.config(bg="#0d6efd")
-            win.update()
-
-            # Extract faces and IDs
-            recognizer = cv2.face.LBPHFaceRecognizer_create()
-            cascade = cv2.CascadeClassifier(str(CASCADE_PATH))
-            
-            faces, ids = [], []
-            for idx, img_path in enumerate(image_paths):
-                try:
-                    pil_img = Image.open(img_path).convert('L')
-                    img_array = np.array(pil_img, 'uint8')
-                    
-                    # Extract enrollment ID from filename (name.enrollment.sample.jpg)
-                    parts = img_path.stem.split('.')
-                    if len(parts) >= 2:
-                        enrollment_id = int(parts[1])
-                    else:
-                        continue
-
-                    # Detect faces
-                    detected_faces = cascade.detectMultiScale(img_array)
-                    for (x, y, w, h) in detected_faces:
-                        faces.append(img_array[y:y+h, x:x+w])
-                        ids.append(enrollment_id)
-
-                    # Update progress
-                    progress = int((idx + 1) / len(image_paths) * 100)
-                    progress_var.set(progress)
-                    progress_bar.delete("all")
-                    progress_bar.create_rectangle(0, 0, progress * 6, 30, fill="#28a745", outline="")
-                    progress_bar.create_text(300, 15, text=f"{progress}%", fill="white", font=("Arial", 12, "bold"))
-                    win.update()
-
-                except Exception as e:
-                    log_error(f"Error processing {img_path}: {e}")
-                    continue
-
-            if not faces:
-                status_var.set("❌ No faces detected in training images!")
-                status_label.config(bg="#dc3545")
-                return
-
-            # Train model
-            status_var.set(f"🧠 Training model on {len(faces)} face samples...")
-            status_label.config(bg="#0d6efd")
-            win.update()
-
-            recognizer.train(faces, np.array(ids))
-            
-            # Save model
-            MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-            recognizer.save(str(MODEL_PATH))
+        # Collect images
+        image_paths = list_training_images()
+        if not image_paths and not SampleStore.exists():
+            status_var.set("❌ No training images found in TrainingImage folder!")
+            status_label.config(bg="#dc3545")
+            log_error("No training images found")
+            return
 
-            log_info(f"Model trained successfully: {len(faces)} faces, {len(set(ids))} unique students")
-            status_var.set(f"✅ Training complete! {len(faces)} faces trained from {len(set(ids))} students")
-            status_label.config(bg="#28a745")
+        status_var.set(f"📂 Found {len(image_paths)} images"
+                       + (" and the sample store" if SampleStore.exists() else "") + ". Extracting features...")
+        status_label.config(bg="#0d6efd")
+        train_btn.config(state="disabled")
+        cancel_btn.config(state="normal")
+        # Only images that are new or changed since the last training are read
+        from components.model_store import TrainingJob
+        job[0] = TrainingJob(image_paths, rebuild=rebuild_var.get()).start()
+        win.after(100, poll_events)
 
-        except Exception as exc:
-            log_error(f"Training error: {exc}")
-            status_var.set(f"❌ Error: {exc}")
-            status_label.config(bg="#dc3545")
+    def cancel_training():
+        if job[0] is not None and job[0].running:
+            job[0].cancel()
+            cancel_btn.config(state="disabled")
+            status_var.set("⏳ Cancelling...")
 
     train_btn = tk.Button(win, text="🚀 START TRAINING", command=do_training,
                           bg="#6f42c1", fg="white", font=("Arial", 13, "bold"),
                           relief="raised", bd=3, cursor="hand2", padx=20, pady=8)
-    train_btn.pack(pady=15)
+    train_btn.pack(pady=(15, 5))
+
+    cancel_btn = tk.Button(win, text="⏹ Cancel", command=cancel_training, state="disabled",
+                           bg="#6c757d", fg="white", font=("Arial", 10, "bold"),
+                           relief="raised", bd=2, cursor="hand2", padx=10)
+    cancel_btn.pack()
+
+    rebuild_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(win, text="Rebuild from scratch", variable=rebuild_var,
+                   bg="#1e3a5f", fg="white", selectcolor="#2c5f8d", activebackground="#1e3a5f",
+                   font=("Arial", 10)).pack()
 
     info_text = tk.Label(win, 
                         text="Training uses LBPH (Local Binary Patterns Histograms)\nfor efficient, real-time face recognition.",
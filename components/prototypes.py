@@ -0,0 +1,159 @@
+"""Per-student prototype compression for LBPH models.
+
+Registration keeps ~30 near-identical samples per student and every one of
+them costs a chi-square comparison per predicted face. ``compress`` keeps
+only ``k`` medoids per student (k-medoids under the same chi-square
+distance the recognizer uses), so the model and the per-face cost shrink
+by roughly ``samples / k``. Medoids are real samples, so the result is an
+ordinary LBPH model.
+
+``evaluate`` holds out part of each student's samples, matches them
+against the full and the compressed model and reports the reduction,
+accuracy of both and per-face timings::
+
+    python -m components.prototypes TrainingImageLabel/Trainner.yml --k 5
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from components.lbph_matcher import LBPHMatcher
+from config import MATCH_THRESHOLD
+
+
+def chi2_pairwise(histograms: np.ndarray) -> np.ndarray:
+    """Symmetric matrix of CHISQR_ALT distances between the rows of ``histograms``."""
+    n = len(histograms)
+    dist = np.zeros((n, n), dtype=np.float64)
+    for i in range(n - 1):
+        a, rest = histograms[i], histograms[i + 1:]
+        den = rest + a
+        num = np.square(rest - a)
+        terms = np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+        dist[i, i + 1:] = dist[i + 1:, i] = 2.0 * terms.sum(axis=1, dtype=np.float64)
+    return dist
+
+
+def k_medoids(dist: np.ndarray, k: int, iterations: int = 20) -> List[int]:
+    """Indices of ``k`` medoids for a precomputed distance matrix."""
+    n = len(dist)
+    if n <= k:
+        return list(range(n))
+    # Start from the most central sample, then add the farthest-from-chosen ones
+    medoids = [int(np.argmin(dist.sum(axis=1)))]
+    while len(medoids) < k:
+        medoids.append(int(np.argmax(dist[:, medoids].min(axis=1))))
+    for _ in range(iterations):
+        assign = np.argmin(dist[:, medoids], axis=1)
+        updated = []
+        for cluster, medoid in enumerate(medoids):
+            members = np.flatnonzero(assign == cluster)
+            if not len(members):
+                updated.append(medoid)
+                continue
+            within = dist[np.ix_(members, members)].sum(axis=1)
+            updated.append(int(members[np.argmin(within)]))
+        if updated == medoids:
+            break
+        medoids = updated
+    return sorted(medoids)
+
+
+def compress(histograms: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+    """Row indices to keep: at most ``k`` medoids per label, in original order."""
+    labels = np.asarray(labels).ravel()
+    keep: List[int] = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        if len(rows) <= k:
+            keep.extend(rows.tolist())
+            continue
+        chosen = k_medoids(chi2_pairwise(histograms[rows]), k)
+        keep.extend(rows[chosen].tolist())
+    return np.array(sorted(keep), dtype=np.int64)
+
+
+def compress_matcher(matcher: LBPHMatcher, k: int) -> LBPHMatcher:
+    """A matcher holding only ``k`` prototypes per student."""
+    histograms = matcher.columns.T
+    keep = compress(histograms, matcher.labels, k)
+    return LBPHMatcher(histograms[keep], matcher.labels[keep], matcher.radius, matcher.neighbors,
+                       matcher.grid_x, matcher.grid_y, matcher.threshold)
+
+
+def _score(matcher: LBPHMatcher, queries: np.ndarray, truth: np.ndarray) -> Dict[str, float]:
+    start = time.perf_counter()
+    best = [m[0] for m in matcher.match(queries)]
+    elapsed = time.perf_counter() - start
+    labels = np.array([label for label, _ in best])
+    dist = np.array([d for _, d in best])
+    return {
+        "samples": len(matcher),
+        "accuracy": float(np.mean(labels == truth)) if len(truth) else 0.0,
+        "match_rate": float(np.mean((labels == truth) & (dist < MATCH_THRESHOLD))) if len(truth) else 0.0,
+        "ms_per_face": elapsed / max(1, len(truth)) * 1000.0,
+    }
+
+
+def evaluate(matcher: LBPHMatcher, k: int, holdout: float = 0.2, seed: int = 0) -> Dict[str, object]:
+    """Compare full vs ``k``-prototype models on a per-student held-out split.
+
+    ``accuracy`` is top-1 identity; ``match_rate`` additionally requires
+    the distance to be under ``MATCH_THRESHOLD`` (what attendance marks).
+    """
+    histograms, labels = matcher.columns.T, matcher.labels
+    rng = np.random.default_rng(seed)
+    train_rows, test_rows = [], []
+    for label in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_test = int(len(rows) * holdout) if len(rows) > 1 else 0
+        test_rows.extend(rows[:n_test].tolist())
+        train_rows.extend(rows[n_test:].tolist())
+    train_rows, test_rows = np.sort(train_rows), np.sort(test_rows)
+
+    full = LBPHMatcher(histograms[train_rows], labels[train_rows], matcher.radius, matcher.neighbors,
+                       matcher.grid_x, matcher.grid_y, matcher.threshold)
+    reduced = compress_matcher(full, k)
+    queries, truth = histograms[test_rows], labels[test_rows]
+    full_score, reduced_score = _score(full, queries, truth), _score(reduced, queries, truth)
+    return {
+        "k": k,
+        "students": int(len(np.unique(labels))),
+        "held_out": int(len(test_rows)),
+        "reduction": len(full) / max(1, len(reduced)),
+        "full": full_score,
+        "prototypes": reduced_score,
+        "accuracy_delta": reduced_score["accuracy"] - full_score["accuracy"],
+        "match_rate_delta": reduced_score["match_rate"] - full_score["match_rate"],
+        "speedup": full_score["ms_per_face"] / max(1e-9, reduced_score["ms_per_face"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate per-student prototype compression.")
+    parser.add_argument("model", type=Path, help="Trainner.yml or Trainner.npz")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5, 10], help="prototypes per student")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of each student's samples held out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model.suffix == ".npz":
+        matcher = LBPHMatcher.load(args.model)
+    else:
+        matcher = LBPHMatcher.from_yaml(args.model)
+    print(f"{len(matcher)} samples, holdout {args.holdout:.0%}")
+    print(f"{'k':>4} {'reduction':>10} {'acc full':>9} {'acc k':>7} {'delta':>7} {'ms full':>8} {'ms k':>7}")
+    for k in args.k:
+        report = evaluate(matcher, k, args.holdout, args.seed)
+        full, reduced = report["full"], report["prototypes"]
+        print(f"{k:>4} {report['reduction']:>9.1f}x {full['accuracy']:>9.3f} {reduced['accuracy']:>7.3f} "
+              f"{report['accuracy_delta']:>+7.3f} {full['ms_per_face']:>8.2f} {reduced['ms_per_face']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
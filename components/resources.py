@@ -0,0 +1,244 @@
+"""Process-wide cache of the Haar cascade and recognition models.
+
+Parsing ``haarcascade_frontalface_default.xml`` and reading ``Trainner.yml``
+used to happen in every ``FaceEngine()``. ``resources`` loads each file once
+per process and hands the same objects to every engine:
+
+* a lookup only ``stat``s the files behind the resource; if size and
+  mtime are unchanged the cached object is returned;
+* if they changed, the content hash decides: same bytes (a touch or a
+  copy) keep the cached object, different bytes reload it;
+* every load is timed and logged, and ``stats()`` reports loads, hits and
+  the last load time per resource.
+
+A model also carries the face normalization it was trained with, read
+from the training manifest (``normalize``). A model without that stamp was
+trained on raw crops and is used with raw crops, whatever ``NORMALIZE_SIZE``
+says now. The manifest is one of the model's files, so the stamp written
+after a retrain reloads the model too.
+
+Shared objects are only read: LBPH ``predict`` and the NumPy matcher keep
+no per-call state. ``detectMultiScale`` is not documented as thread-safe,
+so the cascade comes with a lock that detection holds.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+
+from config import CANDIDATE_INDEX, CASCADE_PATH, MODEL_PATH, RECOGNIZER_BACKEND, TRAINING_MANIFEST
+from utils.logger import log_error, log_info
+
+Signature = Tuple[Optional[Tuple[int, int]], ...]
+
+
+@dataclass
+class Resource:
+    """One cached object and the state of the files it was loaded from."""
+    value: object
+    signature: Signature
+    digest: str
+    load_seconds: float
+    loads: int = 1
+    hits: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class LoadedModel:
+    """What ``FaceEngine`` predicts with: a cv2 recognizer or a NumPy matcher."""
+    recognizer: object = None
+    matcher: object = None
+    loaded: bool = False
+    normalize_size: Optional[Tuple[int, int]] = None  # None: raw crops
+    normalize_equalize: bool = False
+
+
+def _signature(paths: Sequence[Path]) -> Signature:
+    sig = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            sig.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _digest(paths: Sequence[Path]) -> str:
+    sha = hashlib.sha1()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(block)
+        except OSError:
+            sha.update(b"-")
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+class ResourceRegistry:
+    """Thread-safe, file-versioned cache of loaded resources."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Resource] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def get(self, key: str, paths: Sequence[Path], loader: Callable[[], object]) -> Resource:
+        """Cached resource for ``key``, (re)loaded when the files behind it changed."""
+        signature = _signature(paths)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                entry.hits += 1
+                return entry
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # One loader per key; other threads asking for it wait here
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.signature == signature:
+                    entry.hits += 1
+                    return entry
+            digest = _digest(paths)
+            if entry is not None and entry.digest == digest:
+                with self._lock:
+                    entry.signature = signature
+                    entry.hits += 1
+                return entry
+
+            start = time.perf_counter()
+            value = loader()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                loads = entry.loads + 1 if entry is not None else 1
+                lock = entry.lock if entry is not None else threading.Lock()
+                entry = Resource(value, signature, digest, elapsed, loads, lock=lock)
+                self._entries[key] = entry
+            log_info(f"Loaded {key} in {elapsed * 1000:.1f} ms (load #{loads})")
+            return entry
+
+    def cascade(self, path: Path = CASCADE_PATH) -> Resource:
+        """The Haar cascade; hold ``.lock`` around ``detectMultiScale``."""
+        path = Path(path)
+        return self.get(f"cascade:{path}", [path], lambda: cv2.CascadeClassifier(str(path)))
+
+    def model(self, model_path: Path = MODEL_PATH) -> LoadedModel:
+        """The recognition model at ``model_path`` (see ``load_model``)."""
+        model_path = Path(model_path)
+        resource = self.get(f"model:{model_path}", model_files(model_path), lambda: load_model(model_path))
+        return resource.value
+
+    def is_current(self, key: str, paths: Sequence[Path]) -> bool:
+        """True if ``key`` is loaded and its files have not been touched since."""
+        signature = _signature(paths)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.signature == signature
+
+    def model_is_current(self, model_path: Path = MODEL_PATH) -> bool:
+        model_path = Path(model_path)
+        return self.is_current(f"model:{model_path}", model_files(model_path))
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Forget one resource (or all), so the next lookup loads it again."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: {"loads": e.loads, "hits": e.hits, "last_load_ms": e.load_seconds * 1000.0}
+                    for key, e in self._entries.items()}
+
+
+def manifest_for(model_path: Path) -> Path:
+    """Training manifest describing ``model_path``.
+
+    It sits next to the model; roster models in ``subjects/`` are cut from
+    the global model and share the manifest one folder up.
+    """
+    for folder in (model_path.parent, model_path.parent.parent):
+        candidate = folder / TRAINING_MANIFEST.name
+        if candidate.exists():
+            return candidate
+    return model_path.parent / TRAINING_MANIFEST.name
+
+
+def model_normalization(model_path: Path) -> Tuple[Optional[Tuple[int, int]], bool]:
+    """(size, equalize) the model was trained with; (None, False) when it has no stamp."""
+    from components.model_store import load_manifest
+
+    stamp = load_manifest(manifest_for(model_path)).get("normalize")
+    if not stamp:
+        return None, False
+    size = stamp.get("size")
+    return (tuple(size) if size else None), bool(stamp.get("equalize"))
+
+
+def model_files(model_path: Path) -> List[Path]:
+    """Files a model load reads: the YAML and its manifest, plus the .npz and index for the numpy backend."""
+    files = [model_path, manifest_for(model_path)]
+    if RECOGNIZER_BACKEND != "numpy":
+        return files
+    from components.candidate_index import index_path_for
+
+    return files + [model_path.with_suffix(".npz"), index_path_for(model_path)]
+
+
+def load_model(model_path: Path) -> LoadedModel:
+    """Load a model the way the configured backend predicts.
+
+    The numpy backend uses ``.npz`` when it is at least as new as the
+    YAML (wrapped in its candidate index when enabled and current);
+    otherwise the YAML is read into a cv2 recognizer. Faces are normalized
+    as the manifest says the model was trained (``model_normalization``).
+    """
+    model = LoadedModel(recognizer=cv2.face.LBPHFaceRecognizer_create())
+    model.normalize_size, model.normalize_equalize = model_normalization(model_path)
+    npz_path = model_path.with_suffix(".npz")
+    if (RECOGNIZER_BACKEND == "numpy" and npz_path.exists()
+            and (not model_path.exists() or npz_path.stat().st_mtime >= model_path.stat().st_mtime)):
+        from components.lbph_matcher import LBPHMatcher
+        try:
+            model.matcher = LBPHMatcher.load(npz_path)
+            model.loaded = True
+        except Exception as exc:
+            log_error(f"Cannot load {npz_path}: {exc}")
+        if model.matcher is not None and CANDIDATE_INDEX:
+            model.matcher = _with_index(model.matcher, model_path, npz_path)
+    elif model_path.exists():
+        try:
+            model.recognizer.read(str(model_path))
+            model.loaded = True
+        except Exception as exc:
+            log_error(f"Cannot load {model_path}: {exc}")
+    return model
+
+
+def _with_index(matcher, model_path: Path, npz_path: Path):
+    """Wrap the matcher in its candidate index when one at least as new as the model exists."""
+    from components.candidate_index import CandidateIndex, index_path_for
+
+    index_path = index_path_for(model_path)
+    if not index_path.exists() or index_path.stat().st_mtime < npz_path.stat().st_mtime:
+        return matcher
+    try:
+        return CandidateIndex.load(index_path, matcher)
+    except Exception as exc:
+        log_error(f"Cannot load {index_path}: {exc}")
+        return matcher
+
+
+resources = ResourceRegistry()
@@ -8,7 +8,7 @@ from typing import Optional
 import cv2
 
 from components.face_engine import FaceEngine
-from config import TRAINING_DIR
+from components.face_samples import open_writer
 from data.database_handler import append_student_row
 from utils.logger import log_info, log_error
 import datetime
@@ -60,6 +60,7 @@ def register_student(master: Optional[tk.Tk] = None) -> None:
         win.update()
 
         engine = FaceEngine()
+        writer = open_writer(name, enrollment)
         cap = cv2.VideoCapture(0)
         sample_count = 0
         max_samples = 30
@@ -70,11 +71,12 @@ def register_student(master: Optional[tk.Tk] = None) -> None:
                 if not ret:
                     break
 
-                faces = engine.detect_faces(frame)
+                gray = engine.to_gray(frame)
+                faces = engine.detect_faces(gray)
                 for x, y, w, h in faces:
                     sample_count += 1
-                    img_path = TRAINING_DIR / f"{name}.{enrollment}.{sample_count}.jpg"
-                    engine.save_face_image(frame[y:y+h, x:x+w], img_path)
+                    # Normalized crop + box metadata, so training needs no re-detection
+                    writer.add(gray, (x, y, w, h), sample_count)
                     engine.draw_detection(frame, x, y, w, h, f"Capture: {sample_count}/30")
 
                 cv2.imshow("Student Registration - Press Q to stop", frame)
@@ -84,6 +86,7 @@ def register_student(master: Optional[tk.Tk] = None) -> None:
 
             cap.release()
             cv2.destroyAllWindows()
+            writer.close()
 
             # Save to StudentDetails.csv
             from datetime import datetime
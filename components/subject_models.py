@@ -0,0 +1,152 @@
+"""Recognition models scoped to a subject's or section's roster.
+
+``rosters.json`` next to ``config.py`` maps a subject or section name to
+the enrollments that attend it; a subject may also name a section to share
+its roster::
+
+    {"CSE-A": [1001, 1002, 1003],
+     "Maths": "CSE-A",
+     "Physics": [1001, 1004]}
+
+``model_for_subject`` returns the model a session should load: for a
+subject with a roster, ``TrainingImageLabel/subjects/<name>.yml`` holding
+only those students' histograms (cut from the global model, plus
+``.npz`` for the numpy backend). The cut is redone when the global model or
+the roster changes. Subjects without a roster, or whose roster has no
+trained student, fall back to the global ``Trainner.yml``.
+
+Rebuild every roster model after training with::
+
+    python -m components.subject_models
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from components.lbph_matcher import LBPHMatcher
+from components.model_store import file_signature, write_lbph_model
+from config import MODEL_PATH, RECOGNIZER_BACKEND, ROSTER_PATH, SUBJECT_MODEL_DIR
+from utils.logger import log_error, log_info
+
+
+def load_rosters(path: Path = ROSTER_PATH) -> Dict[str, List[int]]:
+    """Subject/section -> sorted enrollments, with aliases resolved."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        log_error(f"Cannot read rosters from {path}: {exc}")
+        return {}
+
+    if not isinstance(raw, dict):
+        log_error(f"Cannot read rosters from {path}: expected a JSON object")
+        return {}
+
+    rosters: Dict[str, List[int]] = {}
+    for name, value in raw.items():
+        seen = {name}
+        while isinstance(value, str) and value not in seen:
+            seen.add(value)
+            value = raw.get(value)
+        if not isinstance(value, list):
+            continue
+        enrollments = set()
+        for entry in value:
+            try:
+                enrollments.add(int(entry))
+            except (TypeError, ValueError):
+                log_error(f"Roster {name}: skipping enrollment {entry!r}, not a number")
+        rosters[name] = sorted(enrollments)
+    return rosters
+
+
+def subject_model_path(subject: str, folder: Path = SUBJECT_MODEL_DIR) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", subject).strip("_") or "subject"
+    return folder / f"{slug}.yml"
+
+
+def _load_global(model_path: Path) -> LBPHMatcher:
+    npz_path = model_path.with_suffix(".npz")
+    if npz_path.exists() and npz_path.stat().st_mtime >= model_path.stat().st_mtime:
+        return LBPHMatcher.load(npz_path)
+    return LBPHMatcher.from_yaml(model_path)
+
+
+def build_subject_model(subject: str, roster: List[int], model_path: Path = MODEL_PATH,
+                        folder: Path = SUBJECT_MODEL_DIR,
+                        matcher: Optional[LBPHMatcher] = None) -> Optional[Path]:
+    """Cut the roster's histograms out of the global model; None if none of them is trained."""
+    target = subject_model_path(subject, folder)
+    stamp_path = target.with_suffix(".json")
+    stamp = {"model": file_signature(model_path), "roster": roster}
+    try:
+        if target.exists() and json.loads(stamp_path.read_text(encoding="utf-8")) == stamp:
+            return target
+    except (OSError, ValueError):
+        pass
+
+    matcher = matcher or _load_global(model_path)
+    keep = np.flatnonzero(np.isin(matcher.labels, roster))
+    if not len(keep):
+        return None
+    histograms = matcher.columns[:, keep].T
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.stem + ".tmp" + target.suffix)
+    threshold = matcher.threshold if np.isfinite(matcher.threshold) else float(np.finfo(np.float64).max)
+    write_lbph_model(tmp, list(histograms), matcher.labels[keep], matcher.radius, matcher.neighbors,
+                     matcher.grid_x, matcher.grid_y, threshold)
+    os.replace(tmp, target)
+    if RECOGNIZER_BACKEND == "numpy":
+        LBPHMatcher(histograms, matcher.labels[keep], matcher.radius, matcher.neighbors,
+                    matcher.grid_x, matcher.grid_y, matcher.threshold).save(target.with_suffix(".npz"))
+    tmp = stamp_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(stamp), encoding="utf-8")
+    os.replace(tmp, stamp_path)
+    log_info(f"Built model for {subject}: {len(set(matcher.labels[keep].tolist()))} students, "
+             f"{len(keep)} histograms")
+    return target
+
+
+def model_for_subject(subject: str, model_path: Path = MODEL_PATH,
+                      rosters: Optional[Dict[str, List[int]]] = None) -> Path:
+    """Model a session for ``subject`` should load (the global one when there is no roster)."""
+    try:
+        roster = (rosters if rosters is not None else load_rosters()).get(subject)
+        if not roster or not model_path.exists():
+            return model_path
+        return build_subject_model(subject, roster, model_path) or model_path
+    except Exception as exc:
+        log_error(f"Subject model for {subject} failed, using the global model: {exc}")
+        return model_path
+
+
+def build_all(model_path: Path = MODEL_PATH) -> Dict[str, Optional[Path]]:
+    """(Re)build the model of every roster, reading the global model once.
+
+    A subject whose model fails maps to None (its sessions use the global
+    model); the other subjects are still built.
+    """
+    rosters = load_rosters()
+    if not rosters or not model_path.exists():
+        return {}
+    matcher = _load_global(model_path)
+    built: Dict[str, Optional[Path]] = {}
+    for subject, roster in rosters.items():
+        try:
+            built[subject] = build_subject_model(subject, roster, model_path, matcher=matcher)
+        except Exception as exc:
+            log_error(f"Subject model for {subject} failed, its sessions use the global model: {exc}")
+            built[subject] = None
+    return built
+
+
+if __name__ == "__main__":
+    for name, path in build_all().items():
+        print(f"{name}: {path or 'no trained students, uses the global model'}")
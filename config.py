@@ -4,9 +4,87 @@ BASE_DIR = Path(__file__).resolve().parent
 TRAINING_DIR = BASE_DIR / "TrainingImage"
 LABEL_DIR = BASE_DIR / "TrainingImageLabel"
 MODEL_PATH = LABEL_DIR / "Trainner.yml"
+TRAINING_MANIFEST = LABEL_DIR / "training_manifest.json"
+DETECTION_CACHE = LABEL_DIR / "detection_cache.json"
+SAMPLE_STORE_DIR = LABEL_DIR / "samples"
+SUBJECT_MODEL_DIR = LABEL_DIR / "subjects"
+ROSTER_PATH = BASE_DIR / "rosters.json"  # subject/section -> enrollments, for roster-scoped models
 ATTENDANCE_DIR = BASE_DIR / "Attendance"
+ATTENDANCE_DB = BASE_DIR / "attendance.db"
+ATTENDANCE_CSV_MIRROR = True  # also write each session as Attendance/Subject_date_time.csv
+JOURNAL_DIR = BASE_DIR / "Journal"  # write-ahead journals of running sessions, recovered at startup
 STUDENT_CSV = BASE_DIR / "StudentDetails.csv"
 CASCADE_PATH = BASE_DIR / "haarcascade_frontalface_default.xml"
+PROFILE_DIR = BASE_DIR / "logs" / "profiles"
+RECORDINGS_DIR = BASE_DIR / "Recordings"
+
+# Recognition loop profiling
+PROFILE_ENABLED = True  # record per-stage timings and dump a JSON profile at session end
+PROFILE_OVERLAY = False  # draw live FPS and stage timings on the camera feed
+
+# Session journal (crash safety for marks taken before the session is saved)
+JOURNAL_ENABLED = True
+JOURNAL_SYNC_EVERY = 10  # marks written between fsyncs (1 = fsync every mark)
+JOURNAL_SYNC_INTERVAL = 2.0  # seconds after which pending marks are fsynced with the next write
+
+# Face detection presets used by FaceEngine.detect_faces.
+#   detect_width:  frames wider than this are downscaled before the cascade (0 = full resolution)
+#   scale_factor / min_neighbors: passed to detectMultiScale
+#   min_face / max_face: expected face height as a fraction of the (ROI) frame height (0 = no bound)
+DETECTION_PRESETS = {
+    "accurate": {"detect_width": 0, "scale_factor": 1.1, "min_neighbors": 5, "min_face": 0.08, "max_face": 0.9},
+    "balanced": {"detect_width": 640, "scale_factor": 1.2, "min_neighbors": 5, "min_face": 0.12, "max_face": 0.8},
+    "fast": {"detect_width": 480, "scale_factor": 1.3, "min_neighbors": 4, "min_face": 0.18, "max_face": 0.7},
+    "legacy": {"detect_width": 0, "scale_factor": 1.3, "min_neighbors": 5, "min_face": 0.0, "max_face": 0.0},
+}
+# "legacy" is the original full-resolution cascade call with no size bounds; switch a site to
+# "balanced" or "fast" after checking with benchmarks/bench_detection.py that its faces are still found
+DETECTION_PRESET = "legacy"
+# Optional region of interest (x, y, w, h) as fractions of the frame, e.g. the entry lane.
+DETECTION_ROI = None
+
+# Recognition
+MATCH_THRESHOLD = 70  # LBPH confidence below this is a match
+# "opencv" predicts with cv2.face from Trainner.yml; "numpy" uses components.lbph_matcher
+# with Trainner.npz next to it (written by training, or converted once from the YAML)
+RECOGNIZER_BACKEND = "opencv"
+PROTOTYPES_PER_STUDENT = 0  # numpy backend: keep only this many medoid samples per student (0 = all)
+# numpy backend: shortlist students by PCA centroids before exact scoring (Trainner.index.npz)
+CANDIDATE_INDEX = False
+INDEX_DIMS = 64  # PCA components of the coarse stage
+INDEX_CANDIDATES = 20  # students scored exactly per face; higher = better recall, slower
+MODEL_RELOAD_INTERVAL = 2.0  # seconds between checks for a newly trained model in running sessions (0 = never)
+
+# Face normalization applied at training; recognition follows the stamp the training run
+# left in the manifest, so a model trained before a change keeps working until retrained
+NORMALIZE_SIZE = (100, 100)  # (width, height) every face is resized to before LBPH; None keeps raw crops
+NORMALIZE_EQUALIZE = False  # histogram-equalize normalized faces
+
+# Multi-frame identity voting per track
+VOTE_MIN_VOTES = 3  # predictions for the same student needed before committing a track
+VOTE_MIN_SHARE = 0.6  # share of the track's predictions that must agree
+VOTE_AGGREGATE = "median"  # how the agreeing confidences are combined: median, mean, min or max
+VOTE_MAX_ATTEMPTS = 15  # predictions after which an undecided track is given up as unknown
+
+# Face tracking between detections
+TRACK_DETECT_EVERY = 5  # run the cascade every N frames (or at once when a track is lost)
+TRACK_IOU_THRESHOLD = 0.3  # minimum overlap to keep a detection on an existing track
+TRACK_MIN_SCORE = 0.55  # template-match score below which a track counts as lost
+TRACK_MAX_MISSES = 2  # detections a track may miss before it is dropped
+
+# Motion gate and idle mode
+MOTION_GATE_ENABLED = True  # skip the cascade while the scene is static and nobody is tracked
+MOTION_WIDTH = 160  # width of the downscaled frame used for motion checks
+MOTION_PIXEL_DELTA = 25  # grey-level change that counts a pixel as moving
+MOTION_MIN_AREA = 0.005  # fraction of moving pixels that counts as motion
+IDLE_AFTER = 10.0  # seconds without motion before the camera loop drops to low power
+IDLE_POLL_INTERVAL = 0.25  # seconds between analysed frames while idle
+
+# Model training
+FACE_SIZE = (200, 200)  # (width, height) of the normalized face crops saved at registration
+TRAINING_WORKERS = 0  # processes used to decode and detect training images (0 = one per CPU)
+TRAINING_CHUNK = 64  # images handed to a worker at a time
+USE_SAMPLE_STORE = True  # registration appends crops to the packed sample store instead of writing JPEGs
 
 # Admin credentials
 ADMIN_USERNAME = "Heeralal"
@@ -0,0 +1,14 @@
+"""Shared pytest setup: keep test logging out of the tracked ``logs/app.log``."""
+from __future__ import annotations
+
+import pytest
+
+from utils.logger import LOG_FILE, flush_logs, set_log_file
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _test_log(tmp_path_factory):
+    set_log_file(tmp_path_factory.mktemp("logs") / "app.log")
+    yield
+    flush_logs()
+    set_log_file(LOG_FILE)
@@ -0,0 +1,476 @@
+"""SQLite store for attendance sessions and marks.
+
+Every session is one row in ``sessions`` and its students are rows in
+``marks`` (subject and date are copied onto each mark so the common
+filters hit an index)::
+
+    sessions(id, label, subject, date, started, source, records)
+    marks(session_id, enrollment, name, subject, date, time)
+
+    idx_marks_date             marks(date)
+    idx_marks_subject_date     marks(subject, date)
+    idx_marks_enrollment_date  marks(enrollment, date)
+    idx_sessions_date          sessions(date)
+
+Dashboard numbers come from aggregate tables that every insert updates
+in the same transaction as the marks, so they cost one primary-key read
+however much history is stored::
+
+    agg_totals(name, value)                          sessions, records, students
+    agg_daily(date, sessions, records)
+    agg_subject(subject, sessions, records)
+    agg_student(enrollment, records, first_date, last_date)   the unique-student set
+
+A database created before the aggregates existed (``PRAGMA user_version``
+below ``AGGREGATES_VERSION``) is backfilled once when opened.
+
+The database runs in WAL mode so the dashboard can read while a session
+writes, and a session's marks go in with one ``executemany`` inside one
+transaction. ``label`` is the old CSV stem (``Subject_YYYY-MM-DD_HH-MM-SS``);
+``import_csv_folder`` loads existing ``Attendance/*.csv`` files once, keyed
+by that label, and with ``ATTENDANCE_CSV_MIRROR`` every saved session is
+also written as that CSV for tools that still read the folder.
+
+Import existing files by hand, or recompute the aggregates from the
+marks, with::
+
+    python -m data.attendance_store --import
+    python -m data.attendance_store --rebuild-aggregates
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import ATTENDANCE_CSV_MIRROR, ATTENDANCE_DB, ATTENDANCE_DIR
+from utils.logger import log_error, log_info
+
+COLUMNS = ['Enrollment', 'Name', 'Date', 'Time']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    date TEXT NOT NULL,
+    started TEXT NOT NULL,
+    source TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS marks (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    enrollment INTEGER,
+    name TEXT,
+    subject TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_marks_date ON marks(date);
+CREATE INDEX IF NOT EXISTS idx_marks_subject_date ON marks(subject, date);
+CREATE INDEX IF NOT EXISTS idx_marks_enrollment_date ON marks(enrollment, date);
+CREATE INDEX IF NOT EXISTS idx_marks_session ON marks(session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_sessions_subject_date ON sessions(subject, date);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started, id);
+CREATE TABLE IF NOT EXISTS agg_totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS agg_daily (
+    date TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    records INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS agg_subject (
+    subject TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    records INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS agg_student (
+    enrollment INTEGER PRIMARY KEY,
+    records INTEGER NOT NULL DEFAULT 0,
+    first_date TEXT,
+    last_date TEXT
+) WITHOUT ROWID;
+"""
+AGGREGATES_VERSION = 1  # PRAGMA user_version once the agg_* tables are filled
+
+
+def session_label(subject: str, started: datetime) -> str:
+    """Name the session had as a CSV file: ``Subject_YYYY-MM-DD_HH-MM-SS``."""
+    return f"{subject}_{started.strftime('%Y-%m-%d_%H-%M-%S')}"
+
+
+def parse_label(label: str) -> Tuple[str, Optional[datetime]]:
+    """(subject, start time) from a session label / CSV stem; time is None if unparsable."""
+    parts = label.split("_")
+    if len(parts) >= 3:
+        try:
+            return parts[0], datetime.strptime(f"{parts[1]}_{parts[2]}", "%Y-%m-%d_%H-%M-%S")
+        except ValueError:
+            pass
+    return (parts[0] if len(parts) >= 2 else "unknown"), None
+
+
+def _enrollment(value) -> object:
+    text = str(value).strip()
+    return int(text) if text.isdigit() else text
+
+
+class AttendanceStore:
+    """Sessions and marks in one SQLite file; safe to share between threads."""
+
+    def __init__(self, path: Path = ATTENDANCE_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < AGGREGATES_VERSION:
+            self.rebuild_aggregates()
+
+    @property
+    def mirror_dir(self) -> Path:
+        """Folder for this database's CSV mirror (``Attendance/`` next to it)."""
+        return self.path.parent / ATTENDANCE_DIR.name
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Writing
+
+    def _insert(self, conn: sqlite3.Connection, subject: str, rows: Sequence[dict],
+                started: datetime, source: str, label: Optional[str]) -> Optional[int]:
+        label = label or session_label(subject, started)
+        try:
+            cur = conn.execute(
+                "INSERT INTO sessions (label, subject, date, started, source, records) VALUES (?, ?, ?, ?, ?, ?)",
+                (label, subject, started.strftime("%Y-%m-%d"), started.isoformat(timespec="seconds"),
+                 source, len(rows)))
+        except sqlite3.IntegrityError:
+            return None  # label already stored
+        session_id = cur.lastrowid
+        self._insert_marks(conn, session_id, subject, started, rows)
+        return session_id
+
+    def _insert_marks(self, conn: sqlite3.Connection, session_id: int, subject: str, started: datetime,
+                      rows: Sequence[dict], new_session: bool = True) -> None:
+        marks = [(session_id, _enrollment(row.get('Enrollment')), row.get('Name'), subject,
+                  str(row.get('Date') or started.strftime("%Y-%m-%d")), row.get('Time'))
+                 for row in rows]
+        conn.executemany(
+            "INSERT INTO marks (session_id, enrollment, name, subject, date, time) VALUES (?, ?, ?, ?, ?, ?)",
+            marks)
+        self._aggregate(conn, subject, started.strftime("%Y-%m-%d"), [(m[1], m[4]) for m in marks],
+                        int(new_session))
+
+    def _aggregate(self, conn: sqlite3.Connection, subject: str, date: str,
+                   marks: Sequence[Tuple[object, str]], sessions: int = 1) -> None:
+        """Add (enrollment, date) marks, and ``sessions`` new sessions, to the aggregate tables."""
+        per_day = Counter(day for _, day in marks)
+        per_day[date] += 0  # the session counts on its own date even without marks
+        conn.executemany(
+            "INSERT INTO agg_daily (date, sessions, records) VALUES (?, ?, ?) "
+            "ON CONFLICT(date) DO UPDATE SET sessions = sessions + excluded.sessions, "
+            "records = records + excluded.records",
+            [(day, sessions if day == date else 0, count) for day, count in per_day.items()])
+        conn.execute(
+            "INSERT INTO agg_subject (subject, sessions, records) VALUES (?, ?, ?) "
+            "ON CONFLICT(subject) DO UPDATE SET sessions = sessions + excluded.sessions, "
+            "records = records + excluded.records",
+            (subject, sessions, len(marks)))
+
+        students: Dict[object, List] = {}
+        for enrollment, day in marks:
+            if enrollment is None:
+                continue
+            entry = students.setdefault(enrollment, [0, day, day])
+            entry[0] += 1
+            entry[1], entry[2] = min(entry[1], day), max(entry[2], day)
+        new_students = conn.executemany(
+            "INSERT OR IGNORE INTO agg_student (enrollment, records, first_date, last_date) VALUES (?, 0, ?, ?)",
+            [(enrollment, first, last) for enrollment, (_, first, last) in students.items()]).rowcount
+        conn.executemany(
+            "UPDATE agg_student SET records = records + ?, first_date = MIN(first_date, ?), "
+            "last_date = MAX(last_date, ?) WHERE enrollment = ?",
+            [(count, first, last, enrollment) for enrollment, (count, first, last) in students.items()])
+
+        conn.executemany(
+            "INSERT INTO agg_totals (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [("sessions", sessions), ("records", len(marks)), ("students", max(new_students, 0))])
+
+    def rebuild_aggregates(self) -> None:
+        """Recompute every aggregate table from ``sessions`` and ``marks``."""
+        conn = self._connect()
+        with conn:
+            for table in ("agg_totals", "agg_daily", "agg_subject", "agg_student"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                "INSERT INTO agg_daily (date, sessions, records) "
+                "SELECT date, SUM(sessions), SUM(records) FROM ("
+                "SELECT date, COUNT(*) AS sessions, 0 AS records FROM sessions GROUP BY date "
+                "UNION ALL SELECT date, 0, COUNT(*) FROM marks GROUP BY date) GROUP BY date")
+            conn.execute(
+                "INSERT INTO agg_subject (subject, sessions, records) "
+                "SELECT subject, COUNT(*), SUM(records) FROM sessions GROUP BY subject")
+            conn.execute(
+                "INSERT INTO agg_student (enrollment, records, first_date, last_date) "
+                "SELECT enrollment, COUNT(*), MIN(date), MAX(date) FROM marks "
+                "WHERE enrollment IS NOT NULL GROUP BY enrollment")
+            conn.execute(
+                "INSERT INTO agg_totals (name, value) VALUES "
+                "('sessions', (SELECT COUNT(*) FROM sessions)), "
+                "('records', (SELECT COALESCE(SUM(records), 0) FROM sessions)), "
+                "('students', (SELECT COUNT(*) FROM agg_student))")
+            conn.execute(f"PRAGMA user_version = {AGGREGATES_VERSION}")
+        log_info(f"Rebuilt attendance aggregates in {self.path.name}")
+
+    def add_session(self, subject: str, rows: Sequence[dict], started: Optional[datetime] = None,
+                    source: str = "auto", label: Optional[str] = None) -> int:
+        """Store one session and its marks in a single transaction; returns the session id.
+
+        A label that is already taken (two sessions of a subject in the
+        same second) gets a ``-2``, ``-3``... suffix.
+        """
+        started = started or datetime.now()
+        base = label or session_label(subject, started)
+        conn = self._connect()
+        with conn:
+            session_id = self._insert(conn, subject, rows, started, source, base)
+            suffix = 2
+            while session_id is None:
+                session_id = self._insert(conn, subject, rows, started, source, f"{base}-{suffix}")
+                suffix += 1
+        return session_id
+
+    def add_marks(self, session_id: int, rows: Sequence[dict]) -> None:
+        """Append marks to a stored session (one taken over several saves)."""
+        conn = self._connect()
+        with conn:
+            subject, started = conn.execute(
+                "SELECT subject, started FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            conn.execute("UPDATE sessions SET records = records + ? WHERE id = ?", (len(rows), session_id))
+            self._insert_marks(conn, session_id, subject, datetime.fromisoformat(started), rows, new_session=False)
+
+    def import_csv_folder(self, folder: Path = ATTENDANCE_DIR) -> int:
+        """Load ``Subject_date_time.csv`` files not stored yet; returns sessions imported."""
+        conn = self._connect()
+        known = {label for (label,) in conn.execute("SELECT label FROM sessions")}
+        imported = 0
+        with conn:
+            for path in sorted(folder.glob("*.csv")):
+                if path.stem in known:
+                    continue
+                try:
+                    with open(path, newline="", encoding="utf-8") as f:
+                        rows = [row for row in csv.DictReader(f)]
+                except (OSError, UnicodeDecodeError, csv.Error) as exc:
+                    log_error(f"Skipping {path.name}: {exc}")
+                    continue
+                rows = [{key.title() if key else key: value for key, value in row.items()} for row in rows]
+                subject, started = parse_label(path.stem)
+                started = started or datetime.fromtimestamp(path.stat().st_mtime)
+                if self._insert(conn, subject, rows, started, "import", path.stem) is not None:
+                    imported += 1
+        if imported:
+            log_info(f"Imported {imported} attendance CSV files into {self.path.name}")
+        return imported
+
+    # Reading
+
+    def _scalar(self, sql: str, params: Sequence = ()) -> int:
+        return int(self._connect().execute(sql, params).fetchone()[0] or 0)
+
+    def _total(self, name: str) -> int:
+        return self._scalar("SELECT COALESCE((SELECT value FROM agg_totals WHERE name = ?), 0)", (name,))
+
+    def totals(self) -> Dict[str, int]:
+        """``sessions``, ``records`` and ``students`` (unique) over all history."""
+        values = dict(self._connect().execute("SELECT name, value FROM agg_totals"))
+        return {name: int(values.get(name, 0)) for name in ("sessions", "records", "students")}
+
+    def session_count(self) -> int:
+        return self._total("sessions")
+
+    def record_count(self, date: Optional[str] = None) -> int:
+        """All marks, or the marks of one ``YYYY-MM-DD`` date."""
+        if date is None:
+            return self._total("records")
+        return self._scalar("SELECT COALESCE((SELECT records FROM agg_daily WHERE date = ?), 0)", (date,))
+
+    def latest_sessions(self, limit: Optional[int] = None) -> List[Dict[str, object]]:
+        """Newest sessions first, with their mark counts."""
+        sql = "SELECT id, label, subject, date, started, source, records FROM sessions ORDER BY started DESC, id DESC"
+        params: Tuple = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        keys = ("id", "label", "subject", "date", "started", "source", "records")
+        return [dict(zip(keys, row)) for row in self._connect().execute(sql, params)]
+
+    def _session_filter(self, limit: Optional[int]) -> Tuple[str, Tuple]:
+        if not limit:
+            return "", ()
+        return (" WHERE session_id IN (SELECT id FROM sessions ORDER BY started DESC, id DESC LIMIT ?)",
+                (limit,))
+
+    def unique_students(self, limit: Optional[int] = None) -> int:
+        if not limit:
+            return self._total("students")
+        where, params = self._session_filter(limit)
+        return self._scalar(f"SELECT COUNT(DISTINCT enrollment) FROM marks{where}", params)
+
+    def per_subject(self, limit: Optional[int] = None) -> Counter:
+        """Mark count per subject."""
+        if not limit:
+            return Counter({subject: int(total) for subject, total in
+                            self._connect().execute("SELECT subject, records FROM agg_subject")})
+        sql = ("SELECT subject, SUM(records) FROM (SELECT subject, records FROM sessions "
+               "ORDER BY started DESC, id DESC LIMIT ?) GROUP BY subject")
+        return Counter({subject: int(total) for subject, total in self._connect().execute(sql, (limit,))})
+
+    def daily_counts(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(date, marks) per day, newest first."""
+        if not limit:
+            return self.daily_totals()
+        where, params = self._session_filter(limit)
+        return [(date, int(count)) for date, count in self._connect().execute(
+            f"SELECT date, COUNT(*) FROM marks{where} GROUP BY date ORDER BY date DESC", params)]
+
+    def daily_totals(self, days: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(date, marks) for the ``days`` newest dates with marks (all by default), newest first."""
+        sql = "SELECT date, records FROM agg_daily WHERE records > 0 ORDER BY date DESC"
+        params: Tuple = ()
+        if days:
+            sql += " LIMIT ?"
+            params = (days,)
+        return [(date, int(count)) for date, count in self._connect().execute(sql, params)]
+
+    def student_summary(self, enrollment: object) -> Optional[Dict[str, object]]:
+        """``records``, ``first_date`` and ``last_date`` of one student, or None if never marked."""
+        row = self._connect().execute(
+            "SELECT records, first_date, last_date FROM agg_student WHERE enrollment = ?",
+            (_enrollment(enrollment),)).fetchone()
+        return dict(zip(("records", "first_date", "last_date"), row)) if row else None
+
+    def session_by_label(self, label: str) -> Optional[Dict[str, object]]:
+        row = self._connect().execute(
+            "SELECT id, label, subject, date, started, source, records FROM sessions WHERE label = ?",
+            (label,)).fetchone()
+        return dict(zip(("id", "label", "subject", "date", "started", "source", "records"), row)) if row else None
+
+    def find_session(self, subject: str, started: datetime, source: str, records: int) -> Optional[int]:
+        """Id of a stored session with these details, whatever suffix its label got."""
+        row = self._connect().execute(
+            "SELECT id FROM sessions WHERE started = ? AND subject = ? AND source = ? AND records = ?",
+            (started.isoformat(timespec="seconds"), subject, source, records)).fetchone()
+        return row[0] if row else None
+
+    def label(self, session_id: int) -> str:
+        return self._connect().execute("SELECT label FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+
+    def session_rows(self, session_id: int) -> List[dict]:
+        """Marks of one session as ``Enrollment/Name/Date/Time`` rows."""
+        return [dict(zip(COLUMNS, row)) for row in self._connect().execute(
+            "SELECT enrollment, name, date, time FROM marks WHERE session_id = ? ORDER BY id", (session_id,))]
+
+    def iter_sessions(self) -> Iterator[Tuple[Dict[str, object], List[dict]]]:
+        """(session, rows) for every session, oldest first."""
+        for session in reversed(self.latest_sessions()):
+            yield session, self.session_rows(int(session["id"]))
+
+    def export_csv(self, folder: Path) -> int:
+        """Write every session as ``<label>.csv`` into ``folder``; returns files written."""
+        folder.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for session, rows in self.iter_sessions():
+            write_csv(folder / f"{session['label']}.csv", rows)
+            written += 1
+        return written
+
+
+def write_csv(path: Path, rows: Iterable[dict]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+_stores: Dict[Path, AttendanceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: Path = ATTENDANCE_DB) -> AttendanceStore:
+    """Process-wide store for ``path``; a new database first imports ``Attendance/*.csv``."""
+    path = Path(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            fresh = not path.exists()
+            store = _stores[path] = AttendanceStore(path)
+            if fresh and path == ATTENDANCE_DB and ATTENDANCE_DIR.exists():
+                store.import_csv_folder(ATTENDANCE_DIR)
+        return store
+
+
+def save_session(subject: str, rows: Sequence[dict], started: Optional[datetime] = None,
+                 source: str = "auto", mirror: bool = ATTENDANCE_CSV_MIRROR,
+                 store: Optional[AttendanceStore] = None, label: Optional[str] = None) -> Tuple[int, Optional[Path]]:
+    """Store a session and, with ``mirror``, write its CSV next to the store; returns (session id, CSV path)."""
+    started = started or datetime.now()
+    store = store or open_store()
+    session_id = store.add_session(subject, rows, started, source, label)
+    csv_path = None
+    if mirror:
+        store.mirror_dir.mkdir(parents=True, exist_ok=True)
+        csv_path = store.mirror_dir / f"{store.label(session_id)}.csv"
+        write_csv(csv_path, rows)
+    return session_id, csv_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Attendance database maintenance.")
+    parser.add_argument("--db", type=Path, default=ATTENDANCE_DB)
+    parser.add_argument("--import", dest="source", nargs="?", const=ATTENDANCE_DIR, type=Path,
+                        help="import attendance CSVs from this folder (default: Attendance/)")
+    parser.add_argument("--export-csv", type=Path, help="write every session as a CSV into this folder")
+    parser.add_argument("--rebuild-aggregates", action="store_true",
+                        help="recompute the dashboard aggregates from the stored marks")
+    args = parser.parse_args()
+
+    store = AttendanceStore(args.db)
+    if args.source:
+        print(f"Imported {store.import_csv_folder(args.source)} sessions from {args.source}")
+    if args.rebuild_aggregates:
+        store.rebuild_aggregates()
+        print(f"Rebuilt aggregates: {store.totals()}")
+    if args.export_csv:
+        print(f"Wrote {store.export_csv(args.export_csv)} CSV files to {args.export_csv}")
+    print(f"{store.session_count()} sessions, {store.record_count()} marks in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
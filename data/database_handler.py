@@ -2,38 +2,27 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import pandas as pd
 
 from config import STUDENT_CSV, ATTENDANCE_DIR
+from data.student_registry import open_registry
 
 
-def read_students() -> pd.DataFrame:
-    """Read student CSV file."""
+def read_students(path: Path = STUDENT_CSV) -> pd.DataFrame:
+    """Read student CSV file (cached until the file changes; see ``data.student_registry``)."""
     try:
-        if STUDENT_CSV.exists():
-            return pd.read_csv(STUDENT_CSV)
-        return pd.DataFrame(columns=['Enrollment', 'Name', 'Date', 'Time'])
+        return open_registry(path).to_frame()
     except Exception as e:
         print(f"Error reading students: {e}")
         return pd.DataFrame(columns=['Enrollment', 'Name', 'Date', 'Time'])
 
 
-def append_student_row(row: dict) -> bool:
-    """Append a student row to CSV."""
+def append_student_row(row: Union[dict, list], path: Path = STUDENT_CSV) -> bool:
+    """Append a student row (column dict or [enrollment, name, date, time]) to the CSV."""
     try:
-        # Read existing data
-        if STUDENT_CSV.exists():
-            df = pd.read_csv(STUDENT_CSV)
-        else:
-            df = pd.DataFrame(columns=['Enrollment', 'Name', 'Date', 'Time'])
-        
-        # Append new row
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        
-        # Write back
-        df.to_csv(STUDENT_CSV, index=False)
+        open_registry(path).append(row)
         return True
     except Exception as e:
         print(f"Error appending student: {e}")
@@ -0,0 +1,118 @@
+"""Excel export of attendance reports."""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from data.attendance_store import COLUMNS, AttendanceStore, open_store
+from utils.logger import log_error
+
+
+def export_excel_report(folder_path: Path, store: Optional[AttendanceStore] = None) -> Tuple[Path, int]:
+    """Write every attendance session into one workbook in ``folder_path``.
+
+    Returns (excel_path, number of sessions exported). Raises ImportError
+    when openpyxl is not installed.
+    """
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils.dataframe import dataframe_to_rows
+
+    # Create a single Excel file with all attendance data
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)  # Remove default sheet
+
+    all_data = []
+    total_files = 0
+
+    for session, rows in (store or open_store()).iter_sessions():
+        label = str(session['label'])
+        try:
+            df = pd.DataFrame(rows, columns=COLUMNS)
+            df['Session'] = label  # Add session info
+            all_data.append(df)
+
+            # Create individual sheet for each session
+            ws = wb.create_sheet(title=label[:31])  # Excel limit 31 chars
+
+            # Add title
+            ws.append([f"Attendance Report: {label}"])
+            ws['A1'].font = Font(bold=True, size=14)
+            ws.merge_cells('A1:D1')
+
+            # Add headers
+            ws.append(['Enrollment', 'Name', 'Date', 'Time'])
+            for cell in ws[2]:
+                cell.font = Font(bold=True)
+                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+                cell.font = Font(bold=True, color="FFFFFF")
+                cell.alignment = Alignment(horizontal='center')
+
+            # Add data
+            for _, row in df.iterrows():
+                ws.append([row['Enrollment'], row['Name'], row['Date'], row['Time']])
+
+            # Auto-adjust column widths
+            for column in ws.columns:
+                max_length = 0
+                column_letter = None
+                for cell in column:
+                    try:
+                        if hasattr(cell, 'column_letter'):
+                            column_letter = cell.column_letter
+                        if hasattr(cell, 'value') and cell.value:
+                            if len(str(cell.value)) > max_length:
+                                max_length = len(str(cell.value))
+                    except:
+                        pass
+                if column_letter:
+                    adjusted_width = min(max_length + 2, 50)
+                    ws.column_dimensions[column_letter].width = adjusted_width
+
+            total_files += 1
+        except Exception as e:
+            log_error(f"Error processing {label}: {e}")
+
+    # Create summary sheet
+    if all_data:
+        summary_df = pd.concat(all_data, ignore_index=True)
+        ws_summary = wb.create_sheet(title="All Records", index=0)
+
+        ws_summary.append(["Complete Attendance Records"])
+        ws_summary['A1'].font = Font(bold=True, size=14)
+        ws_summary.merge_cells('A1:E1')
+
+        ws_summary.append(['Enrollment', 'Name', 'Date', 'Time', 'Session'])
+        for cell in ws_summary[2]:
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.alignment = Alignment(horizontal='center')
+
+        for _, row in summary_df.iterrows():
+            ws_summary.append([row['Enrollment'], row['Name'], row['Date'], row['Time'], row['Session']])
+
+        # Auto-adjust columns
+        for column in ws_summary.columns:
+            max_length = 0
+            column_letter = None
+            for cell in column:
+                try:
+                    if hasattr(cell, 'column_letter'):
+                        column_letter = cell.column_letter
+                    if hasattr(cell, 'value') and cell.value:
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                except:
+                    pass
+            if column_letter:
+                adjusted_width = min(max_length + 2, 50)
+                ws_summary.column_dimensions[column_letter].width = adjusted_width
+
+    # Save Excel file
+    excel_path = folder_path / f"Attendance_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    wb.save(excel_path)
+    return excel_path, total_files
@@ -0,0 +1,271 @@
+"""Packed on-disk store for training face samples.
+
+All samples live in three files under ``TrainingImageLabel/samples/``:
+
+* ``faces.u8``   raw uint8 crops of ``FACE_SIZE``, one after another
+  (read back as a memory-mapped ``(N, H, W)`` array);
+* ``labels.i4``  raw int32 enrollment per sample;
+* ``index.json`` sample count, crop size and, per student, the name, the
+  ``[start, stop)`` runs of rows that belong to them and capture metadata.
+
+Appends write past the committed count and then replace ``index.json``,
+so a crash mid-append leaves the store at its previous state. Writers
+(append, remove, compact) hold an OS lock on ``store.lock`` and re-read
+``index.json`` under it, so two registrations in separate processes or
+windows never write at the same offset or drop each other's students. Removing a
+student only drops them from the index; ``compact`` rewrites the arrays
+without the dead rows and with one contiguous run per student.
+
+``import_folder`` converts an existing ``TrainingImage/`` once and moves
+the imported files to ``TrainingImage/imported/`` so they are not
+trained twice.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import FACE_SIZE, SAMPLE_STORE_DIR, TRAINING_DIR
+
+INDEX_VERSION = 1
+
+
+@contextmanager
+def _locked(handle) -> Iterator[None]:
+    """Exclusive OS lock on an open file for the duration of the block."""
+    if os.name == "nt":
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class SampleStore:
+    """Append-only packed array of fixed-size grayscale face crops."""
+
+    def __init__(self, folder: Path = SAMPLE_STORE_DIR, face_size: Tuple[int, int] = FACE_SIZE):
+        self.folder = Path(folder)
+        self.faces_path = self.folder / "faces.u8"
+        self.labels_path = self.folder / "labels.i4"
+        self.index_path = self.folder / "index.json"
+        self.lock_path = self.folder / "store.lock"
+        self._lock = threading.Lock()
+        self._faces: Optional[np.ndarray] = None
+        self._labels: Optional[np.ndarray] = None
+        self.index = self._load_index(face_size)
+        self.width, self.height = self.index["face_size"]
+
+    @classmethod
+    def exists(cls, folder: Path = SAMPLE_STORE_DIR) -> bool:
+        return (Path(folder) / "index.json").exists()
+
+    def _load_index(self, face_size: Tuple[int, int]) -> Dict[str, object]:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "face_size": list(face_size), "count": 0, "students": {}}
+
+    def _save_index(self) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.index), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+        self._faces = self._labels = None
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the thread and file locks and bring the index up to date with other writers."""
+        with self._lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a+b") as handle, _locked(handle):
+                index = self._load_index((self.width, self.height))
+                if index != self.index:
+                    self.index = index
+                    self._faces = self._labels = None
+                yield
+
+    def __len__(self) -> int:
+        return int(self.index["count"])
+
+    @property
+    def faces(self) -> np.ndarray:
+        """All committed crops as a read-only ``(N, H, W)`` memmap."""
+        if self._faces is None:
+            if not len(self):
+                return np.empty((0, self.height, self.width), np.uint8)
+            self._faces = np.memmap(self.faces_path, np.uint8, mode="r",
+                                    shape=(len(self), self.height, self.width))
+        return self._faces
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Enrollment of every committed row (including rows of removed students)."""
+        if self._labels is None:
+            if not len(self):
+                return np.empty(0, np.int32)
+            self._labels = np.memmap(self.labels_path, np.int32, mode="r", shape=(len(self),))
+        return self._labels
+
+    def enrollments(self) -> List[int]:
+        return [int(e) for e in self.index["students"]]
+
+    def name_for(self, enrollment: int) -> Optional[str]:
+        entry = self.index["students"].get(str(enrollment))
+        return entry["name"] if entry else None
+
+    def runs(self, enrollment: int) -> List[List[int]]:
+        entry = self.index["students"].get(str(enrollment))
+        return entry["runs"] if entry else []
+
+    def student(self, enrollment: int) -> np.ndarray:
+        """Crops of one student; a zero-copy view when they are stored contiguously."""
+        runs = self.runs(enrollment)
+        if len(runs) == 1:
+            start, stop = runs[0]
+            return self.faces[start:stop]
+        if not runs:
+            return np.empty((0, self.height, self.width), np.uint8)
+        return np.concatenate([self.faces[start:stop] for start, stop in runs])
+
+    def live_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(faces, labels) of every student still in the index."""
+        if self.live_count() == len(self):
+            return self.faces, self.labels
+        enrollments = self.enrollments()
+        chunks = [self.student(e) for e in enrollments]
+        labels = [np.full(len(c), e, np.int32) for c, e in zip(chunks, enrollments)]
+        return np.concatenate(chunks), np.concatenate(labels)
+
+    def live_count(self) -> int:
+        return sum(stop - start for entry in self.index["students"].values() for start, stop in entry["runs"])
+
+    def append(self, enrollment: int, crops: Sequence[np.ndarray], name: Optional[str] = None,
+               meta: Optional[List[dict]] = None) -> Tuple[int, int]:
+        """Add crops (each already ``FACE_SIZE``) for a student; returns the new row range."""
+        if not len(crops):
+            return len(self), len(self)
+        block = np.ascontiguousarray(np.stack(crops), dtype=np.uint8)
+        if block.shape[1:] != (self.height, self.width):
+            raise ValueError(f"crops must be {self.width}x{self.height}, got {block.shape[2]}x{block.shape[1]}")
+
+        with self._writing():
+            start = len(self)
+            stop = start + len(block)
+            for path, data, itemsize in ((self.faces_path, block, self.width * self.height),
+                                         (self.labels_path, np.full(len(block), enrollment, np.int32), 4)):
+                with open(path, "r+b" if path.exists() else "w+b") as f:
+                    f.seek(start * itemsize)
+                    f.write(data.tobytes())
+                    if f.seek(0, os.SEEK_END) > stop * itemsize:
+                        f.truncate(stop * itemsize)  # leftovers of an interrupted append
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            entry = self.index["students"].setdefault(str(enrollment), {"name": name, "runs": [], "meta": []})
+            if name:
+                entry["name"] = name
+            if entry["runs"] and entry["runs"][-1][1] == start:
+                entry["runs"][-1][1] = stop
+            else:
+                entry["runs"].append([start, stop])
+            if meta:
+                entry["meta"].extend(meta)
+            self.index["count"] = stop
+            self._save_index()
+        return start, stop
+
+    def remove(self, enrollment: int) -> bool:
+        """Drop a student from the index (rows are reclaimed by ``compact``)."""
+        with self._writing():
+            if self.index["students"].pop(str(enrollment), None) is None:
+                return False
+            self._save_index()
+            return True
+
+    def compact(self) -> None:
+        """Rewrite the arrays without dead rows, one contiguous run per student."""
+        with self._writing():
+            shutil.rmtree(self.folder / "compact.tmp", ignore_errors=True)
+            tmp = SampleStore(self.folder / "compact.tmp", (self.width, self.height))
+            for enrollment in sorted(self.enrollments()):
+                entry = self.index["students"][str(enrollment)]
+                tmp.append(enrollment, self.student(enrollment), entry["name"], entry["meta"])
+            self._faces = self._labels = None
+            for name in ("faces.u8", "labels.i4", "index.json"):
+                source = tmp.folder / name
+                if source.exists():
+                    os.replace(source, self.folder / name)
+                else:
+                    (self.folder / name).unlink(missing_ok=True)
+            shutil.rmtree(tmp.folder, ignore_errors=True)
+            self.index = self._load_index((self.width, self.height))
+
+
+def import_folder(store: SampleStore, folder: Path = TRAINING_DIR,
+                  image_paths: Optional[Iterable[Path]] = None, move: bool = True) -> int:
+    """One-time import of ``name.enrollment.sample.jpg`` files; returns samples added.
+
+    Crops come from ``extract_faces`` (sidecar crops as-is, legacy images
+    through the cascade) and are resized to the store's face size. With
+    ``move`` the imported images and sidecars go to ``folder/imported``.
+    """
+    import cv2
+
+    from components.model_training import extract_faces, list_training_images, parse_enrollment
+
+    paths = list(image_paths) if image_paths is not None else list_training_images(folder)
+    names: Dict[int, str] = {}
+    for path in paths:
+        enrollment = parse_enrollment(path)
+        if enrollment is not None:
+            names[enrollment] = path.stem.split('.')[0]
+
+    faces, ids = extract_faces(paths, canonical=False)
+    by_student: Dict[int, List[np.ndarray]] = {}
+    for face, enrollment in zip(faces, ids):
+        by_student.setdefault(enrollment, []).append(
+            cv2.resize(face, (store.width, store.height), interpolation=cv2.INTER_AREA))
+
+    added = 0
+    for enrollment, crops in by_student.items():
+        start, stop = store.append(enrollment, crops, names[enrollment], [{"imported": len(crops)}])
+        added += stop - start
+
+    if move and paths:
+        target = folder / "imported"
+        target.mkdir(parents=True, exist_ok=True)
+        sidecars = [folder / f"{name}.{enrollment}.json" for enrollment, name in names.items()]
+        for path in list(paths) + sidecars:
+            if path.exists():
+                shutil.move(str(path), str(target / path.name))
+    return added
+
+
+if __name__ == "__main__":
+    store = SampleStore()
+    if len(store):
+        print(f"Sample store already has {len(store)} samples; nothing imported.")
+    else:
+        count = import_folder(store)
+        print(f"Imported {count} samples for {len(store.enrollments())} students into {store.folder}")
@@ -0,0 +1,221 @@
+"""Write-ahead journal for live attendance sessions.
+
+Every mark of a running session is appended to
+``Journal/<label>.<id>.jsonl`` the moment it is made, so a crash, power
+cut or camera error mid-lecture no longer loses the session::
+
+    {"type": "open", "label": ..., "subject": ..., "started": ..., "source": ...}
+    {"type": "mark", "row": {"Enrollment": ..., "Name": ..., "Date": ..., "Time": ...}}
+    ...
+    {"type": "sealed", "session_id": ...}
+
+Each line is written and flushed at once (a killed process loses
+nothing); ``fsync`` is batched, every ``JOURNAL_SYNC_EVERY`` marks or
+``JOURNAL_SYNC_INTERVAL`` seconds, which bounds what a power cut can cost.
+Saving the session stores it in the attendance database and seals the
+journal, which then is deleted.
+
+The live session holds an exclusive lock on its journal. At startup
+``recover_journals`` stores every journal that is unlocked and unsealed,
+skipping a torn last line, and deletes it. A journal whose session is
+already in the database (crash between the commit and the seal) is only
+deleted; it is matched on subject, start time, source and mark count,
+since the stored label may carry a ``-2`` suffix. Recover by hand with::
+
+    python -m data.session_journal
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import ATTENDANCE_CSV_MIRROR, JOURNAL_DIR, JOURNAL_SYNC_EVERY, JOURNAL_SYNC_INTERVAL
+from data.attendance_store import AttendanceStore, open_store, save_session, session_label
+from utils.logger import log_error, log_info
+
+
+def _try_lock(handle) -> bool:
+    """Take an exclusive OS lock on ``handle`` without waiting; False if another holder has it."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _dumps(record: dict) -> bytes:
+    return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+class SessionJournal:
+    """Append-only journal of one session; create with ``SessionJournal.create``."""
+
+    def __init__(self, path: Path, handle, label: str,
+                 sync_every: int = JOURNAL_SYNC_EVERY, sync_interval: float = JOURNAL_SYNC_INTERVAL):
+        self.path = path
+        self.label = label
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        self.marks = 0
+        self._handle = handle
+        self._pending = 0
+        self._synced_at = time.monotonic()
+
+    @classmethod
+    def create(cls, subject: str, started: datetime, source: str = "auto",
+               folder: Path = JOURNAL_DIR, **options) -> "SessionJournal":
+        folder.mkdir(parents=True, exist_ok=True)
+        label = session_label(subject, started)
+        path = folder / f"{label}.{uuid.uuid4().hex[:8]}.jsonl"
+        handle = open(path, "xb")
+        if not _try_lock(handle):
+            # Unlocked, recovery in another process would take the live session
+            handle.close()
+            path.unlink(missing_ok=True)
+            raise OSError(f"Cannot lock session journal {path.name}")
+        journal = cls(path, handle, label, **options)
+        journal._write({"type": "open", "label": label, "subject": subject,
+                        "started": started.isoformat(timespec="seconds"), "source": source})
+        journal.sync()
+        return journal
+
+    @property
+    def closed(self) -> bool:
+        return self._handle is None
+
+    def _write(self, record: dict) -> None:
+        self._handle.write(_dumps(record))
+        self._handle.flush()
+
+    def append(self, row: dict) -> None:
+        """Journal one mark; O(1), fsynced in batches."""
+        self._write({"type": "mark", "row": row})
+        self.marks += 1
+        self._pending += 1
+        if self._pending >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._handle is None:
+            return
+        os.fsync(self._handle.fileno())
+        self._pending = 0
+        self._synced_at = time.monotonic()
+
+    def close(self) -> None:
+        """Sync and close, leaving the journal for recovery."""
+        if self._handle is not None:
+            self.sync()
+            self._handle.close()
+            self._handle = None
+
+    def discard(self) -> None:
+        """Close and delete the journal without sealing (it stopped being complete)."""
+        try:
+            if self._handle is not None:
+                self._handle.close()
+            self.path.unlink()
+        except OSError:
+            pass
+        self._handle = None
+
+    def seal(self, session_id: Optional[int]) -> None:
+        """Mark the session as stored and delete the journal."""
+        if self._handle is None:
+            return
+        try:
+            self._write({"type": "sealed", "session_id": session_id})
+            self.close()
+            self.path.unlink()
+        except OSError as exc:
+            log_error(f"Could not seal journal {self.path.name}: {exc}")
+            self.discard()
+
+
+def read_journal(path: Path) -> Tuple[Optional[dict], List[dict], bool]:
+    """(header, marked rows, sealed) from a journal; a torn or corrupt tail is ignored."""
+    header: Optional[dict] = None
+    rows: List[dict] = []
+    sealed = False
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # torn write at the crash point
+            kind = record.get("type")
+            if kind == "open":
+                header = record
+            elif kind == "mark":
+                rows.append(record["row"])
+            elif kind == "sealed":
+                sealed = True
+    return header, rows, sealed
+
+
+def _already_stored(store: AttendanceStore, header: dict, rows: List[dict]) -> bool:
+    # Matched on details rather than the label, which add_session may have suffixed
+    started = datetime.fromisoformat(header["started"])
+    return store.find_session(header["subject"], started, header["source"], len(rows)) is not None
+
+
+def recover_journals(folder: Path = JOURNAL_DIR, store: Optional[AttendanceStore] = None,
+                     mirror: bool = ATTENDANCE_CSV_MIRROR) -> List[int]:
+    """Store the sessions of unfinished journals; returns their new session ids.
+
+    With ``mirror`` each recovered session is also written as CSV into the
+    store's own mirror folder.
+    """
+    if not folder.exists():
+        return []
+    recovered: List[int] = []
+    for path in sorted(folder.glob("*.jsonl")):
+        with open(path, "rb") as handle:
+            if not _try_lock(handle):
+                continue  # a running session owns it
+            try:
+                header, rows, sealed = read_journal(path)
+            except OSError as exc:
+                log_error(f"Could not read journal {path.name}: {exc}")
+                continue
+        if header is None:
+            log_error(f"Journal {path.name} has no header; renamed to .corrupt")
+            path.replace(path.with_suffix(".corrupt"))
+            continue
+        if not sealed and rows:
+            store = store or open_store()
+            if _already_stored(store, header, rows):
+                log_info(f"Journal {path.name} was already stored")
+            else:
+                started = datetime.fromisoformat(header["started"])
+                session_id, _ = save_session(header["subject"], rows, started, header["source"],
+                                             mirror=mirror, store=store, label=header["label"])
+                recovered.append(session_id)
+                log_info(f"Recovered {len(rows)} marks for {header['subject']} from {path.name} "
+                         f"(session {session_id})")
+        path.unlink()
+    return recovered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recover unfinished attendance session journals.")
+    parser.add_argument("--folder", type=Path, default=JOURNAL_DIR)
+    args = parser.parse_args()
+    recovered = recover_journals(args.folder)
+    print(f"Recovered {len(recovered)} sessions from {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Cached, append-only access to ``StudentDetails.csv``.
+
+``StudentRegistry`` keeps every row in memory as a typed ``Student`` and
+only re-parses the file when its size or mtime changed since the last read
+(another process or an editor touched it). Lookups such as the name shown
+for a recognized face are dict hits on the enrollment.
+
+Every row of the file is kept, so counts match the CSV: an enrollment that
+is not a number stays a string and a repeated enrollment stays a second
+row (lookups return the last one, as ``dict(zip(...))`` over the CSV did).
+Both are logged when the file is read.
+
+Registering appends one line to the end of the file under a lock (a
+thread lock plus an OS file lock, so other processes appending at the
+same time cannot interleave); the file is never rewritten. A file whose
+last line has no trailing newline gets one before the new row. After its
+own append the registry updates its cache in place rather than reloading.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+from config import STUDENT_CSV
+from utils.logger import log_error
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COLUMNS = ['Enrollment', 'Name', 'Date', 'Time']
+
+
+def enrollment_key(value: object) -> Union[int, str]:
+    """Enrollment as an int when it is a number, else the stripped text."""
+    text = str(value if value is not None else "").strip()
+    return int(text) if text.isdigit() else text
+
+
+@dataclass(frozen=True)
+class Student:
+    enrollment: Union[int, str]
+    name: str
+    date: str = ""
+    time: str = ""
+
+    def as_row(self) -> List[object]:
+        return [self.enrollment, self.name, self.date, self.time]
+
+    @classmethod
+    def from_row(cls, row: Union[dict, list, tuple, "Student"]) -> "Student":
+        """Accept a Student, a ``[enrollment, name, date, time]`` list or a column dict."""
+        if isinstance(row, Student):
+            return row
+        if isinstance(row, dict):
+            values = [row.get(column, "") for column in COLUMNS]
+        else:
+            values = list(row) + [""] * (len(COLUMNS) - len(row))
+        enrollment, name, date, time = values[:4]
+        return cls(enrollment_key(enrollment), str(name or "").strip(), str(date or ""), str(time or ""))
+
+
+@contextmanager
+def _locked(handle) -> Iterator[None]:
+    """Exclusive OS lock on an open file for the duration of the block."""
+    if os.name == "nt":
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class StudentRegistry:
+    """In-memory view of the student CSV, refreshed when the file changes."""
+
+    def __init__(self, path: Path = STUDENT_CSV):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._rows: List[Student] = []
+        self._students: Dict[Union[int, str], Student] = {}
+        self._names: Optional[Dict[Union[int, str], str]] = None
+        self._frame: Optional["pd.DataFrame"] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self) -> None:
+        """Reload the file if it changed since it was last read (call with the lock held)."""
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        rows: List[Student] = []
+        students: Dict[Union[int, str], Student] = {}
+        if signature is not None:
+            try:
+                with open(self.path, newline="", encoding="utf-8") as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        student = Student.from_row(row)
+                        if not isinstance(student.enrollment, int):
+                            log_error(f"{self.path.name} line {reader.line_num}: "
+                                      f"enrollment {student.enrollment!r} is not a number")
+                        elif student.enrollment in students:
+                            log_error(f"{self.path.name} line {reader.line_num}: "
+                                      f"duplicate enrollment {student.enrollment}")
+                        rows.append(student)
+                        students[student.enrollment] = student
+            except (OSError, csv.Error) as exc:
+                log_error(f"Error reading students: {exc}")
+        self._rows = rows
+        self._students = students
+        self._names = self._frame = None
+        self._signature = signature
+
+    def __len__(self) -> int:
+        """Rows in the file (repeated enrollments count once per row)."""
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def __contains__(self, enrollment: object) -> bool:
+        return self.get(enrollment) is not None
+
+    def get(self, enrollment: object) -> Optional[Student]:
+        key = enrollment_key(enrollment)
+        with self._lock:
+            self._refresh()
+            return self._students.get(key)
+
+    def name_for(self, enrollment: object, default: Optional[str] = None) -> Optional[str]:
+        student = self.get(enrollment)
+        return student.name if student else default
+
+    def names(self) -> Dict[Union[int, str], str]:
+        """Enrollment -> name for every student (shared; do not modify)."""
+        with self._lock:
+            self._refresh()
+            if self._names is None:
+                self._names = {e: s.name for e, s in self._students.items()}
+            return self._names
+
+    def students(self) -> List[Student]:
+        """Every row, in file order."""
+        with self._lock:
+            self._refresh()
+            return list(self._rows)
+
+    def to_frame(self) -> "pd.DataFrame":
+        """All students as a typed DataFrame (a copy the caller may modify)."""
+        import pandas as pd
+
+        with self._lock:
+            self._refresh()
+            if self._frame is None:
+                frame = pd.DataFrame([s.as_row() for s in self._rows], columns=COLUMNS)
+                numeric = all(isinstance(s.enrollment, int) for s in self._rows)
+                self._frame = frame.astype({'Enrollment': 'int64' if numeric else object,
+                                            'Name': str, 'Date': str, 'Time': str})
+            return self._frame.copy()
+
+    def append(self, row: Union[dict, list, tuple, Student]) -> Student:
+        """Append one student line; O(1) in the size of the file."""
+        student = Student.from_row(row)
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(student.as_row())
+        with self._lock:
+            if student.enrollment in self._students or not isinstance(student.enrollment, int):
+                log_error(f"Appending student with duplicate or non-numeric enrollment {student.enrollment!r}")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a+b") as f, _locked(f):
+                before = self._stat()
+                end = f.seek(0, os.SEEK_END)
+                data = line.getvalue().encode("utf-8")
+                if end == 0:
+                    data = (",".join(COLUMNS) + "\n").encode("utf-8") + data
+                else:
+                    f.seek(end - 1)
+                    if f.read(1) not in (b"\n", b"\r"):
+                        data = b"\n" + data
+                f.seek(0, os.SEEK_END)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # Extend the cache in place when it was current before the write
+            if before == self._signature and self._signature is not None:
+                self._rows.append(student)
+                self._students[student.enrollment] = student
+                self._names = self._frame = None
+                self._signature = self._stat()
+        return student
+
+
+_registries: Dict[Path, StudentRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def open_registry(path: Path = STUDENT_CSV) -> StudentRegistry:
+    """Process-wide registry for ``path``."""
+    path = Path(path)
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = _registries[path] = StudentRegistry(path)
+        return registry
@@ -3,10 +3,9 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
 
 from config import (
-    ADMIN_USERNAME, ADMIN_PASSWORD, STUDENT_CSV, ATTENDANCE_DIR,
+    ADMIN_USERNAME, ADMIN_PASSWORD, STUDENT_CSV,
     TRAINING_DIR, LABEL_DIR, ensure_data_dirs
 )
 from components.student_registration import register_student
@@ -15,7 +14,10 @@ from components.auto_attendance import mark_auto_attendance
 from components.manual_attendance import mark_manual_attendance
 from components.analytics import compute_summary, daily_counts
 from components.dashboard import Dashboard
-from data.database_handler import read_students, list_csv_files
+from data.attendance_store import open_store
+from data.student_registry import open_registry
+from data.report_export import export_excel_report
+from data.session_journal import recover_journals
 from utils.logger import log_info, log_error
 
 
@@ -29,6 +31,7 @@ class EnhancedDashboard(tk.Tk):
         self.configure(bg="#0a1e3f")
         
         ensure_data_dirs()
+        self._recover_sessions()
         self.admin_logged_in = False
         self.current_user = None
         
@@ -38,6 +41,15 @@ class EnhancedDashboard(tk.Tk):
         self._build_ui()
         log_info("Dashboard launched")
     
+    def _recover_sessions(self):
+        """Store sessions left unsaved by a crash (their journals are still on disk)."""
+        try:
+            recovered = recover_journals()
+            if recovered:
+                log_info(f"Recovered {len(recovered)} unsaved attendance sessions")
+        except Exception as e:
+            log_error(f"Session recovery error: {str(e)}")
+    
     def _build_ui(self):
         """Build the main dashboard UI."""
         # Header
@@ -149,39 +161,22 @@ class EnhancedDashboard(tk.Tk):
     def _get_student_count(self):
         """Get total registered students."""
         try:
-            df = read_students()
-            return len(df) if not df.empty else 0
-        except:
+            return len(open_registry())
+        except Exception:
             return 0
     
     def _get_record_count(self):
         """Get total attendance records."""
         try:
-            total = 0
-            for csv_file in ATTENDANCE_DIR.glob("*.csv"):
-                try:
-                    df = pd.read_csv(csv_file)
-                    total += len(df)
-                except:
-                    pass
-            return total
-        except:
+            return open_store().record_count()
+        except Exception:
             return 0
     
     def _get_today_count(self):
         """Get today's attendance count."""
         try:
-            today = datetime.now().strftime("%Y-%m-%d")
-            total = 0
-            for csv_file in ATTENDANCE_DIR.glob("*.csv"):
-                try:
-                    df = pd.read_csv(csv_file)
-                    today_records = df[df['Date'] == today]
-                    total += len(today_records)
-                except:
-                    pass
-            return total
-        except:
+            return open_store().record_count(datetime.now().strftime("%Y-%m-%d"))
+        except Exception:
             return 0
     
     def _update_activity(self):
@@ -190,19 +185,15 @@ class EnhancedDashboard(tk.Tk):
         self.activity_text.delete("1.0", tk.END)
         
         try:
-            # Get latest CSV files
-            csv_files = sorted(list_csv_files(ATTENDANCE_DIR), reverse=True)[:5]
+            # Latest sessions
+            sessions = open_store().latest_sessions(5)
             
-            if not csv_files:
+            if not sessions:
                 self.activity_text.insert(tk.END, "No recent activity")
             else:
-                for csv_file in csv_files:
-                    try:
-                        df = pd.read_csv(ATTENDANCE_DIR / csv_file)
-                        self.activity_text.insert(tk.END, f"📄 {csv_file}\n")
-                        self.activity_text.insert(tk.END, f"   Records: {len(df)} students\n\n")
-                    except:
-                        pass
+                for session in sessions:
+                    self.activity_text.insert(tk.END, f"📄 {session['label']}\n")
+                    self.activity_text.insert(tk.END, f"   Records: {session['records']} students\n\n")
         except Exception as e:
             self.activity_text.insert(tk.END, f"Error loading activity: {str(e)}")
         
@@ -340,103 +331,7 @@ class EnhancedDashboard(tk.Tk):
             
             if format_choice:  # Excel format
                 try:
-                    import openpyxl
-                    from openpyxl.styles import Font, PatternFill, Alignment
-                    from openpyxl.utils.dataframe import dataframe_to_rows
-                    
-                    # Create a single Excel file with all attendance data
-                    wb = openpyxl.Workbook()
-                    wb.remove(wb.active)  # Remove default sheet
-                    
-                    all_data = []
-                    total_files = 0
-                    
-                    for csv_file in ATTENDANCE_DIR.glob("*.csv"):
-                        try:
-                            df = pd.read_csv(csv_file)
-                            df['Session'] = csv_file.stem  # Add session info
-                            all_data.append(df)
-                            
-                            # Create individual sheet for each session
-                            ws = wb.create_sheet(title=csv_file.stem[:31])  # Excel limit 31 chars
-                            
-                            # Add title
-                            ws.append([f"Attendance Report: {csv_file.stem}"])
-                            ws['A1'].font = Font(bold=True, size=14)
-                            ws.merge_cells('A1:D1')
-                            
-                            # Add headers
-                            ws.append(['Enrollment', 'Name', 'Date', 'Time'])
-                            for cell in ws[2]:
-                                cell.font = Font(bold=True)
-                                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                                cell.font = Font(bold=True, color="FFFFFF")
-                                cell.alignment = Alignment(horizontal='center')
-                            
-                            # Add data
-                            for _, row in df.iterrows():
-                                ws.append([row['Enrollment'], row['Name'], row['Date'], row['Time']])
-                            
-                            # Auto-adjust column widths
-                            for column in ws.columns:
-                                max_length = 0
-                                column_letter = None
-                                for cell in column:
-                                    try:
-                                        if hasattr(cell, 'column_letter'):
-                                            column_letter = cell.column_letter
-                                        if hasattr(cell, 'value') and cell.value:
-                                            if len(str(cell.value)) > max_length:
-                                                max_length = len(str(cell.value))
-                                    except:
-                                        pass
-                                if column_letter:
-                                    adjusted_width = min(max_length + 2, 50)
-                                    ws.column_dimensions[column_letter].width = adjusted_width
-                            
-                            total_files += 1
-                        except Exception as e:
-                            log_error(f"Error processing {csv_file.name}: {e}")
-                    
-                    # Create summary sheet
-                    if all_data:
-                        summary_df = pd.concat(all_data, ignore_index=True)
-                        ws_summary = wb.create_sheet(title="All Records", index=0)
-                        
-                        ws_summary.append(["Complete Attendance Records"])
-                        ws_summary['A1'].font = Font(bold=True, size=14)
-                        ws_summary.merge_cells('A1:E1')
-                        
-                        ws_summary.append(['Enrollment', 'Name', 'Date', 'Time', 'Session'])
-                        for cell in ws_summary[2]:
-                            cell.font = Font(bold=True)
-                            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                            cell.font = Font(bold=True, color="FFFFFF")
-                            cell.alignment = Alignment(horizontal='center')
-                        
-                        for _, row in summary_df.iterrows():
-                            ws_summary.append([row['Enrollment'], row['Name'], row['Date'], row['Time'], row['Session']])
-                        
-                        # Auto-adjust columns
-                        for column in ws_summary.columns:
-                            max_length = 0
-                            column_letter = None
-                            for cell in column:
-                                try:
-                                    if hasattr(cell, 'column_letter'):
-                                        column_letter = cell.column_letter
-                                    if hasattr(cell, 'value') and cell.value:
-                                        if len(str(cell.value)) > max_length:
-                                            max_length = len(str(cell.value))
-                                except:
-                                    pass
-                            if column_letter:
-                                adjusted_width = min(max_length + 2, 50)
-                                ws_summary.column_dimensions[column_letter].width = adjusted_width
-                    
-                    # Save Excel file
-                    excel_path = folder_path / f"Attendance_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                    wb.save(excel_path)
+                    excel_path, total_files = export_excel_report(folder_path)
                     
                     messagebox.showinfo("Success", f"Excel report created!\n{total_files} sessions exported\nFile: {excel_path.name}")
                     log_info(f"Admin {self.current_user} downloaded Excel report with {total_files} sessions")
@@ -445,14 +340,7 @@ class EnhancedDashboard(tk.Tk):
                     messagebox.showerror("Missing Package", "openpyxl is required for Excel export.\nInstall with: pip install openpyxl")
                     return
             else:  # CSV format
-                total_files = 0
-                for csv_file in ATTENDANCE_DIR.glob("*.csv"):
-                    try:
-                        import shutil
-                        shutil.copy(csv_file, folder_path / csv_file.name)
-                        total_files += 1
-                    except Exception as e:
-                        messagebox.showerror("Copy Error", f"Could not copy {csv_file.name}: {str(e)}")
+                total_files = open_store().export_csv(folder_path)
                 
                 messagebox.showinfo("Success", f"Downloaded {total_files} CSV files!")
                 log_info(f"Admin {self.current_user} downloaded {total_files} CSV reports")
@@ -28,7 +28,6 @@ from config import (
     ADMIN_PASSWORD,
     ADMIN_USERNAME,
     ATTENDANCE_DIR,
-    CASCADE_PATH,
     MODEL_PATH,
     STUDENT_CSV,
     TRAINING_DIR,
@@ -36,12 +35,20 @@ from config import (
     ensure_student_csv,
 )
 from components.admin_panel import admin_panel as admin_panel_component
+from components.face_engine import FaceEngine
+from components.face_samples import open_writer
+from components.resources import resources
+from components.subject_models import model_for_subject
+from data.attendance_store import open_store, save_session
+from data.session_journal import recover_journals
+from data.student_registry import open_registry
 from utils.validators import is_digit_input
 from utils.logger import log_info
 
 # Ensure required folders and base CSV exist
 ensure_data_dirs()
 ensure_student_csv()
+recover_journals()
 log_info("Main attendance UI started")
 
 # Window is our Main frame of system
@@ -197,16 +204,31 @@ def manually_fill():
                     ENR_ENTRY.delete(first=0, last=22)
                     STUDENT_ENTRY.delete(first=0, last=22)
 
+            stored = {"session": None, "rows": 0}
+
+            def store_manual_rows(records):
+                # records are (ID, ENROLLMENT, NAME, DATE, TIME); only rows not stored yet are added
+                started = datetime.datetime.fromtimestamp(ts)
+                rows = [{'Enrollment': r[1], 'Name': r[2], 'Date': started.strftime('%Y-%m-%d'), 'Time': r[4]}
+                        for r in records[stored["rows"]:]]
+                if stored["session"] is None:
+                    stored["session"], _ = save_session(subb, rows, started, source="manual", mirror=False)
+                elif rows:
+                    open_store().add_marks(stored["session"], rows)
+                stored["rows"] = len(records)
+
             def create_csv():
                 import csv
                 cursor.execute("select * from " + DB_table_name + ";")
+                records = list(cursor.fetchall())
+                store_manual_rows(records)
                 csv_name = str(ATTENDANCE_DIR / f"Manually_Attendance_{DB_table_name}.csv")
                 
                 with open(csv_name, "w") as csv_file:
                     csv_writer = csv.writer(csv_file)
                     csv_writer.writerow(
                         [i[0] for i in cursor.description])  # write headers
-                    csv_writer.writerows(cursor)
+                    csv_writer.writerows(records)
                     O = "CSV created Successfully"
                     Notifi.configure(text=O, bg="Green", fg="white",
                                      width=33, font=('times', 19, 'bold'))
@@ -339,20 +361,22 @@ def take_img():
     else:
         try:
             cam = cv2.VideoCapture(0)
-            detector = cv2.CascadeClassifier(str(CASCADE_PATH))
+            detector = resources.cascade()
             Enrollment = txt.get()
             Name = txt2.get()
+            writer = open_writer(Name, Enrollment)
             sampleNum = 0
             while (True):
                 ret, img = cam.read()
                 gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                faces = detector.detectMultiScale(gray, 1.3, 5)
+                with detector.lock:
+                    faces = detector.value.detectMultiScale(gray, 1.3, 5)
                 for (x, y, w, h) in faces:
                     cv2.rectangle(img, (x, y), (x + w, y + h), (255, 0, 0), 2)
                     # incrementing sample number
                     sampleNum = sampleNum + 1
-                    # saving the captured face in the dataset folder
-                    cv2.imwrite(str(TRAINING_DIR / f"{Name}.{Enrollment}.{sampleNum}.jpg"), gray)
+                    # saving the normalized face crop in the dataset folder
+                    writer.add(gray, (x, y, w, h), sampleNum)
                     print("Images Saved for Enrollment :")
                     cv2.imshow('Frame', img)
                 # wait for 100 miliseconds
@@ -366,14 +390,12 @@ def take_img():
 
             cam.release()
             cv2.destroyAllWindows()
+            writer.close()
             ts = time.time()
             Date = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
             Time = datetime.datetime.fromtimestamp(ts).strftime('%H:%M:%S')
             row = [Enrollment, Name, Date, Time]
-            with open('StudentDetails.csv', 'a+') as csvFile:
-                writer = csv.writer(csvFile, delimiter=',')
-                writer.writerow(row)
-                csvFile.close()
+            open_registry().append(row)
             res = "Images Saved for Enrollment : " + Enrollment + " Name : " + Name
             Notification.configure(
                 text=res, bg="SpringGreen3", width=50, font=('times', 18, 'bold'))
@@ -394,30 +416,26 @@ def subjectchoose():
             if sub == '':
                 err_screen1()
             else:
-                recognizer = cv2.face.LBPHFaceRecognizer_create()  # cv2.createLBPHFaceRecognizer()
-                try:
-                    recognizer.read(str(MODEL_PATH))
-                except:
+                engine = FaceEngine(model_path=model_for_subject(sub))
+                if not engine.model_loaded:
                     e = 'Model not found,Please train model'
                     Notifica.configure(
                         text=e, bg="red", fg="black", width=33, font=('times', 15, 'bold'))
                     Notifica.place(x=20, y=250)
 
-                harcascadePath = str(CASCADE_PATH)
-                faceCascade = cv2.CascadeClassifier(harcascadePath)
-                df = pd.read_csv(str(STUDENT_CSV))
+                students = open_registry()
                 cam = cv2.VideoCapture(0)
                 font = cv2.FONT_HERSHEY_SIMPLEX
                 col_names = ['Enrollment', 'Name', 'Date', 'Time']
                 attendance = pd.DataFrame(columns=col_names)
+                global Id
                 while True:
                     ret, im = cam.read()
-                    gray = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
-                    faces = faceCascade.detectMultiScale(gray, 1.2, 5)
-                    for (x, y, w, h) in faces:
-                        global Id
-
-                        Id, conf = recognizer.predict(gray[y:y + h, x:x + w])
+                    gray = engine.to_gray(im)
+                    faces = engine.detect_faces(gray)
+                    # one grayscale frame, all boxes predicted in a single call
+                    predictions = engine.recognize_faces(gray, faces)
+                    for (x, y, w, h), (Id, conf) in zip(faces, predictions):
                         if (conf < 70):
                             print(conf)
                             global Subject
@@ -430,7 +448,7 @@ def subjectchoose():
                                 ts).strftime('%Y-%m-%d')
                             timeStamp = datetime.datetime.fromtimestamp(
                                 ts).strftime('%H:%M:%S')
-                            aa = df.loc[df['Enrollment'] == Id]['Name'].values
+                            aa = students.name_for(Id, "")
                             global tt
                             tt = str(Id) + "-" + aa
                             En = '15624031' + str(Id)
@@ -468,6 +486,8 @@ def subjectchoose():
                     ['Enrollment'], keep='first')
                 print(attendance)
                 attendance.to_csv(fileName, index=False)
+                open_store().add_session(Subject, attendance.to_dict("records"),
+                                         datetime.datetime.fromtimestamp(ts), "auto", f"{Subject}_{date}_{Hour}-{Minute}-{Second}")
 
                 # Create table for Attendance
                 date_for_DB = datetime.datetime.fromtimestamp(
@@ -658,55 +678,33 @@ def admin_panel():
 
 # For train the model
 def trainimg():
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-    global detector
-    detector = cv2.CascadeClassifier(str(CASCADE_PATH))
-    try:
-        global faces, Id
-        faces, Id = getImagesAndLabels(str(TRAINING_DIR))
-    except Exception as e:
-        l = 'please make "TrainingImage" folder & put Images'
-        Notification.configure(text=l, bg="SpringGreen3",
-                               width=50, font=('times', 18, 'bold'))
-        Notification.place(x=350, y=400)
-
-    recognizer.train(faces, np.array(Id))
-    try:
-        recognizer.save(str(MODEL_PATH))
-    except Exception as e:
-        q = 'Please make "TrainingImageLabel" folder'
-        Notification.configure(text=q, bg="SpringGreen3",
-                               width=50, font=('times', 18, 'bold'))
-        Notification.place(x=350, y=400)
-
-    res = "Model Trained"  # +",".join(str(f) for f in Id)
-    Notification.configure(text=res, bg="olive drab",
+    from components.model_store import TrainingJob
+    # Only new or changed images are read; see components/model_store.py.
+    # Single process: this script builds its window at import time, so
+    # spawned pool workers would each open a copy of it.
+    job = TrainingJob(workers=1).start()
+    Notification.configure(text="Training in background...", bg="SpringGreen3",
                            width=50, font=('times', 18, 'bold'))
     Notification.place(x=250, y=400)
 
-
-def getImagesAndLabels(path):
-    imagePaths = [os.path.join(path, f) for f in os.listdir(path)]
-    # create empth face list
-    faceSamples = []
-    # create empty ID list
-    Ids = []
-    # now looping through all the image paths and loading the Ids and the images
-    for imagePath in imagePaths:
-        # loading the image and converting it to gray scale
-        pilImage = Image.open(imagePath).convert('L')
-        # Now we are converting the PIL image into numpy array
-        imageNp = np.array(pilImage, 'uint8')
-        # getting the Id from the image
-
-        Id = int(os.path.split(imagePath)[-1].split(".")[1])
-        # extract the face from the training image sample
-        faces = detector.detectMultiScale(imageNp)
-        # If a face is there then append that in the list as well as Id of it
-        for (x, y, w, h) in faces:
-            faceSamples.append(imageNp[y:y + h, x:x + w])
-            Ids.append(Id)
-    return faceSamples, Ids
+    def poll():
+        while not job.events.empty():
+            kind, payload = job.events.get()
+            if kind == "progress":
+                continue
+            if kind == "done":
+                res = "Model Trained" if payload.changed else "Model already up to date"
+                Notification.configure(text=res, bg="olive drab",
+                                       width=50, font=('times', 18, 'bold'))
+                Notification.place(x=250, y=400)
+            else:
+                l = 'please make "TrainingImage" folder & put Images'
+                Notification.configure(text=l, bg="SpringGreen3",
+                                       width=50, font=('times', 18, 'bold'))
+                Notification.place(x=350, y=400)
+            return
+        window.after(200, poll)
+    window.after(200, poll)
 
 
 window.grid_rowconfigure(0, weight=1)
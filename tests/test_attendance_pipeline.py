@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from components.attendance_pipeline import DropOldestQueue  # noqa: E402
+
+
+def test_put_drops_oldest_when_full():
+    q = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        q.put(item)
+    assert q.dropped == 3
+    assert q.get(timeout=0) == 3
+    assert q.get(timeout=0) == 4
+    assert q.get(timeout=0) is None
+
+
+def test_maxsize_is_at_least_one():
+    q = DropOldestQueue(maxsize=0)
+    q.put("a")
+    q.put("b")
+    assert q.dropped == 1
+    assert q.get(timeout=0) == "b"
+
+
+def test_get_latest_discards_older_items():
+    q = DropOldestQueue(maxsize=4)
+    for item in range(3):
+        q.put(item)
+    assert q.get_latest(timeout=0) == 2
+    assert q.dropped == 2
+    assert q.get_latest(timeout=0) is None
+
+
+def test_get_times_out_when_empty():
+    q = DropOldestQueue()
+    start = time.monotonic()
+    assert q.get(timeout=0.05) is None
+    assert time.monotonic() - start < 1.0
+
+
+def test_get_wakes_on_put_from_another_thread():
+    q = DropOldestQueue()
+    timer = threading.Timer(0.05, q.put, args=("frame",))
+    timer.start()
+    try:
+        assert q.get(timeout=5) == "frame"
+    finally:
+        timer.cancel()
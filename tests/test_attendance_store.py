@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from data.attendance_store import AttendanceStore, save_session
+
+AGGREGATE_QUERIES = {
+    "totals": "SELECT name, value FROM agg_totals ORDER BY name",
+    "daily": "SELECT date, sessions, records FROM agg_daily ORDER BY date",
+    "subject": "SELECT subject, sessions, records FROM agg_subject ORDER BY subject",
+    "student": "SELECT enrollment, records, first_date, last_date FROM agg_student ORDER BY CAST(enrollment AS TEXT)",
+}
+
+
+def _aggregates(store: AttendanceStore) -> dict:
+    conn = store._connect()
+    return {name: conn.execute(sql).fetchall() for name, sql in AGGREGATE_QUERIES.items()}
+
+
+def _row(enrollment, name, date, time="09:00:00"):
+    return {"Enrollment": enrollment, "Name": name, "Date": date, "Time": time}
+
+
+def _fill(store: AttendanceStore) -> None:
+    store.add_session("Maths", [_row(101, "Asha", "2024-03-04"), _row(102, "Ravi", "2024-03-04")],
+                      datetime(2024, 3, 4, 9, 0))
+    # Same label again: stored with a -2 suffix
+    store.add_session("Maths", [_row(101, "Asha", "2024-03-04")], datetime(2024, 3, 4, 9, 0))
+    # Runs past midnight: a mark dated after the session's own date
+    store.add_session("Physics", [_row(103, "Meera", "2024-03-04", "23:59:00"),
+                                  _row(101, "Asha", "2024-03-05", "00:01:00")],
+                      datetime(2024, 3, 4, 23, 50))
+    store.add_session("Physics", [], datetime(2024, 3, 6, 10, 0))
+    store.add_session("Chemistry", [_row("A-7", "Guest", "2024-03-07")], datetime(2024, 3, 7, 11, 0))
+
+
+def test_incremental_aggregates_match_rebuild(tmp_path):
+    store = AttendanceStore(tmp_path / "attendance.db")
+    _fill(store)
+    incremental = _aggregates(store)
+    store.rebuild_aggregates()
+    assert _aggregates(store) == incremental
+
+
+def test_add_marks_aggregates_match_rebuild(tmp_path):
+    store = AttendanceStore(tmp_path / "attendance.db")
+    _fill(store)
+    started = datetime(2024, 3, 8, 14, 0)
+    session_id, csv_path = save_session("Biology", [_row(101, "Asha", "2024-03-08")], started,
+                                        source="manual", mirror=False, store=store)
+    assert csv_path is None
+    store.add_marks(session_id, [_row(104, "Kiran", "2024-03-08"), _row(102, "Ravi", "2024-03-08")])
+
+    incremental = _aggregates(store)
+    store.rebuild_aggregates()
+    assert _aggregates(store) == incremental
+    assert store.label(session_id) == "Biology_2024-03-08_14-00-00"
+    assert len(store.session_rows(session_id)) == 3
+    assert store.latest_sessions(1)[0]["source"] == "manual"
+    assert store.latest_sessions(1)[0]["records"] == 3
+
+
+def test_readers(tmp_path):
+    store = AttendanceStore(tmp_path / "attendance.db")
+    _fill(store)
+    assert store.totals() == {"sessions": 5, "records": 6, "students": 4}
+    assert store.record_count("2024-03-04") == 4
+    assert store.daily_totals() == [("2024-03-07", 1), ("2024-03-05", 1), ("2024-03-04", 4)]
+    assert store.daily_totals(days=1) == [("2024-03-07", 1)]
+    assert store.per_subject() == {"Maths": 3, "Physics": 2, "Chemistry": 1}
+    assert store.student_summary(101) == {"records": 3, "first_date": "2024-03-04", "last_date": "2024-03-05"}
+    assert store.student_summary("A-7")["records"] == 1
+    assert store.student_summary(999) is None
+
+
+def test_reopening_keeps_aggregates(tmp_path):
+    path = tmp_path / "attendance.db"
+    store = AttendanceStore(path)
+    _fill(store)
+    before = _aggregates(store)
+    store.close()
+    assert _aggregates(AttendanceStore(path)) == before
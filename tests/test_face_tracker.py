@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from components.face_engine import FaceTracker, Track  # noqa: E402
+
+
+def _track() -> Track:
+    return Track(1, (0, 0, 50, 50))
+
+
+def _tracker(**options) -> FaceTracker:
+    options = {"match_threshold": 70, "min_votes": 3, "min_share": 0.6,
+               "vote_aggregate": "median", "max_attempts": 6, **options}
+    return FaceTracker(**options)
+
+
+def test_commits_after_min_votes():
+    tracker, track = _tracker(), _track()
+    tracker.record(track, (7, 50.0))
+    tracker.record(track, (7, 60.0))
+    assert not track.decided
+    tracker.record(track, (7, 55.0))
+    assert track.matched
+    assert track.identity == (7, 55.0)
+
+
+def test_waits_for_min_share():
+    tracker, track = _tracker(min_votes=2, min_share=0.75), _track()
+    for prediction in [(7, 40.0), (8, 40.0), (7, 40.0)]:
+        tracker.record(track, prediction)
+    assert not track.decided  # 2 of 3 attempts is below 75%
+    tracker.record(track, (7, 40.0))
+    assert track.identity == (7, 40.0)
+
+
+def test_unknown_predictions_count_as_attempts_only():
+    tracker, track = _tracker(), _track()
+    tracker.record(track, (-1, 999.0))
+    tracker.record(track, (-1, 999.0))
+    assert track.votes == {}
+    for _ in range(3):
+        tracker.record(track, (7, 50.0))
+    assert track.identity == (7, 50.0)  # 3 of 5 attempts meets 60%
+
+
+def test_rejects_when_confidence_stays_above_threshold():
+    tracker, track = _tracker(), _track()
+    for _ in range(5):
+        tracker.record(track, (7, 80.0))
+    assert not track.decided
+    tracker.record(track, (7, 80.0))
+    assert track.rejected and not track.matched
+    assert track.prediction == (7, 80.0)
+
+
+@pytest.mark.parametrize("aggregate, matched", [("median", True), ("min", True), ("max", False)])
+def test_vote_aggregate(aggregate, matched):
+    tracker, track = _tracker(vote_aggregate=aggregate), _track()
+    for confidence in (60.0, 90.0, 65.0):
+        tracker.record(track, (7, confidence))
+    assert track.matched is matched
+
+
+def test_unknown_aggregate_is_rejected():
+    with pytest.raises(ValueError):
+        FaceTracker(vote_aggregate="mode")
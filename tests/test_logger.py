@@ -0,0 +1,22 @@
+from utils.logger import _LogWriter
+
+
+def test_close_flushes_and_writer_restarts(tmp_path):
+    writer = _LogWriter(tmp_path / "app.log")
+    writer.write("first\n")
+    writer.close()
+    assert (tmp_path / "app.log").read_text(encoding="utf-8") == "first\n"
+    writer.write("second\n")
+    writer.close()
+    assert (tmp_path / "app.log").read_text(encoding="utf-8") == "first\nsecond\n"
+
+
+def test_close_writes_lines_left_behind_by_the_writer(tmp_path):
+    writer = _LogWriter(tmp_path / "app.log")
+    writer.write("first\n")
+    writer.close()
+    # A line queued after the writer drained its sentinel and exited
+    writer._queue.put("late\n")
+    writer.close()
+    assert (tmp_path / "app.log").read_text(encoding="utf-8") == "first\nlate\n"
+    assert writer._handle is None
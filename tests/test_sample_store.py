@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data.sample_store import SampleStore  # noqa: E402
+
+SIZE = (8, 6)
+
+
+def _crops(value, count=3):
+    return [np.full((SIZE[1], SIZE[0]), value, np.uint8) for _ in range(count)]
+
+
+def test_overlapping_writers_do_not_overwrite_each_other(tmp_path):
+    first = SampleStore(tmp_path, SIZE)
+    second = SampleStore(tmp_path, SIZE)  # both opened before either registration saved
+    assert first.append(101, _crops(1), "Asha") == (0, 3)
+    assert second.append(102, _crops(2, 2), "Ravi") == (3, 5)
+
+    store = SampleStore(tmp_path, SIZE)
+    assert len(store) == 5
+    assert sorted(store.enrollments()) == [101, 102]
+    assert (store.student(101) == 1).all() and (store.student(102) == 2).all()
+
+
+def test_remove_keeps_students_added_by_another_writer(tmp_path):
+    first = SampleStore(tmp_path, SIZE)
+    second = SampleStore(tmp_path, SIZE)
+    first.append(101, _crops(1))
+    second.append(102, _crops(2))
+    assert first.remove(102)
+    assert SampleStore(tmp_path, SIZE).enrollments() == [101]
+
+
+def test_compact_drops_removed_rows(tmp_path):
+    store = SampleStore(tmp_path, SIZE)
+    store.append(101, _crops(1))
+    store.append(102, _crops(2))
+    store.append(101, _crops(3, 1))
+    store.remove(102)
+    store.compact()
+    assert len(store) == 4
+    assert store.runs(101) == [[0, 4]]
+    assert list(store.student(101)[:, 0, 0]) == [1, 1, 1, 3]
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+from data.attendance_store import AttendanceStore, save_session
+from data.session_journal import SessionJournal, read_journal, recover_journals
+
+STARTED = datetime(2024, 3, 4, 9, 30, 0)
+ROWS = [
+    {"Enrollment": 101, "Name": "Asha", "Date": "2024-03-04", "Time": "09:31:00"},
+    {"Enrollment": 102, "Name": "Ravi", "Date": "2024-03-04", "Time": "09:32:00"},
+]
+
+
+def _journal(folder, rows=ROWS) -> SessionJournal:
+    journal = SessionJournal.create("Maths", STARTED, folder=folder)
+    for row in rows:
+        journal.append(row)
+    return journal
+
+
+def test_recovers_unsealed_journal(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "attendance.db")
+    journal = _journal(folder)
+    journal.close()
+
+    recovered = recover_journals(folder, store, mirror=False)
+    assert len(recovered) == 1
+    assert store.session_rows(recovered[0]) == ROWS
+    assert store.label(recovered[0]) == journal.label
+    assert not journal.path.exists()
+
+
+def test_ignores_torn_last_line(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "attendance.db")
+    journal = _journal(folder)
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b'{"type":"mark","row":{"Enrollment":103,"Na')
+
+    header, rows, sealed = read_journal(journal.path)
+    assert header["subject"] == "Maths" and rows == ROWS and not sealed
+    [session_id] = recover_journals(folder, store, mirror=False)
+    assert store.session_rows(session_id) == ROWS
+
+
+def test_skips_journal_of_running_session(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "attendance.db")
+    journal = _journal(folder)
+    try:
+        assert recover_journals(folder, store, mirror=False) == []
+        assert journal.path.exists()
+        assert store.session_count() == 0
+    finally:
+        journal.close()
+    assert len(recover_journals(folder, store, mirror=False)) == 1
+
+
+def test_crash_between_commit_and_seal(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "attendance.db")
+    # Another session of the subject in the same second takes the plain label
+    store.add_session("Maths", ROWS[:1], STARTED, source="manual")
+    journal = _journal(folder)
+    session_id, _ = save_session("Maths", ROWS, STARTED, source="auto", mirror=False,
+                                 store=store, label=journal.label)
+    assert store.label(session_id) == f"{journal.label}-2"
+    journal.close()  # the process dies before seal()
+
+    assert recover_journals(folder, store, mirror=False) == []
+    assert store.session_count() == 2
+    assert not journal.path.exists()
+
+
+def test_sealed_and_headerless_journals(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "attendance.db")
+    sealed = _journal(folder)
+    sealed.seal(1)
+    assert not sealed.path.exists()
+    broken = folder / "broken.jsonl"
+    broken.write_bytes(b'{"type":"mark","row":{}}\n')
+
+    assert recover_journals(folder, store, mirror=False) == []
+    assert not broken.exists() and broken.with_suffix(".corrupt").exists()
+    assert store.session_count() == 0
+
+
+def test_mirror_goes_next_to_the_store(tmp_path):
+    folder, store = tmp_path / "Journal", AttendanceStore(tmp_path / "db" / "attendance.db")
+    journal = _journal(folder)
+    journal.close()
+    recover_journals(folder, store, mirror=True)
+    assert (tmp_path / "db" / "Attendance" / f"{journal.label}.csv").exists()
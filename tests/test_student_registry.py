@@ -0,0 +1,66 @@
+import os
+
+from data.student_registry import Student, StudentRegistry
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+
+
+def test_append_creates_file_with_header(tmp_path):
+    path = tmp_path / "StudentDetails.csv"
+    registry = StudentRegistry(path)
+    assert len(registry) == 0
+    registry.append([101, "Asha", "2024-01-02", "09:00:00"])
+    assert path.read_text(encoding="utf-8") == "Enrollment,Name,Date,Time\n101,Asha,2024-01-02,09:00:00\n"
+    assert registry.name_for(101) == "Asha"
+    assert registry.name_for("101") == "Asha"
+
+
+def test_append_updates_cache_in_place(tmp_path):
+    path = tmp_path / "StudentDetails.csv"
+    _write(path, "Enrollment,Name,Date,Time\n101,Asha,,\n")
+    registry = StudentRegistry(path)
+    names = registry.names()
+    registry.append({"Enrollment": "102", "Name": " Ravi "})
+    assert registry.get(102) == Student(102, "Ravi")
+    assert registry.names() == {101: "Asha", 102: "Ravi"}
+    assert registry.names() is not names
+
+
+def test_append_adds_missing_trailing_newline(tmp_path):
+    path = tmp_path / "StudentDetails.csv"
+    _write(path, "Enrollment,Name,Date,Time\n101,Asha,,")
+    StudentRegistry(path).append([102, "Ravi"])
+    assert path.read_text(encoding="utf-8").splitlines()[-2:] == ["101,Asha,,", "102,Ravi,,"]
+
+
+def test_reloads_after_external_change(tmp_path):
+    path = tmp_path / "StudentDetails.csv"
+    _write(path, "Enrollment,Name,Date,Time\n101,Asha,,\n")
+    registry = StudentRegistry(path)
+    other = StudentRegistry(path)
+    assert len(registry) == len(other) == 1
+
+    other.append([102, "Ravi"])
+    assert registry.name_for(102) == "Ravi"
+
+    _write(path, "Enrollment,Name,Date,Time\n101,Asha K,,\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.name_for(101) == "Asha K"
+    assert 102 not in registry
+
+
+def test_keeps_duplicate_and_non_numeric_rows(tmp_path):
+    path = tmp_path / "StudentDetails.csv"
+    _write(path, "Enrollment,Name,Date,Time\n101,Asha,,\nA-7,Guest,,\n101,Asha Rao,,\n")
+    registry = StudentRegistry(path)
+    assert len(registry) == 3
+    assert [s.enrollment for s in registry.students()] == [101, "A-7", 101]
+    assert registry.name_for(101) == "Asha Rao"
+    assert registry.name_for("A-7") == "Guest"
+
+    registry.append([101, "Asha R"])
+    assert len(registry) == 4
+    assert registry.name_for(101) == "Asha R"
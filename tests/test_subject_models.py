@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from components.subject_models import load_rosters, model_for_subject  # noqa: E402
+
+
+def test_load_rosters_resolves_aliases_and_skips_bad_entries(tmp_path):
+    path = tmp_path / "rosters.json"
+    path.write_text(json.dumps({"CSE-A": [1002, "1001", "CS-12", None], "Maths": "CSE-A",
+                                "Loop": "Loop", "Physics": [1004]}), encoding="utf-8")
+    assert load_rosters(path) == {"CSE-A": [1001, 1002], "Maths": [1001, 1002], "Physics": [1004]}
+
+
+def test_unreadable_rosters_are_empty(tmp_path):
+    path = tmp_path / "rosters.json"
+    path.write_text("[1, 2]", encoding="utf-8")
+    assert load_rosters(path) == {}
+    assert load_rosters(tmp_path / "missing.json") == {}
+
+
+def test_subject_without_roster_uses_global_model(tmp_path):
+    model_path = tmp_path / "Trainner.yml"
+    assert model_for_subject("History", model_path, rosters={"Maths": [1001]}) == model_path
@@ -1,20 +1,186 @@
+"""Append-only application logger with background flushing and rotation.
+
+Log lines are queued by ``log_info``/``log_error`` and written by a single
+daemon thread that keeps ``logs/app.log`` open in append mode, so callers on
+the camera loop never wait on disk. The active file is rotated when it grows
+past ``MAX_LOG_BYTES`` or when the day changes; rotated segments are gzipped
+and only the newest ``KEEP_SEGMENTS`` are kept.
+"""
 from __future__ import annotations
 
+import atexit
 import datetime as _dt
+import gzip
+import queue
+import shutil
+import threading
 from pathlib import Path
+from typing import List, Optional, TextIO
 
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "app.log"
 
+MAX_LOG_BYTES = 5 * 1024 * 1024  # rotate after 5 MB
+ROTATE_DAILY = True  # also rotate when the calendar day changes
+KEEP_SEGMENTS = 14  # gzipped segments to keep
 
-def log_info(message: str) -> None:
+
+class _LogWriter:
+    """Single background thread owning the append handle of the log file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._handle: Optional[TextIO] = None
+        self._size = 0
+        self._day = _dt.date.today()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, line: str) -> None:
+        """Queue a line for writing, starting the writer thread on first use."""
+        # Under the lock so a line cannot slip in between close() draining the queue and returning
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="app-log-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(line)
+
+    def close(self) -> None:
+        """Flush pending lines and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is not None and thread.is_alive():
+                self._queue.put(None)
+                thread.join(timeout=5)
+                if thread.is_alive():
+                    return  # still writing; it closes the handle itself when done
+            # Lines the writer never picked up (queued after it had drained and exited)
+            lines = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    lines.append(item)
+            if lines:
+                self._write_block(lines)
+            self._close_handle()
+
+    def _open(self) -> TextIO:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, "a", encoding="utf-8")
+            self._size = self._handle.tell()
+            if self._size and ROTATE_DAILY:
+                mtime = _dt.date.fromtimestamp(self.path.stat().st_mtime)
+                if mtime != _dt.date.today():
+                    self._day = mtime
+        return self._handle
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+
+    def _should_rotate(self, pending: int) -> bool:
+        if self._size == 0:
+            return False
+        if self._size + pending > MAX_LOG_BYTES:
+            return True
+        return ROTATE_DAILY and _dt.date.today() != self._day
+
+    def _rotate(self) -> None:
+        """Move the active file aside, gzip it and prune old segments."""
+        self._close_handle()
+        stamp = _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+        segment = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+        counter = 1
+        while segment.exists() or segment.with_name(segment.name + ".gz").exists():
+            segment = self.path.with_name(f"{self.path.stem}-{stamp}-{counter}{self.path.suffix}")
+            counter += 1
+        try:
+            self.path.replace(segment)
+            with open(segment, "rb") as src, gzip.open(segment.with_name(segment.name + ".gz"), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            segment.unlink()
+        except OSError:
+            pass
+
+        segments = sorted(self.path.parent.glob(f"{self.path.stem}-*{self.path.suffix}.gz"))
+        for old in segments[:-KEEP_SEGMENTS] if KEEP_SEGMENTS > 0 else segments:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+        self._day = _dt.date.today()
+        self._size = 0
+
+    def _write_block(self, lines: List[str]) -> None:
+        block = "".join(lines)
+        pending = len(block.encode("utf-8"))
+        try:
+            handle = self._open()
+            if self._should_rotate(pending):
+                self._rotate()
+                handle = self._open()
+            handle.write(block)
+            handle.flush()
+            self._size += pending
+        except OSError:
+            self._close_handle()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+
+            # Drain everything already queued and write it as one block.
+            lines = []
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    lines.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not lines:
+                continue
+
+            self._write_block(lines)
+        self._close_handle()
+
+
+_writer = _LogWriter(LOG_FILE)
+atexit.register(_writer.close)
+
+
+def _write(level: str, message: str) -> None:
     timestamp = _dt.datetime.now().isoformat(timespec="seconds")
-    line = f"[{timestamp}] INFO: {message}\n"
-    LOG_FILE.write_text(LOG_FILE.read_text(encoding="utf-8") + line if LOG_FILE.exists() else line, encoding="utf-8")
+    _writer.write(f"[{timestamp}] {level}: {message}\n")
+
+
+def log_info(message: str) -> None:
+    _write("INFO", message)
 
 
 def log_error(message: str) -> None:
-    timestamp = _dt.datetime.now().isoformat(timespec="seconds")
-    line = f"[{timestamp}] ERROR: {message}\n"
-    LOG_FILE.write_text(LOG_FILE.read_text(encoding="utf-8") + line if LOG_FILE.exists() else line, encoding="utf-8")
+    _write("ERROR", message)
+
+
+def set_log_file(path: Path) -> None:
+    """Send further log lines to ``path`` instead of ``logs/app.log``."""
+    _writer.close()
+    _writer.path = path
+
+
+def flush_logs() -> None:
+    """Block until every queued line is on disk (used before process exit)."""
+    _writer.close()
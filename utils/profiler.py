@@ -0,0 +1,156 @@
+"""Lightweight per-stage timing for the camera loops."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional
+
+from config import PROFILE_DIR
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+class FrameProfiler:
+    """Record stage spans per frame and keep rolling latency percentiles.
+
+    Usage inside a capture loop::
+
+        with profiler.span("capture"):
+            ret, frame = cap.read()
+        ...
+        profiler.end_frame()
+
+    Samples are kept in fixed-size windows so the percentiles follow the
+    recent behaviour of the session, while totals cover the whole session.
+    """
+
+    def __init__(self, name: str = "session", window: int = 300, enabled: bool = True):
+        self.name = name
+        self.window = window
+        self.enabled = enabled
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._frame_times: Deque[float] = deque(maxlen=window)
+        self._frames = 0
+        self._started = time.perf_counter()
+        self._last_frame: Optional[float] = None
+        self._lock = threading.Lock()
+        self._overlay_cache: List[str] = []
+        self._overlay_at = 0.0
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one sample of ``stage``."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Record an externally measured sample for ``stage``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._totals[stage] = self._totals.get(stage, 0.0) + seconds
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def end_frame(self) -> None:
+        """Mark the end of one loop iteration (drives the FPS figure)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_frame is not None:
+                self._frame_times.append(now - self._last_frame)
+            self._last_frame = now
+            self._frames += 1
+
+    def fps(self) -> float:
+        """Frames per second over the rolling window."""
+        with self._lock:
+            total = sum(self._frame_times)
+            return len(self._frame_times) / total if total > 0 else 0.0
+
+    def stage_stats(self, stage: str) -> Dict[str, float]:
+        """Rolling p50/p95/p99 plus session mean for one stage, in milliseconds."""
+        with self._lock:
+            values = sorted(self._samples.get(stage, ()))
+            count = self._counts.get(stage, 0)
+            total = self._totals.get(stage, 0.0)
+        return {
+            "count": count,
+            "mean_ms": (total / count * 1000.0) if count else 0.0,
+            "p50_ms": _percentile(values, 50) * 1000.0,
+            "p95_ms": _percentile(values, 95) * 1000.0,
+            "p99_ms": _percentile(values, 99) * 1000.0,
+        }
+
+    def summary(self) -> Dict[str, object]:
+        """Snapshot of all stages, suitable for JSON output."""
+        with self._lock:
+            stages = list(self._samples)
+            frames = self._frames
+        elapsed = time.perf_counter() - self._started
+        return {
+            "name": self.name,
+            "frames": frames,
+            "elapsed_s": round(elapsed, 3),
+            "avg_fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            "rolling_fps": round(self.fps(), 2),
+            "stages": {
+                stage: {key: round(val, 3) for key, val in self.stage_stats(stage).items()}
+                for stage in stages
+            },
+        }
+
+    def draw_overlay(self, frame, refresh: float = 0.5):
+        """Draw FPS and per-stage p50/p95 timings in the top-left corner."""
+        if not self.enabled:
+            return frame
+        import cv2
+
+        now = time.perf_counter()
+        if now - self._overlay_at >= refresh:
+            lines = [f"FPS {self.fps():.1f}"]
+            for stage in list(self._samples):
+                stats = self.stage_stats(stage)
+                lines.append(f"{stage:<10} p50 {stats['p50_ms']:6.1f}ms  p95 {stats['p95_ms']:6.1f}ms")
+            self._overlay_cache = lines
+            self._overlay_at = now
+
+        for idx, text in enumerate(self._overlay_cache):
+            y = 20 + idx * 18
+            cv2.putText(frame, text, (11, y + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return frame
+
+    def dump(self, path: Optional[Path] = None) -> Optional[Path]:
+        """Write the session summary as JSON and return the file path."""
+        if not self.enabled:
+            return None
+        if path is None:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            path = PROFILE_DIR / f"{self.name}_{stamp}.json"
+        path.write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+        return path